@@ -1,30 +1,56 @@
 import asyncio
+import json
 import os
 import random
 import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any, TypeVar
+from urllib.parse import urlencode
 
 import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from openai import APIConnectionError, APIStatusError, AuthenticationError, OpenAIError
 from pydantic import BaseModel
 
 import prompts
 from classes import MAX_HIT_POINTS, InventoryItem, PlayerAttributes, Sender, State
 from context import ContextBuilder
-from database import GameRepository, RevisionConflictError, create_game_repository
+from database import (
+    DEFAULT_GAME_LISTING_LIMIT,
+    MAX_GAME_LISTING_LIMIT,
+    AsyncGameRepository,
+    GameRepository,
+    InvalidListingCursorError,
+    RevisionConflictError,
+    create_async_game_repository,
+    create_game_repository,
+)
+from game_cache import create_cached_game_repository
 from game_service import GameService
 from images import Image, Images
-from llm import LLMClient, OpenAILLMClient
+from llm import ImageModel, LLMClient, OpenAILLMClient, TextModel
+from llm_cache import create_cached_llm_client
 from llm_results import BooleanDecision, DamageDecision
+from observability import NoOpTraceRecorder, TraceRecorder
+from rate_limit import create_llm_rate_limiter
+from resilience import create_circuit_breaker, create_request_hedger
 from utils import bool_of_str
+from write_behind import create_write_behind_game_repository
 
 StructuredResult = TypeVar("StructuredResult")
 
-app: FastAPI = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Drain queued storage work (including write-behind saves) before the process exits.
+    await async_db.close()
+    db.close()
+
+app: FastAPI = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -75,13 +101,26 @@ class DiscardItemRequest(BaseModel):
     itemId: str | None = None
 
 load_dotenv()
-llm_client: LLMClient = OpenAILLMClient(api_key=os.environ["OPENAI_API_KEY"])
+trace_recorder: TraceRecorder = NoOpTraceRecorder()
+text_circuit_breaker = create_circuit_breaker(TextModel, trace_recorder)
+llm_client: LLMClient = create_cached_llm_client(
+    OpenAILLMClient(
+        api_key=os.environ["OPENAI_API_KEY"],
+        text_rate_limiter=create_llm_rate_limiter("text"),
+        image_rate_limiter=create_llm_rate_limiter("image"),
+        text_circuit_breaker=text_circuit_breaker,
+        image_circuit_breaker=create_circuit_breaker(ImageModel, trace_recorder),
+        text_hedger=create_request_hedger(TextModel, text_circuit_breaker, trace_recorder),
+    )
+)
 
-db: GameRepository = create_game_repository()
+db: GameRepository = create_cached_game_repository(create_write_behind_game_repository(create_game_repository()))
+async_db: AsyncGameRepository = create_async_game_repository(db)
 
 MAX_SUGGESTED_RESPONSES: int = 5
 MAX_MESSAGE_LENGTH: int = 2000
 MAX_SETUP_FIELD_LENGTH: int = 500
+TURN_DEADLINE_SECONDS: float | None = float(os.getenv("CYA_TURN_DEADLINE_SECONDS", "60")) or None
 
 def error_response(status_code: int, content: str) -> JSONResponse:
     return JSONResponse(
@@ -96,7 +135,13 @@ def conflict_response() -> JSONResponse:
     return error_response(409, "Game state was modified by another request. Please reload and try again.")
 
 def create_game_service() -> GameService:
-    return GameService(db, llm_client)
+    return GameService(
+        db,
+        llm_client,
+        async_repository=async_db,
+        trace_recorder=trace_recorder,
+        turn_deadline_seconds=TURN_DEADLINE_SECONDS,
+    )
 
 def startup_failure_response(stage: str, exc: Exception) -> JSONResponse:
     detail = str(exc) or type(exc).__name__
@@ -110,9 +155,9 @@ def validate_text_length(value: str, label: str, max_length: int) -> JSONRespons
         return error_response(400, f"{label} must be {max_length} characters or fewer.")
     return None
 
-def load_state_from_db(game_id: str) -> State | None:
+async def load_state_from_db(game_id: str) -> State | None:
     """Load a State object from the database by game ID."""
-    return db.get_game(game_id)
+    return await async_db.get_game(game_id)
 
 def empty_str_if_none(reply: str | None) -> str:
     return reply if reply is not None else ""
@@ -122,7 +167,7 @@ async def get_new_images_for(s: State) -> Images:
     if s._id is not None:
         raise ValueError("Cannot create images for a state that already has a game ID.")
 
-    db.save_game(s)
+    await async_db.save_game(s)
     if s._id is None:
         raise RuntimeError("Unable to save game before generating images.")
 
@@ -216,7 +261,7 @@ async def get_suggested_responses(gameId: str, n: int = 3) -> dict[str, Any]:
     if not 1 <= n <= MAX_SUGGESTED_RESPONSES:
         return error_response(400, f"Suggestion count must be between 1 and {MAX_SUGGESTED_RESPONSES}.")
 
-    state = load_state_from_db(gameId)
+    state = await load_state_from_db(gameId)
     if state is None:
         return error_response(400, "Invalid game ID.")
     
@@ -242,25 +287,32 @@ async def get_suggested_responses(gameId: str, n: int = 3) -> dict[str, Any]:
         "suggestions": suggestions
     }
 
-@app.get('/api/existing_games')
-def existing_games() -> dict[str, Any]:
-    saves: list[State] = db.all_games()
-    results: list[dict[str, Any]] = []
-    for s in saves:
-        results.append({
-            "playerName": s.player_name,
-            "playerDescription": s.player_description,
-            "worldTheme": s.world_theme,
-            "gameOverSummary": s.game_over_summary,
-            "gameOver": s.game_over,
-            "createdAt": s.created_at.isoformat(),
-            "updatedAt": s.updated_at.isoformat() if s.updated_at is not None else "",
-            "objectIDString": str(s._id),
-            "chatHistory": s.chat_history,
-
-        })
-
-    return { "results": results }
+@app.get('/api/health')
+def health() -> dict[str, Any]:
+    """Liveness, plus the LLM rate limiter budgets and circuit breaker states for dashboards and alerts."""
+    rate_limit_stats = getattr(llm_client, "rate_limit_stats", None)
+    circuit_states = getattr(llm_client, "circuit_states", None)
+    return {
+        "status": "ok",
+        "llmRateLimits": rate_limit_stats() if rate_limit_stats is not None else {},
+        "llmCircuits": circuit_states() if circuit_states is not None else {},
+    }
+
+@app.get('/api/games')
+async def games(limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None) -> dict[str, Any]:
+    """List saved games newest first, one keyset page of summary fields at a time."""
+    if not 1 <= limit <= MAX_GAME_LISTING_LIMIT:
+        return error_response(400, f"Listing limit must be between 1 and {MAX_GAME_LISTING_LIMIT}.")
+
+    try:
+        page = await async_db.list_game_summaries(limit, cursor)
+    except InvalidListingCursorError:
+        return error_response(400, "Invalid listing cursor.")
+
+    return {
+        "results": [summary.to_api_dict() for summary in page.summaries],
+        "nextCursor": page.next_cursor,
+    }
 
 @app.post('/api/delete_game')
 def delete_game(data: DeleteGameRequest) -> dict[str, Any]:
@@ -277,19 +329,19 @@ def delete_game(data: DeleteGameRequest) -> dict[str, Any]:
 
 
 @app.post('/api/load_game')
-def load_game(data: LoadGameRequest) -> dict[str, Any]:
+async def load_game(data: LoadGameRequest) -> dict[str, Any]:
     _id_string: str | None = data.objectIDString
     if not is_valid_id(_id_string):
         return error_response(400, "Can not load a game without a valid game ID.")
 
-    state = load_state_from_db(_id_string)
+    state = await load_state_from_db(_id_string)
     if state is None:
         return error_response(400, f"Provided save ID {_id_string} is not valid.")
     
     if state._id is None:
         return error_response(500, "Loaded game state is missing a game ID.")
 
-    image_bytes = db.get_image_bytes(state._id)
+    image_bytes = await async_db.get_image_bytes(state._id)
     if image_bytes is None:
         return error_response(404, "Images for the provided save could not be found.")
     portrait_bytes, backdrop_bytes = image_bytes
@@ -300,6 +352,8 @@ def load_game(data: LoadGameRequest) -> dict[str, Any]:
             "worldBackdropSrc": Image.json_content_from_bytes(backdrop_bytes),
             "hitPoints": state.hit_points,
             "gameId": str(state._id),
+            "gameOverSummary": state.game_over_summary,
+            "chatHistory": state.chat_history,
             "worldState": state.world_state.to_api_dict(),
             "playerAttributes": state.player_attributes.to_api_dict(),
             "storySummary": state.story_summary,
@@ -398,7 +452,7 @@ async def initialize(data: InitializeRequest) -> dict[str, Any]:
         return startup_failure_response("startup", exc)
 
     try:
-        db.save_game_and_images(state, images)
+        await async_db.save_game_and_images(state, images)
     except RevisionConflictError:
         return conflict_response()
     except Exception as exc:
@@ -462,6 +516,47 @@ async def response(data: ResponseRequest) -> dict[str, Any]:
         return error_response(turn_result.status_code, turn_result.content)
     return turn_result.to_response()
 
+def server_sent_event(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def turn_events(game_id: str, content: str) -> AsyncIterator[str]:
+    async for event in create_game_service().stream_turn(game_id, content):
+        if event.delta is not None:
+            yield server_sent_event("delta", {"content": event.delta})
+        elif event.result is not None and event.result.status_code != 200:
+            yield server_sent_event(
+                "error",
+                {
+                    "sender": str(Sender.ERROR),
+                    "content": event.result.content,
+                    "statusCode": event.result.status_code,
+                },
+            )
+        elif event.result is not None:
+            yield server_sent_event("result", event.result.to_response())
+
+@app.post('/api/response_stream')
+async def response_stream(data: ResponseRequest) -> Response:
+    """Like ``/api/response``, but streams the narration as Server-Sent Events while it is generated.
+
+    ``delta`` events carry narration text as it arrives; the stream ends with a
+    ``result`` event holding the same body ``/api/response`` returns, or an
+    ``error`` event. Failures found before narration starts are returned as
+    ordinary JSON errors.
+    """
+    if not is_valid_id(data.gameId):
+        return error_response(400, "Game ID is required. Please initialize or load a game first.")
+
+    validation_error = validate_text_length(data.content, "Message", MAX_MESSAGE_LENGTH)
+    if validation_error is not None:
+        return validation_error
+
+    return StreamingResponse(
+        turn_events(data.gameId, data.content),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post('/api/discard_item')
 def discard_item(data: DiscardItemRequest) -> dict[str, Any]:
     turn_result = create_game_service().discard_item(data.gameId, data.itemId)
@@ -470,7 +565,7 @@ def discard_item(data: DiscardItemRequest) -> dict[str, Any]:
     return turn_result.to_response()
 
 @app.get('/api/moments')
-def moments(gameId: str) -> dict[str, Any]:
+async def moments(gameId: str) -> dict[str, Any]:
     if not is_valid_id(gameId):
         return error_response(400, "Game ID is required.")
 
@@ -478,12 +573,30 @@ def moments(gameId: str) -> dict[str, Any]:
         {
             "id": moment.id,
             "caption": moment.caption,
-            "imageSrc": Image.json_content_from_bytes(image_bytes),
+            "imageSrc": moment_image_path(gameId, moment.id),
         }
-        for moment, image_bytes in db.list_moments(gameId)
+        for moment in await async_db.list_moment_summaries(gameId)
     ]
     return {"results": results}
 
+def moment_image_path(game_id: str, moment_id: str) -> str:
+    return "/api/moment_image?" + urlencode({"gameId": game_id, "momentId": moment_id})
+
+@app.get('/api/moment_image')
+async def moment_image(gameId: str, momentId: str) -> Response:
+    if not is_valid_id(gameId) or not is_valid_id(momentId):
+        return error_response(400, "Game ID and moment ID are required.")
+
+    image_bytes = await async_db.get_moment_image(gameId, momentId)
+    if image_bytes is None:
+        return error_response(404, "Moment not found.")
+    # Moment images never change once captured.
+    return Response(
+        content=image_bytes,
+        media_type="image/png",
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=3000)
@@ -0,0 +1,150 @@
+"""Cold storage for finished and idle games.
+
+Archived games are moved out of the hot SQLite database into a separate
+archive file. Their state documents are zlib-compressed; images are stored
+as-is because PNG data is already compressed. ``SQLiteGameRepository`` keeps a
+metadata-only stub row for every archived game, so it still appears in saved
+game listings. The repository restores the game from the archive the next
+time it is loaded.
+
+Run the archival job with ``python -m archive``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import RLock
+
+from classes import GameRecord, State, StoryMoment
+from state_codec import ZlibCodec, decode_document, decoders_for, encode_document
+
+DEFAULT_ARCHIVE_IDLE_DAYS = 30
+DEFAULT_ARCHIVE_BATCH_SIZE = 100
+
+
+class GameArchive:
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).expanduser().resolve().parent.mkdir(parents=True, exist_ok=True)
+        self._codec = ZlibCodec()
+        self._decoders = decoders_for(self._codec)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = RLock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_games (
+                    id TEXT PRIMARY KEY,
+                    archived_at TEXT NOT NULL,
+                    state_blob BLOB NOT NULL,
+                    portrait BLOB,
+                    backdrop BLOB
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_moments (
+                    game_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    id TEXT NOT NULL,
+                    caption TEXT NOT NULL,
+                    image BLOB NOT NULL,
+                    PRIMARY KEY (game_id, position)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def put(self, record: GameRecord) -> None:
+        game_id = record.state._id
+        if game_id is None:
+            raise ValueError("Only saved games can be archived.")
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM archived_moments WHERE game_id = ?", (game_id,))
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO archived_games (id, archived_at, state_blob, portrait, backdrop)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    game_id,
+                    datetime.now().isoformat(),
+                    encode_document(record.state.to_primitive(), self._codec),
+                    record.portrait,
+                    record.backdrop,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT INTO archived_moments (game_id, position, id, caption, image) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (game_id, position, moment.id, moment.caption, image_bytes)
+                    for position, (moment, image_bytes) in enumerate(record.moments)
+                ],
+            )
+
+    def get(self, game_id: str) -> GameRecord | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state_blob, portrait, backdrop FROM archived_games WHERE id = ?", (game_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            moment_rows = self._connection.execute(
+                "SELECT id, caption, image FROM archived_moments WHERE game_id = ? ORDER BY position ASC",
+                (game_id,),
+            ).fetchall()
+        return GameRecord(
+            state=State.from_primitive(decode_document(row["state_blob"], self._decoders)),
+            portrait=None if row["portrait"] is None else bytes(row["portrait"]),
+            backdrop=None if row["backdrop"] is None else bytes(row["backdrop"]),
+            moments=[
+                (StoryMoment(id=moment["id"], game_id=game_id, caption=moment["caption"]), bytes(moment["image"]))
+                for moment in moment_rows
+            ],
+        )
+
+    def delete(self, game_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM archived_moments WHERE game_id = ?", (game_id,))
+            self._connection.execute("DELETE FROM archived_games WHERE id = ?", (game_id,))
+
+    def __contains__(self, game_id: str) -> bool:
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM archived_games WHERE id = ?", (game_id,)).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def main() -> None:
+    from database import SQLiteGameRepository, create_game_repository
+    from partitioned import PartitionedGameRepository
+
+    parser = argparse.ArgumentParser(description="Move finished and idle games into the archive database.")
+    parser.add_argument(
+        "--idle-days",
+        type=int,
+        default=DEFAULT_ARCHIVE_IDLE_DAYS,
+        help="also archive games not saved for this many days (0 archives finished games only)",
+    )
+    parser.add_argument("--limit", type=int, default=DEFAULT_ARCHIVE_BATCH_SIZE, help="maximum games to archive")
+    arguments = parser.parse_args()
+
+    repository = create_game_repository()
+    if not isinstance(repository, (SQLiteGameRepository, PartitionedGameRepository)):
+        raise SystemExit("Archiving is only supported for SQLite storage.")
+    idle_before = datetime.now() - timedelta(days=arguments.idle_days) if arguments.idle_days > 0 else None
+    archived = repository.archive_games(idle_before=idle_before, limit=arguments.limit)
+    print(f"Archived {archived} game(s).")
+    repository.close()
+
+
+if __name__ == "__main__":
+    main()
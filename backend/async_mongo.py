@@ -0,0 +1,218 @@
+"""Native asyncio MongoDB storage.
+
+``AsyncMongoGameRepository`` implements ``AsyncGameRepository`` on pymongo's
+``AsyncMongoClient``, so a round trip to a remote cluster no longer holds the
+event loop or a worker thread. Images are stored with pymongo's
+``AsyncGridFSBucket``, the asyncio counterpart of the ``GridFS`` used by
+``MongoGameRepository``, so both repositories read and write the same files.
+
+Saves have the same revision semantics and partial updates as the
+synchronous repository.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+from datetime import datetime
+from typing import Any
+
+from gridfs.asynchronous import AsyncGridFSBucket
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
+
+from classes import GameSummary, GameSummaryPage, State, StoryMoment
+from database import (
+    DEFAULT_GAME_LISTING_LIMIT,
+    DEFAULT_MONGO_BASELINE_CACHE_SIZE,
+    MONGO_LATEST_FILE_SORT,
+    MONGO_LISTING_SORT,
+    MONGO_SUMMARY_PROJECTION,
+    MongoStateBaselines,
+    RevisionConflictError,
+    mongo_document,
+    mongo_document_id,
+    mongo_game_summary,
+    mongo_image_filenames,
+    mongo_listing_queries,
+    mongo_moment_filename,
+    mongo_state_update,
+    page_of,
+)
+from images import Images
+
+DEFAULT_MONGO_MAX_POOL_SIZE = 100
+DEFAULT_MONGO_MIN_POOL_SIZE = 0
+
+
+class AsyncMongoGameRepository:
+    def __init__(
+        self,
+        database: Any,
+        games_collection: str,
+        client: AsyncMongoClient | None = None,
+        baseline_cache_size: int = DEFAULT_MONGO_BASELINE_CACHE_SIZE,
+    ) -> None:
+        self._client = client
+        self._games = database.get_collection(games_collection)
+        self._moments = database.get_collection("moments")
+        self._files = database.get_collection("fs.files")
+        self._chunks = database.get_collection("fs.chunks")
+        self._bucket = AsyncGridFSBucket(database)
+        self._baselines = MongoStateBaselines(baseline_cache_size)
+        self._indexes_created = False
+
+    async def _ensure_indexes(self) -> None:
+        """Create the lookup indexes on first use; ``create_index`` is a no-op for existing ones."""
+        if self._indexes_created:
+            return
+        self._indexes_created = True
+        await self._files.create_index([("filename", ASCENDING), ("uploadDate", ASCENDING)])
+        await self._chunks.create_index([("files_id", ASCENDING), ("n", ASCENDING)], unique=True)
+        await self._moments.create_index([("game_id", ASCENDING)])
+        await self._games.create_index([("updated_at", DESCENDING), ("_id", DESCENDING)])
+
+    async def _put_file(self, filename: str, data: bytes) -> None:
+        await self._bucket.upload_from_stream(filename, data)
+
+    async def _read_files(self, filenames: list[str]) -> dict[str, bytes]:
+        """The latest version of each named GridFS file."""
+        latest: dict[str, Any] = {}
+        async for grid_out in self._bucket.find({"filename": {"$in": filenames}}).sort(MONGO_LATEST_FILE_SORT):
+            latest.setdefault(grid_out.filename, grid_out)
+        return {filename: await grid_out.read() for filename, grid_out in latest.items()}
+
+    async def _delete_files(self, filenames: list[str]) -> None:
+        """Delete every version of the named GridFS files together with their chunks."""
+        file_ids = [grid_out._id async for grid_out in self._bucket.find({"filename": {"$in": filenames}})]
+        for file_id in file_ids:
+            await self._bucket.delete(file_id)
+
+    async def save_game(self, state: State) -> None:
+        await self._ensure_indexes()
+        if state._id is None:
+            document = mongo_document(state)
+            result = await self._games.insert_one(document)
+            state._id = str(result.inserted_id)
+            self._baselines.remember(state._id, state.revision, document)
+            return
+
+        expected_revision = state.revision
+        updated_at = datetime.now()
+        document = mongo_document(replace(state, updated_at=updated_at))
+        result = await self._games.update_one(
+            {"_id": mongo_document_id(state._id), "revision": expected_revision},
+            mongo_state_update(self._baselines.get(state._id, expected_revision), document),
+            upsert=False,
+        )
+        if result.modified_count != 1:
+            self._baselines.forget(state._id)
+            raise RevisionConflictError("Game state was modified by another save.")
+        state.revision = expected_revision + 1
+        state.updated_at = updated_at
+        self._baselines.remember(state._id, state.revision, document)
+
+    async def save_game_and_images(self, state: State, images: Images) -> None:
+        await self.save_game(state)
+        await self._put_file(images.portrait.filename, images.portrait.bytes)
+        await self._put_file(images.backdrop.filename, images.backdrop.bytes)
+
+    async def delete_game(self, game_id: str) -> bool:
+        self._baselines.forget(game_id)
+        result = await self._games.delete_one({"_id": mongo_document_id(game_id)})
+        if result.deleted_count != 1:
+            return False
+        moment_ids = [document["_id"] async for document in self._moments.find({"game_id": game_id}, {"_id": 1})]
+        await self._delete_files(
+            [*mongo_image_filenames(game_id), *(mongo_moment_filename(moment_id) for moment_id in moment_ids)]
+        )
+        await self._moments.delete_many({"game_id": game_id})
+        return True
+
+    async def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        portrait_filename, backdrop_filename = mongo_image_filenames(game_id)
+        images = await self._read_files([portrait_filename, backdrop_filename])
+        if portrait_filename not in images or backdrop_filename not in images:
+            return None
+        return images[portrait_filename], images[backdrop_filename]
+
+    async def all_games(self) -> list[State]:
+        return [State.from_primitive(document) async for document in self._games.find({})]
+
+    async def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        await self._ensure_indexes()
+        summaries: list[GameSummary] = []
+        for query in mongo_listing_queries(cursor):
+            documents = (
+                self._games.find(query, MONGO_SUMMARY_PROJECTION)
+                .sort(MONGO_LISTING_SORT)
+                .limit(limit + 1 - len(summaries))
+            )
+            summaries.extend([mongo_game_summary(document) async for document in documents])
+            if len(summaries) > limit:
+                break
+        return page_of(summaries, limit)
+
+    async def get_game(self, game_id: str) -> State | None:
+        document = await self._games.find_one({"_id": mongo_document_id(game_id)})
+        if document is None:
+            return None
+        # Remember the document before the state (which shares its containers) can be mutated.
+        self._baselines.remember(game_id, int(document.get("revision", 0)), document)
+        return State.from_primitive(document)
+
+    async def get_revision(self, game_id: str) -> int | None:
+        document = await self._games.find_one({"_id": mongo_document_id(game_id)}, {"revision": 1})
+        return None if document is None else int(document.get("revision", 0))
+
+    async def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        await self._ensure_indexes()
+        moment = StoryMoment(game_id=game_id, caption=caption)
+        await self._moments.insert_one({"_id": moment.id, "game_id": game_id, "caption": caption})
+        await self._put_file(mongo_moment_filename(moment.id), image_bytes)
+        return moment
+
+    async def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        moments = await self.list_moment_summaries(game_id)
+        if not moments:
+            return []
+        images = await self._read_files([mongo_moment_filename(moment.id) for moment in moments])
+        return [
+            (moment, images[mongo_moment_filename(moment.id)])
+            for moment in moments
+            if mongo_moment_filename(moment.id) in images
+        ]
+
+    async def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return [
+            StoryMoment(id=str(document["_id"]), game_id=game_id, caption=document.get("caption", ""))
+            async for document in self._moments.find({"game_id": game_id}, {"caption": 1})
+        ]
+
+    async def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        if await self._moments.find_one({"_id": moment_id, "game_id": game_id}, {"_id": 1}) is None:
+            return None
+        return (await self._read_files([mongo_moment_filename(moment_id)])).get(mongo_moment_filename(moment_id))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+
+def create_async_mongo_game_repository() -> AsyncMongoGameRepository:
+    """Connect with the same environment as ``MongoGameRepository`` plus connection-pool sizing."""
+    missing = [name for name in ("MONGODB_CONNECTION_STRING", "CLUSTER", "COLLECTION") if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f"MongoDB storage requires: {', '.join(missing)}")
+    client: AsyncMongoClient = AsyncMongoClient(
+        os.environ["MONGODB_CONNECTION_STRING"],
+        maxPoolSize=int(os.getenv("CYA_MONGO_MAX_POOL_SIZE", str(DEFAULT_MONGO_MAX_POOL_SIZE))),
+        minPoolSize=int(os.getenv("CYA_MONGO_MIN_POOL_SIZE", str(DEFAULT_MONGO_MIN_POOL_SIZE))),
+    )
+    return AsyncMongoGameRepository(
+        client.get_database(os.environ["CLUSTER"]),
+        os.environ["COLLECTION"],
+        client=client,
+        baseline_cache_size=int(os.getenv("CYA_MONGO_BASELINE_CACHE_SIZE", str(DEFAULT_MONGO_BASELINE_CACHE_SIZE))),
+    )
@@ -0,0 +1,249 @@
+"""Measure game repositories on synthetic stores.
+
+Every repository runs the same workload against a freshly generated store:
+create games with images and moments, then load, save, list, scan and delete
+them. Each operation reports its throughput and p50/p99 latency. Results are
+written to a JSON file, and a later run can be compared against it to catch
+regressions.
+
+Run from ``backend/`` with ``python -m benchmarks.repositories``, for example::
+
+    python -m benchmarks.repositories --games 2000 --history 300 --blob-kib 256
+    python -m benchmarks.repositories --compare data/benchmarks/repositories-<timestamp>.json
+
+The ``mongodb`` repository is only benchmarked when ``MONGODB_CONNECTION_STRING``
+(plus ``CLUSTER`` and ``COLLECTION``) is set; point it at a scratch database,
+because ``all_games`` scans the whole collection. Games the benchmark creates
+are deleted when it finishes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.state_codecs import synthetic_state
+from classes import MAX_HIT_POINTS, State
+from database import GameRepository, MongoGameRepository, SQLiteGameRepository
+from game_cache import CachedGameRepository
+from images import Images
+from partitioned import open_sqlite_game_repository
+from state_codec import ZlibCodec
+from write_behind import WriteBehindGameRepository
+
+DEFAULT_RESULTS_DIRECTORY = Path(__file__).resolve().parent.parent / "data" / "benchmarks"
+DEFAULT_REGRESSION_TOLERANCE = 0.2
+DEFAULT_PARTITIONS = 4
+
+
+@dataclass
+class BenchmarkConfig:
+    games: int = 200
+    history_length: int = 100
+    blob_bytes: int = 64 * 1024
+    moments_per_game: int = 2
+    operations: int = 200
+    scan_rounds: int = 3
+    partitions: int = DEFAULT_PARTITIONS
+    seed: int = 0
+
+
+@dataclass
+class OperationResult:
+    count: int
+    ops_per_second: float
+    p50_ms: float
+    p99_ms: float
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(samples: list[float]) -> OperationResult:
+    return OperationResult(
+        count=len(samples),
+        ops_per_second=len(samples) / sum(samples) if sum(samples) > 0 else 0.0,
+        p50_ms=percentile(samples, 0.50) * 1000,
+        p99_ms=percentile(samples, 0.99) * 1000,
+    )
+
+
+def repository_factories(config: BenchmarkConfig) -> dict[str, Callable[[Path], GameRepository]]:
+    """Repositories to compare, each built in (or ignoring) a scratch directory."""
+    factories: dict[str, Callable[[Path], GameRepository]] = {
+        "sqlite": lambda directory: SQLiteGameRepository(directory / "cya.db", codec=ZlibCodec()),
+        "sqlite-partitioned": lambda directory: open_sqlite_game_repository(
+            directory / "cya.db", partitions=config.partitions, codec=ZlibCodec()
+        ),
+        "sqlite-cached": lambda directory: CachedGameRepository(
+            SQLiteGameRepository(directory / "cya.db", codec=ZlibCodec())
+        ),
+        "sqlite-write-behind": lambda directory: CachedGameRepository(
+            WriteBehindGameRepository(SQLiteGameRepository(directory / "cya.db", codec=ZlibCodec()))
+        ),
+    }
+    if all(os.environ.get(name) for name in ("MONGODB_CONNECTION_STRING", "CLUSTER", "COLLECTION")):
+        factories["mongodb"] = lambda directory: MongoGameRepository()
+    return factories
+
+
+def timed(samples: list[float], operation: Callable[..., Any], *args: Any) -> Any:
+    started = time.perf_counter()
+    result = operation(*args)
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def run_workload(repository: GameRepository, config: BenchmarkConfig) -> dict[str, OperationResult]:
+    """Populate ``repository`` with a synthetic store and time every operation on it."""
+    generator = random.Random(config.seed)
+    template = synthetic_state(config.history_length).to_primitive()
+    samples: dict[str, list[float]] = {}
+
+    def sample(name: str) -> list[float]:
+        return samples.setdefault(name, [])
+
+    game_ids: list[str] = []
+    for _ in range(config.games):
+        state = State.from_primitive(template)
+        images = Images("pending", generator.randbytes(config.blob_bytes), generator.randbytes(config.blob_bytes))
+        timed(sample("save_game_and_images"), repository.save_game_and_images, state, images)
+        assert state._id is not None
+        game_ids.append(state._id)
+        for index in range(config.moments_per_game):
+            image = generator.randbytes(config.blob_bytes)
+            timed(sample("add_moment"), repository.add_moment, state._id, f"Moment {index}.", image)
+
+    try:
+        for _ in range(config.operations):
+            game_id = generator.choice(game_ids)
+            state = timed(sample("get_game"), repository.get_game, game_id)
+            state.chat_history.append({"role": "user", "content": "I follow the bell toward the choir."})
+            state.chat_history.append({"role": "assistant", "content": '{"content": "The water parts."}'})
+            state.hit_points = generator.randint(1, MAX_HIT_POINTS)
+            timed(sample("save_game"), repository.save_game, state)
+            timed(sample("get_image_bytes"), repository.get_image_bytes, game_id)
+            timed(sample("list_moments"), repository.list_moments, game_id)
+            timed(sample("list_game_summaries"), repository.list_game_summaries)
+        for _ in range(config.scan_rounds):
+            timed(sample("all_games"), repository.all_games)
+        for game_id in generator.sample(game_ids, min(config.operations, len(game_ids))):
+            timed(sample("delete_game"), repository.delete_game, game_id)
+    finally:
+        for game_id in game_ids:
+            repository.delete_game(game_id)
+    return {name: summarize(operation_samples) for name, operation_samples in samples.items()}
+
+
+def run_benchmarks(config: BenchmarkConfig, repositories: list[str] | None = None) -> dict[str, Any]:
+    factories = repository_factories(config)
+    unknown = set(repositories or []) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown or unconfigured repositories: {', '.join(sorted(unknown))}")
+    results: dict[str, dict[str, dict[str, Any]]] = {}
+    for name in repositories or list(factories):
+        with tempfile.TemporaryDirectory(prefix="cya-benchmark-") as directory:
+            repository = factories[name](Path(directory))
+            try:
+                operations = run_workload(repository, config)
+            finally:
+                repository.close()
+        results[name] = {operation: asdict(result) for operation, result in operations.items()}
+    return {"created_at": datetime.now().isoformat(timespec="seconds"), "config": asdict(config), "results": results}
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float = DEFAULT_REGRESSION_TOLERANCE
+) -> list[str]:
+    """Operations that got slower than ``baseline`` by more than ``tolerance`` (a fraction)."""
+    regressions: list[str] = []
+    for repository, operations in current["results"].items():
+        for operation, result in operations.items():
+            before = baseline["results"].get(repository, {}).get(operation)
+            if before is None:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                if before[metric] > 0 and result[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{repository} {operation} {metric}: {before[metric]:.3f} -> {result[metric]:.3f}"
+                    )
+            if result["ops_per_second"] < before["ops_per_second"] * (1 - tolerance):
+                regressions.append(
+                    f"{repository} {operation} ops/s: {before['ops_per_second']:.1f} -> {result['ops_per_second']:.1f}"
+                )
+    return regressions
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"{'repository':<22} {'operation':<22} {'count':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for repository, operations in report["results"].items():
+        for operation, result in operations.items():
+            print(
+                f"{repository:<22} {operation:<22} {result['count']:>6} {result['ops_per_second']:>10.1f} "
+                f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}"
+            )
+
+
+def main() -> None:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Benchmark game repositories on synthetic stores.")
+    parser.add_argument("--games", type=int, default=defaults.games, help="games in the synthetic store")
+    parser.add_argument("--history", type=int, default=defaults.history_length, help="chat messages per game")
+    parser.add_argument("--blob-kib", type=int, default=defaults.blob_bytes // 1024, help="size of each image")
+    parser.add_argument("--moments", type=int, default=defaults.moments_per_game, help="story moments per game")
+    parser.add_argument("--operations", type=int, default=defaults.operations, help="timed calls per operation")
+    parser.add_argument("--scan-rounds", type=int, default=defaults.scan_rounds, help="timed all_games calls")
+    parser.add_argument("--partitions", type=int, default=defaults.partitions, help="files for sqlite-partitioned")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repositories", help="comma-separated repositories to run (default: all available)")
+    parser.add_argument("--output", type=Path, help="where to save the results (default: data/benchmarks/)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_REGRESSION_TOLERANCE, help="allowed slowdown")
+    arguments = parser.parse_args()
+
+    config = BenchmarkConfig(
+        games=arguments.games,
+        history_length=arguments.history,
+        blob_bytes=arguments.blob_kib * 1024,
+        moments_per_game=arguments.moments,
+        operations=arguments.operations,
+        scan_rounds=arguments.scan_rounds,
+        partitions=arguments.partitions,
+        seed=arguments.seed,
+    )
+    repositories = arguments.repositories.split(",") if arguments.repositories else None
+    report = run_benchmarks(config, repositories)
+    print_report(report)
+
+    output = arguments.output or DEFAULT_RESULTS_DIRECTORY / f"repositories-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Saved results to {output}")
+
+    if arguments.compare is not None:
+        baseline = json.loads(arguments.compare.read_text(encoding="utf-8"))
+        if baseline["config"] != report["config"]:
+            print("Warning: the baseline was recorded with a different configuration.")
+        regressions = compare(baseline, report, arguments.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
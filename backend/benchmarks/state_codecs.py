@@ -0,0 +1,117 @@
+"""Compare state codecs on synthetic games of realistic length.
+
+Run from ``backend/`` with ``python -m benchmarks.state_codecs``.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from classes import State
+from state_codec import (
+    StateCodec,
+    ZlibCodec,
+    ZstdCodec,
+    decode_document,
+    decoders_for,
+    encode_document,
+    train_zstd_dictionary,
+    zstandard,
+)
+
+HISTORY_LENGTHS = (10, 100, 500, 2000)
+ROUNDS = 20
+PLAYER_ACTIONS = (
+    "I search the alcove behind the tapestry.",
+    "I light the lantern and follow the stair down.",
+    "I ask the ferryman where the tide goes at night.",
+    "I trade my compass for the silver key.",
+    "I wade toward the flooded nave.",
+)
+NARRATION = (
+    "Dust spills from the folds as the tapestry falls aside.",
+    "A narrow stair curls down into the dark, its steps worn smooth by centuries of pilgrims.",
+    "Somewhere below, water drips in a slow and patient rhythm.",
+    "The ferryman's lamp swings, throwing green light across the drowned pews.",
+    "Your lantern gutters; the moss on the walls answers with a pale glow of its own.",
+    "A bell tolls once beneath the water, and the surface trembles.",
+    "The silver key is colder than it should be, and it hums faintly against your palm.",
+    "Footprints in the silt lead toward the choir, then stop as if their owner simply rose away.",
+)
+
+
+def synthetic_state(history_length: int) -> State:
+    chat_history: list[dict[str, Any]] = []
+    for index in range(history_length):
+        if index % 2 == 0:
+            action = PLAYER_ACTIONS[index % len(PLAYER_ACTIONS)]
+            chat_history.append({"role": "user", "content": f"{action} ({index})"})
+        else:
+            sentences = [NARRATION[(index * step) % len(NARRATION)] for step in (1, 3, 7)]
+            narration = " ".join(sentences)
+            content = f'{{"content": "{narration}", "health_change": {index % 5 - 2}, "game_over": false}}'
+            chat_history.append({"role": "assistant", "content": content})
+    return State(
+        player_name="Iris",
+        player_description="A cartographer searching for her missing brother.",
+        world_theme="A drowned cathedral city lit by bioluminescent moss.",
+        chat_history=chat_history,
+    )
+
+
+def stored_documents(state: State) -> list[Any]:
+    """What ``SQLiteGameRepository`` writes: the state without its history, then one row per turn."""
+    document = state.to_primitive()
+    chat_history = document.pop("chat_history")
+    return [document, *chat_history]
+
+
+def time_per_call(function: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def encoded_size(encoded: str | bytes) -> int:
+    return len(encoded if isinstance(encoded, bytes) else encoded.encode("utf-8"))
+
+
+def codecs() -> dict[str, StateCodec | None]:
+    available: dict[str, StateCodec | None] = {"json": None, "zlib": ZlibCodec()}
+    if zstandard is not None:
+        available["zstd"] = ZstdCodec()
+        samples = [encode_document(message).encode("utf-8") for message in synthetic_state(2000).chat_history]
+        available["zstd+dict"] = ZstdCodec(dictionary=train_zstd_dictionary(samples, size=16 * 1024))
+    return available
+
+
+def main() -> None:
+    print(f"{'codec':<10} {'turns':>6} {'bytes':>10} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+    available = codecs()
+    for history_length in HISTORY_LENGTHS:
+        documents = stored_documents(synthetic_state(history_length))
+        plain_size = sum(encoded_size(encode_document(document)) for document in documents)
+        for name, codec in available.items():
+            decoders = decoders_for(codec)
+            encoded = [encode_document(document, codec) for document in documents]
+            size = sum(encoded_size(row) for row in encoded)
+
+            def encode_all(documents: list[Any] = documents, codec: StateCodec | None = codec) -> None:
+                for document in documents:
+                    encode_document(document, codec)
+
+            def decode_all(encoded: list[str | bytes] = encoded, decoders: dict[int, StateCodec] = decoders) -> None:
+                for row in encoded:
+                    decode_document(row, decoders)
+
+            print(
+                f"{name:<10} {history_length:>6} {size:>10} {plain_size / size:>7.2f} "
+                f"{time_per_call(encode_all) * 1000:>10.3f} {time_per_call(decode_all) * 1000:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
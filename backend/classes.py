@@ -1,3 +1,4 @@
+from copy import deepcopy
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum, auto
@@ -8,6 +9,9 @@ MAX_HIT_POINTS: int = 5
 MIN_HIT_POINTS: int = 0
 DEFAULT_MAX_CARRY_WEIGHT_KG: float = 40.0
 LEGACY_INVENTORY_ITEM_WEIGHT_KG: float = 0.5
+# Version of the ``State.to_primitive()`` document. Documents without it were
+# written by older releases and are upgraded through ``State.deserialize``.
+STATE_SCHEMA_VERSION: int = 1
 
 
 @dataclass
@@ -50,6 +54,25 @@ class InventoryItem:
             quantity=int(data.get("quantity") or 1),
         )
 
+    def to_primitive(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "weight_kg": self.weight_kg,
+            "quantity": self.quantity,
+        }
+
+    @classmethod
+    def from_primitive(cls, data: dict[str, Any]) -> "InventoryItem":
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            description=data["description"],
+            weight_kg=data["weight_kg"],
+            quantity=data["quantity"],
+        )
+
 
 @dataclass
 class PlayerAttributes:
@@ -81,10 +104,34 @@ class PlayerAttributes:
             max_carry_weight_kg=float(max_carry_weight_kg) if max_carry_weight_kg else DEFAULT_MAX_CARRY_WEIGHT_KG,
         )
 
+    def to_primitive(self) -> dict[str, Any]:
+        return {
+            "age_years": self.age_years,
+            "height_cm": self.height_cm,
+            "body_weight_kg": self.body_weight_kg,
+            "max_carry_weight_kg": self.max_carry_weight_kg,
+        }
+
+    @classmethod
+    def from_primitive(cls, data: dict[str, Any]) -> "PlayerAttributes":
+        return cls(
+            age_years=data["age_years"],
+            height_cm=data["height_cm"],
+            body_weight_kg=data["body_weight_kg"],
+            max_carry_weight_kg=data["max_carry_weight_kg"],
+        )
+
 
 QUEST_STATUSES = ("active", "resolved")
 
 
+def _datetime_from_primitive(value: Any) -> datetime | None:
+    """Timestamps are ISO text in JSON documents and native datetimes in BSON ones."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
 @dataclass
 class Quest:
     id: str = field(default_factory=lambda: str(uuid4()))
@@ -130,6 +177,29 @@ class Quest:
             outcome=str(data.get("outcome") or ""),
         )
 
+    def to_primitive(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "status": self.status,
+            "current_step": self.current_step,
+            "step_history": list(self.step_history),
+            "outcome": self.outcome,
+        }
+
+    @classmethod
+    def from_primitive(cls, data: dict[str, Any]) -> "Quest":
+        return cls(
+            id=data["id"],
+            title=data["title"],
+            description=data["description"],
+            status=data["status"],
+            current_step=data["current_step"],
+            step_history=data["step_history"],
+            outcome=data["outcome"],
+        )
+
 
 @dataclass
 class WorldState:
@@ -188,6 +258,31 @@ class WorldState:
             world_flags=dict(data.get("world_flags") or {}),
         )
 
+    def to_primitive(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "current_location": self.current_location,
+            "inventory": [item.to_primitive() for item in self.inventory],
+            "conditions": list(self.conditions),
+            "known_npcs": dict(self.known_npcs),
+            "relationships": dict(self.relationships),
+            "quests": [quest.to_primitive() for quest in self.quests],
+            "world_flags": dict(self.world_flags),
+        }
+
+    @classmethod
+    def from_primitive(cls, data: dict[str, Any]) -> "WorldState":
+        return cls(
+            version=data["version"],
+            current_location=data["current_location"],
+            inventory=[InventoryItem.from_primitive(item) for item in data["inventory"]],
+            conditions=data["conditions"],
+            known_npcs=data["known_npcs"],
+            relationships=data["relationships"],
+            quests=[Quest.from_primitive(quest) for quest in data["quests"]],
+            world_flags=data["world_flags"],
+        )
+
 
 @dataclass
 class StoryMoment:
@@ -202,6 +297,32 @@ class StoryMoment:
         }
 
 
+@dataclass
+class GameSummary:
+    id: str
+    player_name: str = ""
+    world_theme: str = ""
+    game_over: bool = False
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    def to_api_dict(self) -> dict[str, Any]:
+        return {
+            "objectIDString": self.id,
+            "playerName": self.player_name,
+            "worldTheme": self.world_theme,
+            "gameOver": self.game_over,
+            "createdAt": self.created_at.isoformat() if self.created_at is not None else "",
+            "updatedAt": self.updated_at.isoformat() if self.updated_at is not None else "",
+        }
+
+
+@dataclass
+class GameSummaryPage:
+    summaries: list[GameSummary] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
 @dataclass
 class State:
     _id: str | None = None
@@ -238,7 +359,9 @@ class State:
 
     @classmethod
     def deserialize(cls, data: dict[str, Any]) -> "State":
+        """Build a state from a document in any historical shape, applying legacy conversions."""
         values = dict(data)
+        values.pop("schema_version", None)
         for field_name in ("created_at", "updated_at"):
             value = values.get(field_name)
             if isinstance(value, str) and value:
@@ -249,6 +372,87 @@ class State:
         values["player_attributes"] = PlayerAttributes.deserialize(values.get("player_attributes"))
         return cls(**values)
 
+    def to_primitive(self) -> dict[str, Any]:
+        """The ``serialize()`` document plus ``schema_version``, built field by field instead of through ``asdict``.
+
+        Containers are copied one level deep; chat messages and world flag
+        values are shared with the state, so treat the result as read-only.
+        """
+        data: dict[str, Any] = {
+            "schema_version": STATE_SCHEMA_VERSION,
+            "player_name": self.player_name,
+            "player_description": self.player_description,
+            "world_theme": self.world_theme,
+            "initialization_prompt": self.initialization_prompt,
+            "chat_history": list(self.chat_history),
+            "hit_points": self.hit_points,
+            "game_over": self.game_over,
+            "game_over_summary": self.game_over_summary,
+            "story_summary": self.story_summary,
+            "unresolved_threads": list(self.unresolved_threads),
+            "summary_through_turn": self.summary_through_turn,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "revision": self.revision,
+            "world_state": self.world_state.to_primitive(),
+            "player_attributes": self.player_attributes.to_primitive(),
+        }
+        if self._id is not None:
+            data["_id"] = self._id
+        return data
+
+    def copy(self) -> "State":
+        """An independent copy that can be mutated without affecting this state.
+
+        Unlike ``to_primitive()``, chat messages and world flag values are copied too.
+        """
+        data = self.to_primitive()
+        data["chat_history"] = [dict(message) for message in self.chat_history]
+        data["world_state"]["world_flags"] = deepcopy(self.world_state.world_flags)
+        return State.from_primitive(data)
+
+    @classmethod
+    def from_primitive(cls, data: dict[str, Any]) -> "State":
+        """Rebuild a state from a ``to_primitive()`` document.
+
+        Takes ownership of the containers in ``data``. Documents without the
+        current ``schema_version`` have not been migrated yet and go through the
+        permissive ``deserialize``; current documents are trusted as-is.
+        """
+        if data.get("schema_version") != STATE_SCHEMA_VERSION:
+            return cls.deserialize(data)
+        game_id = data.get("_id")
+        return cls(
+            _id=None if game_id is None else str(game_id),
+            player_name=data["player_name"],
+            player_description=data["player_description"],
+            world_theme=data["world_theme"],
+            initialization_prompt=data["initialization_prompt"],
+            chat_history=data["chat_history"],
+            hit_points=data["hit_points"],
+            game_over=data["game_over"],
+            game_over_summary=data["game_over_summary"],
+            story_summary=data["story_summary"],
+            unresolved_threads=data["unresolved_threads"],
+            summary_through_turn=data["summary_through_turn"],
+            created_at=_datetime_from_primitive(data["created_at"]),
+            updated_at=_datetime_from_primitive(data["updated_at"]),
+            revision=data["revision"],
+            world_state=WorldState.from_primitive(data["world_state"]),
+            player_attributes=PlayerAttributes.from_primitive(data["player_attributes"]),
+        )
+
+
+@dataclass
+class GameRecord:
+    """Everything stored for one game, used to move games between databases."""
+
+    state: State
+    portrait: bytes | None = None
+    backdrop: bytes | None = None
+    moments: list[tuple[StoryMoment, bytes]] = field(default_factory=list)
+
+
 class Sender(Enum):
     GAMEMASTER = auto()
     ERROR = auto()
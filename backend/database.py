@@ -1,28 +1,82 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
+import copy
 import json
 import os
 import sqlite3
+import zlib
 from abc import abstractmethod
-from dataclasses import replace
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from functools import partial
+from itertools import count
 from pathlib import Path
-from threading import RLock
-from typing import Any, Protocol
+from queue import Queue
+from threading import Lock, RLock
+from typing import Any, Callable, Protocol, TypeVar
 from uuid import uuid4
 
 import gridfs
 from bson.objectid import ObjectId
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReplaceOne
 
-from classes import State, StoryMoment
+from archive import DEFAULT_ARCHIVE_BATCH_SIZE, GameArchive
+from classes import STATE_SCHEMA_VERSION, GameRecord, GameSummary, GameSummaryPage, State, StoryMoment, WorldState
 from images import Images, ImageType
+from state_codec import StateCodec, create_state_codec, decode_document, decoders_for, encode_document
+from utils import bool_of_str
+from world_events import apply_world_events, diff_world_state
+
+DEFAULT_READER_THREADS = 4
+DEFAULT_SQLITE_READER_POOL_SIZE = DEFAULT_READER_THREADS
+DEFAULT_SQLITE_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+DEFAULT_SQLITE_CACHE_SIZE_KIB = 16 * 1024
+DEFAULT_WORLD_SNAPSHOT_INTERVAL = 50
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+DEFAULT_GAME_LISTING_LIMIT = 50
+DEFAULT_TRANSFER_BATCH_SIZE = 100
+DEFAULT_MIGRATION_BATCH_SIZE = 500
+DEFAULT_MONGO_BASELINE_CACHE_SIZE = 1024
+MAX_GAME_LISTING_LIMIT = 200
+
+RepositoryResult = TypeVar("RepositoryResult")
 
 
 class RevisionConflictError(RuntimeError):
     """Raised when saving a state whose revision is no longer current."""
 
 
+class InvalidListingCursorError(ValueError):
+    """Raised when a game listing cursor cannot be decoded."""
+
+
+@dataclass
+class GameWrite:
+    """A state already stamped with its new revision, to replace the row stored at ``expected_revision``."""
+
+    state: State
+    expected_revision: int
+    images: Images | None = None
+    # (revision, world state) of saves coalesced into this one, oldest first, so each keeps its own world events.
+    coalesced_world_states: list[tuple[int, WorldState]] = field(default_factory=list)
+
+
+@dataclass
+class StoredStateDocument:
+    """A state document as stored, read at ``revision`` so an upgraded copy can replace it safely."""
+
+    game_id: str
+    revision: int
+    document: dict[str, Any]
+
+
 class GameRepository(Protocol):
     @abstractmethod
     def save_game(self, state: State) -> None: ...
@@ -39,27 +93,186 @@ class GameRepository(Protocol):
     @abstractmethod
     def all_games(self) -> list[State]: ...
 
+    @abstractmethod
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage: ...
+
     @abstractmethod
     def get_game(self, game_id: str) -> State | None: ...
 
+    @abstractmethod
+    def get_revision(self, game_id: str) -> int | None: ...
+
     @abstractmethod
     def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment: ...
 
     @abstractmethod
     def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]: ...
 
+    @abstractmethod
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]: ...
+
+    @abstractmethod
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None: ...
+
+    @abstractmethod
+    def close(self) -> None: ...
+
+
+class BatchGameRepository(GameRepository, Protocol):
+    @abstractmethod
+    def save_games(self, writes: list[GameWrite]) -> list[GameWrite]: ...
+
+
+class PortableGameRepository(GameRepository, Protocol):
+    @abstractmethod
+    def list_game_ids(self, after: str | None = None, limit: int = DEFAULT_TRANSFER_BATCH_SIZE) -> list[str]: ...
+
+    @abstractmethod
+    def export_game(self, game_id: str) -> GameRecord | None: ...
+
+    @abstractmethod
+    def import_games(self, records: list[GameRecord]) -> None: ...
+
+
+class MigratableGameRepository(GameRepository, Protocol):
+    @abstractmethod
+    def list_legacy_state_documents(
+        self, after: str | None = None, limit: int = DEFAULT_MIGRATION_BATCH_SIZE
+    ) -> list[StoredStateDocument]: ...
+
+    @abstractmethod
+    def replace_state_documents(self, documents: list[StoredStateDocument]) -> int: ...
+
+
+class AsyncGameRepository(Protocol):
+    @abstractmethod
+    async def save_game(self, state: State) -> None: ...
+
+    @abstractmethod
+    async def save_game_and_images(self, state: State, images: Images) -> None: ...
+
+    @abstractmethod
+    async def delete_game(self, game_id: str) -> bool: ...
+
+    @abstractmethod
+    async def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None: ...
+
+    @abstractmethod
+    async def all_games(self) -> list[State]: ...
+
+    @abstractmethod
+    async def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage: ...
+
+    @abstractmethod
+    async def get_game(self, game_id: str) -> State | None: ...
+
+    @abstractmethod
+    async def get_revision(self, game_id: str) -> int | None: ...
+
+    @abstractmethod
+    async def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment: ...
+
+    @abstractmethod
+    async def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]: ...
+
+    @abstractmethod
+    async def list_moment_summaries(self, game_id: str) -> list[StoryMoment]: ...
+
+    @abstractmethod
+    async def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+def _timestamp(value: datetime | None) -> str | None:
+    """Fixed-width ISO text, so indexed timestamp columns sort chronologically."""
+    return None if value is None else value.isoformat(timespec="microseconds")
+
+
+def encode_listing_cursor(updated_at: datetime | None, game_id: str) -> str:
+    """Opaque keyset cursor: listings resume strictly after (updated_at, id)."""
+    payload = json.dumps([_timestamp(updated_at), game_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
 
-def _json_default(value: Any) -> str:
-    if isinstance(value, datetime):
-        return value.isoformat()
-    raise TypeError(f"Cannot serialize {type(value).__name__} to JSON")
+def decode_listing_cursor(cursor: str) -> tuple[datetime | None, str]:
+    try:
+        updated_at, game_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(game_id, str):
+            raise TypeError("cursor game id must be a string")
+        return (None if updated_at is None else datetime.fromisoformat(updated_at)), game_id
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidListingCursorError("Invalid game listing cursor.") from exc
+
+
+def partition_of(game_id: str, partitions: int) -> int:
+    """Stable partition index for a game id; the same in every process and release."""
+    return zlib.crc32(game_id.encode("utf-8")) % partitions
+
+
+def page_of(summaries: list[GameSummary], limit: int) -> GameSummaryPage:
+    """Build a page from up to ``limit + 1`` summaries; the extra one only signals a next page."""
+    if len(summaries) <= limit:
+        return GameSummaryPage(summaries=summaries)
+    page = summaries[:limit]
+    return GameSummaryPage(summaries=page, next_cursor=encode_listing_cursor(page[-1].updated_at, page[-1].id))
+
+
+SQLITE_SCHEMA_VERSION = 7
+SQLITE_GAME_TABLES = ("games", "turns", "moments", "world_events", "world_snapshots")
+GAME_METADATA_COLUMNS = ("revision", "created_at", "updated_at", "game_over", "player_name", "world_theme")
 
 
 class SQLiteGameRepository:
-    """Local, zero-configuration game storage backed by one SQLite file."""
+    """Local, zero-configuration game storage backed by one SQLite file.
 
-    def __init__(self, path: str | Path) -> None:
+    All writes go through a single writer connection guarded by ``_lock``.
+    File-backed databases also keep a pool of read-only connections; each read
+    runs in its own transaction, so it sees a consistent WAL snapshot without
+    waiting for the writer. In-memory databases cannot be shared between
+    connections and read through the writer instead.
+
+    With a ``codec``, state documents and chat turns are stored compressed;
+    rows written without one (or by older releases) remain readable.
+
+    The world state is event-sourced: each save appends the diff against the
+    current world state, kept in the ``world_state_json`` column, to
+    ``world_events``, and every ``world_snapshot_interval`` events a full
+    snapshot is written, so ``get_world_state_at`` can rebuild the world at any
+    revision by replaying at most that many events. Saves and loads only touch
+    the column.
+
+    With an ``archive``, ``archive_games`` moves finished and idle games into
+    cold storage, leaving a metadata-only stub row so listings still show them;
+    ``get_game`` restores an archived game before returning it.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        reader_pool_size: int = DEFAULT_SQLITE_READER_POOL_SIZE,
+        mmap_size_bytes: int = DEFAULT_SQLITE_MMAP_SIZE_BYTES,
+        cache_size_kib: int = DEFAULT_SQLITE_CACHE_SIZE_KIB,
+        codec: StateCodec | None = None,
+        world_snapshot_interval: int = DEFAULT_WORLD_SNAPSHOT_INTERVAL,
+        archive: GameArchive | None = None,
+    ) -> None:
+        if reader_pool_size < 0:
+            raise ValueError("reader_pool_size must be non-negative.")
+        if world_snapshot_interval < 1:
+            raise ValueError("world_snapshot_interval must be at least 1.")
+        self.world_snapshot_interval = world_snapshot_interval
+        self.archive = archive
         self.path = str(path)
+        self.mmap_size_bytes = mmap_size_bytes
+        self.cache_size_kib = cache_size_kib
+        self.codec = codec
+        self._decoders = decoders_for(codec)
         if self.path != ":memory:":
             Path(self.path).expanduser().resolve().parent.mkdir(parents=True, exist_ok=True)
 
@@ -68,26 +281,87 @@ class SQLiteGameRepository:
         self._lock = RLock()
         self._configure()
         self._create_schema()
+        self._migrate()
+
+        self._readers: Queue[sqlite3.Connection] | None = None
+        if self.path != ":memory:" and reader_pool_size > 0:
+            self._readers = Queue()
+            for _ in range(reader_pool_size):
+                self._readers.put(self._connect_reader())
 
     def _configure(self) -> None:
         with self._connection:
-            self._connection.execute("PRAGMA busy_timeout = 5000")
+            self._configure_connection(self._connection)
             self._connection.execute("PRAGMA foreign_keys = ON")
+            # Only takes effect for new databases; compact() converts older ones.
+            self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
             if self.path != ":memory:":
                 self._connection.execute("PRAGMA journal_mode = WAL")
 
+    def _configure_connection(self, connection: sqlite3.Connection) -> None:
+        connection.execute("PRAGMA busy_timeout = 5000")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size_bytes)}")
+        connection.execute(f"PRAGMA cache_size = {-int(self.cache_size_kib)}")
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        uri = Path(self.path).expanduser().resolve().as_uri() + "?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        self._configure_connection(connection)
+        connection.execute("PRAGMA query_only = ON")
+        return connection
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection whose statements share one read snapshot."""
+        if self._readers is None:
+            with self._lock:
+                yield self._connection
+            return
+
+        connection = self._readers.get()
+        try:
+            connection.execute("BEGIN")
+            try:
+                yield connection
+            finally:
+                connection.rollback()
+        finally:
+            self._readers.put(connection)
+
     def _create_schema(self) -> None:
         with self._connection:
+            is_new_database = not self._table_exists("games")
             self._connection.execute(
                 """
                 CREATE TABLE IF NOT EXISTS games (
                     id TEXT PRIMARY KEY,
                     state_json TEXT NOT NULL,
+                    world_state_json TEXT,
                     portrait BLOB,
-                    backdrop BLOB
+                    backdrop BLOB,
+                    revision INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    game_over INTEGER NOT NULL DEFAULT 0,
+                    player_name TEXT NOT NULL DEFAULT '',
+                    world_theme TEXT NOT NULL DEFAULT '',
+                    archived INTEGER NOT NULL DEFAULT 0,
+                    state_schema_version INTEGER NOT NULL DEFAULT 0
                 )
                 """
             )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS turns (
+                    game_id TEXT NOT NULL,
+                    turn_index INTEGER NOT NULL,
+                    message_json TEXT NOT NULL,
+                    PRIMARY KEY (game_id, turn_index),
+                    FOREIGN KEY (game_id) REFERENCES games (id)
+                ) WITHOUT ROWID
+                """
+            )
             self._connection.execute(
                 """
                 CREATE TABLE IF NOT EXISTS moments (
@@ -99,14 +373,295 @@ class SQLiteGameRepository:
                 )
                 """
             )
+            self._create_world_event_tables()
+            if is_new_database:
+                self._create_game_indexes()
+                self._create_moment_indexes()
+                self._set_schema_version(SQLITE_SCHEMA_VERSION)
 
-    @staticmethod
-    def _encode_state(state: State) -> str:
-        return json.dumps(state.serialize(), default=_json_default)
+    def _create_game_indexes(self) -> None:
+        self._connection.execute("CREATE INDEX IF NOT EXISTS games_by_updated_at ON games (updated_at, id)")
+
+    def _create_moment_indexes(self) -> None:
+        self._connection.execute("CREATE INDEX IF NOT EXISTS moments_by_game_id ON moments (game_id)")
+
+    def _create_world_event_tables(self) -> None:
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS world_events (
+                game_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                revision INTEGER NOT NULL,
+                event_json TEXT NOT NULL,
+                PRIMARY KEY (game_id, seq),
+                FOREIGN KEY (game_id) REFERENCES games (id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS world_snapshots (
+                game_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                revision INTEGER NOT NULL,
+                world_state_json TEXT NOT NULL,
+                PRIMARY KEY (game_id, seq),
+                FOREIGN KEY (game_id) REFERENCES games (id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def _table_exists(self, name: str) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def _schema_version(self) -> int:
+        return int(self._connection.execute("PRAGMA user_version").fetchone()[0])
+
+    def _set_schema_version(self, version: int) -> None:
+        self._connection.execute(f"PRAGMA user_version = {int(version)}")
+
+    def _migrate(self) -> None:
+        """Bring databases written by older releases up to ``SQLITE_SCHEMA_VERSION``."""
+        migrations = {
+            0: self._migrate_chat_history_to_turns,
+            1: self._migrate_metadata_columns,
+            2: self._create_moment_indexes,
+            3: self._migrate_world_state_to_events,
+            4: self._migrate_archived_column,
+            5: self._migrate_state_schema_version_column,
+            6: self._migrate_world_state_column,
+        }
+        with self._lock:
+            version = self._schema_version()
+            while version < SQLITE_SCHEMA_VERSION:
+                with self._connection:
+                    migrations[version]()
+                    version += 1
+                    self._set_schema_version(version)
+
+    def _migrate_chat_history_to_turns(self) -> None:
+        rows = self._connection.execute("SELECT id, state_json FROM games").fetchall()
+        for row in rows:
+            document = self._decode(row["state_json"])
+            chat_history = document.pop("chat_history", None) or []
+            self._insert_turns(row["id"], 0, chat_history)
+            self._connection.execute(
+                "UPDATE games SET state_json = ? WHERE id = ?",
+                (self._encode(document), row["id"]),
+            )
+
+    def _migrate_metadata_columns(self) -> None:
+        existing_columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(games)")}
+        column_definitions = {
+            "revision": "INTEGER NOT NULL DEFAULT 0",
+            "created_at": "TEXT",
+            "updated_at": "TEXT",
+            "game_over": "INTEGER NOT NULL DEFAULT 0",
+            "player_name": "TEXT NOT NULL DEFAULT ''",
+            "world_theme": "TEXT NOT NULL DEFAULT ''",
+        }
+        for column in GAME_METADATA_COLUMNS:
+            if column not in existing_columns:
+                self._connection.execute(f"ALTER TABLE games ADD COLUMN {column} {column_definitions[column]}")
+
+        rows = self._connection.execute("SELECT id, state_json FROM games").fetchall()
+        for row in rows:
+            state = State.deserialize(self._decode(row["state_json"]))
+            self._connection.execute(
+                f"UPDATE games SET {', '.join(f'{column} = ?' for column in GAME_METADATA_COLUMNS)} WHERE id = ?",
+                (*self._metadata(state), row["id"]),
+            )
+        self._create_game_indexes()
+
+    def _migrate_world_state_to_events(self) -> None:
+        rows = self._connection.execute("SELECT id, state_json, revision FROM games").fetchall()
+        for row in rows:
+            document = self._decode(row["state_json"])
+            world_state = WorldState.deserialize(document.pop("world_state", None))
+            self._insert_world_snapshot(row["id"], 0, row["revision"], world_state.to_primitive())
+            self._connection.execute(
+                "UPDATE games SET state_json = ? WHERE id = ?",
+                (self._encode(document), row["id"]),
+            )
+
+    def _migrate_archived_column(self) -> None:
+        existing_columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(games)")}
+        if "archived" not in existing_columns:
+            self._connection.execute("ALTER TABLE games ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+
+    def _migrate_state_schema_version_column(self) -> None:
+        # Existing rows keep the default 0 until ``python -m migrations`` upgrades their documents.
+        existing_columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(games)")}
+        if "state_schema_version" not in existing_columns:
+            self._connection.execute(
+                "ALTER TABLE games ADD COLUMN state_schema_version INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def _migrate_world_state_column(self) -> None:
+        existing_columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(games)")}
+        if "world_state_json" not in existing_columns:
+            self._connection.execute("ALTER TABLE games ADD COLUMN world_state_json TEXT")
+        rows = self._connection.execute("SELECT id FROM games WHERE archived = 0").fetchall()
+        for row in rows:
+            world_state = self._replay_world_state(self._connection, row["id"])
+            if world_state is not None:
+                self._connection.execute(
+                    "UPDATE games SET world_state_json = ? WHERE id = ?", (self._encode(world_state), row["id"])
+                )
 
     @staticmethod
-    def _decode_state(raw_state: str) -> State:
-        return State.deserialize(json.loads(raw_state))
+    def _metadata(state: State) -> tuple[Any, ...]:
+        """Column values for ``GAME_METADATA_COLUMNS``, mirrored from the state on every save."""
+        return (
+            state.revision,
+            _timestamp(state.created_at),
+            _timestamp(state.updated_at),
+            int(state.game_over),
+            state.player_name,
+            state.world_theme,
+        )
+
+    def _encode(self, document: Any) -> str | bytes:
+        return encode_document(document, self.codec)
+
+    def _decode(self, raw: str | bytes) -> Any:
+        return decode_document(raw, self._decoders)
+
+    def _encode_state(self, state: State) -> str | bytes:
+        """Encode everything except ``chat_history`` and ``world_state``, which are stored separately."""
+        document = state.to_primitive()
+        del document["chat_history"]
+        del document["world_state"]
+        return self._encode(document)
+
+    def _decode_state(
+        self, raw_state: str | bytes, chat_history: list[Any], raw_world_state: str | bytes | None
+    ) -> State:
+        document = self._decode(raw_state)
+        document["chat_history"] = chat_history
+        document["world_state"] = (
+            WorldState().to_primitive() if raw_world_state is None else self._decode(raw_world_state)
+        )
+        return State.from_primitive(document)
+
+    def _insert_world_snapshot(self, game_id: str, seq: int, revision: int, world_state: dict[str, Any]) -> None:
+        self._connection.execute(
+            "INSERT INTO world_snapshots (game_id, seq, revision, world_state_json) VALUES (?, ?, ?, ?)",
+            (game_id, seq, revision, self._encode(world_state)),
+        )
+
+    def _replay_world_state(
+        self, connection: sqlite3.Connection, game_id: str, revision: int | None = None
+    ) -> dict[str, Any] | None:
+        """The world-state document at ``revision`` (latest by default), rebuilt from the event log."""
+        revision_filter = "" if revision is None else "AND revision <= ?"
+        revision_parameters: tuple[int, ...] = () if revision is None else (revision,)
+        snapshot = connection.execute(
+            f"""
+            SELECT seq, world_state_json FROM world_snapshots
+            WHERE game_id = ? {revision_filter}
+            ORDER BY seq DESC
+            LIMIT 1
+            """,
+            (game_id, *revision_parameters),
+        ).fetchone()
+        if snapshot is None:
+            return None
+        events = connection.execute(
+            f"""
+            SELECT seq, event_json FROM world_events
+            WHERE game_id = ? AND seq > ? {revision_filter}
+            ORDER BY seq ASC
+            """,
+            (game_id, snapshot["seq"], *revision_parameters),
+        ).fetchall()
+        return apply_world_events(
+            self._decode(snapshot["world_state_json"]), [self._decode(event["event_json"]) for event in events]
+        )
+
+    def _append_world_events(self, game_id: str, world_states: list[tuple[int, WorldState]]) -> None:
+        """Persist each ``(revision, world state)`` as its diff against the one before, starting from the stored one.
+
+        The diff is taken against the ``world_state_json`` column, so saving
+        never reads or replays the event log; the column is rewritten only when
+        the world changed.
+        """
+        row = self._connection.execute(
+            """
+            SELECT world_state_json,
+                   (SELECT MAX(seq) FROM world_events WHERE game_id = games.id) AS last_event_seq,
+                   (SELECT MAX(seq) FROM world_snapshots WHERE game_id = games.id) AS last_snapshot_seq
+            FROM games
+            WHERE id = ?
+            """,
+            (game_id,),
+        ).fetchone()
+        previous = None if row["world_state_json"] is None else self._decode(row["world_state_json"])
+        snapshot_seq = row["last_snapshot_seq"]
+        last_seq = max(row["last_event_seq"] or 0, snapshot_seq or 0)
+        changed = False
+        for revision, state_world in world_states:
+            world_state = state_world.to_primitive()
+            if previous is None or snapshot_seq is None:
+                self._insert_world_snapshot(game_id, last_seq, revision, world_state)
+                snapshot_seq = last_seq
+                previous, changed = world_state, True
+                continue
+            events = diff_world_state(previous, world_state)
+            if not events:
+                continue
+            self._connection.executemany(
+                "INSERT INTO world_events (game_id, seq, revision, event_json) VALUES (?, ?, ?, ?)",
+                [
+                    (game_id, seq, revision, self._encode(event))
+                    for seq, event in enumerate(events, start=last_seq + 1)
+                ],
+            )
+            last_seq += len(events)
+            if last_seq - snapshot_seq >= self.world_snapshot_interval:
+                self._insert_world_snapshot(game_id, last_seq, revision, world_state)
+                snapshot_seq = last_seq
+            previous, changed = world_state, True
+        if changed:
+            self._connection.execute(
+                "UPDATE games SET world_state_json = ? WHERE id = ?", (self._encode(previous), game_id)
+            )
+
+    def _insert_turns(self, game_id: str, first_index: int, messages: list[Any]) -> None:
+        self._connection.executemany(
+            "INSERT INTO turns (game_id, turn_index, message_json) VALUES (?, ?, ?)",
+            [
+                (game_id, turn_index, self._encode(message))
+                for turn_index, message in enumerate(messages, start=first_index)
+            ],
+        )
+
+    def _append_turns(self, state: State) -> None:
+        """Persist messages added since the last save.
+
+        Chat history is append-only, so only messages past the highest stored
+        ``turn_index`` are written; a shortened history drops the stale tail.
+        """
+        row = self._connection.execute(
+            "SELECT MAX(turn_index) AS last_index FROM turns WHERE game_id = ?", (state._id,)
+        ).fetchone()
+        stored_count = 0 if row["last_index"] is None else row["last_index"] + 1
+        if len(state.chat_history) < stored_count:
+            self._connection.execute(
+                "DELETE FROM turns WHERE game_id = ? AND turn_index >= ?",
+                (state._id, len(state.chat_history)),
+            )
+        elif len(state.chat_history) > stored_count:
+            self._insert_turns(state._id, stored_count, state.chat_history[stored_count:])
+
+    def _chat_history(self, connection: sqlite3.Connection, game_id: str) -> list[Any]:
+        rows = connection.execute(
+            "SELECT message_json FROM turns WHERE game_id = ? ORDER BY turn_index ASC", (game_id,)
+        ).fetchall()
+        return [self._decode(row["message_json"]) for row in rows]
 
     def save_game(self, state: State) -> None:
         self._save_state(state)
@@ -117,59 +672,135 @@ class SQLiteGameRepository:
     def _save_state(self, state: State, images: Images | None = None) -> None:
         if state._id is None:
             state._id = str(uuid4())
-            with self._lock, self._connection:
-                self._connection.execute(
-                    """
-                    INSERT INTO games (id, state_json, portrait, backdrop)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (
-                        state._id,
-                        self._encode_state(state),
-                        None if images is None else images.portrait.bytes,
-                        None if images is None else images.backdrop.bytes,
-                    ),
-                )
+            self.insert_game(state, images)
             return
 
-        expected_revision = state.revision
         updated_state = replace(
             state,
-            revision=expected_revision + 1,
+            revision=state.revision + 1,
             updated_at=datetime.now(),
         )
-        assignments = "state_json = ?"
-        parameters: list[Any] = [self._encode_state(updated_state)]
-        if images is not None:
-            assignments += ", portrait = ?, backdrop = ?"
-            parameters.extend([images.portrait.bytes, images.backdrop.bytes])
-        parameters.extend([state._id, expected_revision])
+        with self._lock, self._connection:
+            if not self._update_state(GameWrite(updated_state, state.revision, images)):
+                raise RevisionConflictError("Game state was modified by another save.")
 
+        state.revision = updated_state.revision
+        state.updated_at = updated_state.updated_at
+
+    def insert_game(self, state: State, images: Images | None = None) -> None:
+        """Store a new game under the id already assigned to ``state``."""
         with self._lock, self._connection:
-            result = self._connection.execute(
+            self._connection.execute(
                 f"""
-                UPDATE games
-                SET {assignments}
-                WHERE id = ?
-                  AND json_extract(state_json, '$.revision') = ?
+                INSERT INTO games (
+                    id, state_json, world_state_json, state_schema_version, portrait, backdrop,
+                    {", ".join(GAME_METADATA_COLUMNS)}
+                )
+                VALUES (?, ?, ?, ?, ?, ?, {", ".join("?" for _ in GAME_METADATA_COLUMNS)})
                 """,
-                parameters,
+                (
+                    state._id,
+                    self._encode_state(state),
+                    self._encode(state.world_state.to_primitive()),
+                    STATE_SCHEMA_VERSION,
+                    None if images is None else images.portrait.bytes,
+                    None if images is None else images.backdrop.bytes,
+                    *self._metadata(state),
+                ),
             )
-            if result.rowcount != 1:
-                raise RevisionConflictError("Game state was modified by another save.")
+            self._insert_turns(state._id, 0, state.chat_history)
+            self._insert_world_snapshot(state._id, 0, state.revision, state.world_state.to_primitive())
 
-        state.revision = updated_state.revision
-        state.updated_at = updated_state.updated_at
+    def _update_state(self, write: GameWrite) -> bool:
+        """Overwrite the row still stored at ``write.expected_revision``; runs inside the caller's transaction."""
+        state = write.state
+        assignments = ", ".join(
+            ["state_json = ?", "state_schema_version = ?", *(f"{column} = ?" for column in GAME_METADATA_COLUMNS)]
+        )
+        parameters: list[Any] = [self._encode_state(state), STATE_SCHEMA_VERSION, *self._metadata(state)]
+        if write.images is not None:
+            assignments += ", portrait = ?, backdrop = ?"
+            parameters.extend([write.images.portrait.bytes, write.images.backdrop.bytes])
+        parameters.extend([state._id, write.expected_revision])
+
+        result = self._connection.execute(
+            f"""
+            UPDATE games
+            SET {assignments}
+            WHERE id = ?
+              AND revision = ?
+              AND archived = 0
+            """,
+            parameters,
+        )
+        if result.rowcount != 1:
+            return False
+        self._append_turns(state)
+        self._append_world_events(state._id, [*write.coalesced_world_states, (state.revision, state.world_state)])
+        return True
+
+    def save_games(self, writes: list[GameWrite]) -> list[GameWrite]:
+        """Commit several updates in one transaction and return the writes rejected as stale.
+
+        A stale write is skipped rather than failing the whole batch, so one
+        conflicting game does not discard the others' progress.
+        """
+        conflicts: list[GameWrite] = []
+        with self._lock, self._connection:
+            for write in writes:
+                if not self._update_state(write):
+                    conflicts.append(write)
+        return conflicts
+
+    def copy_games_to(self, target: SQLiteGameRepository, game_ids: list[str]) -> None:
+        """Copy every stored row of ``game_ids`` verbatim into ``target``, replacing what it holds for them.
+
+        Rows keep their encoding, revision, event log and archived flag, so a
+        copy is indistinguishable from the original; both files must be at the
+        same schema version.
+        """
+        if not game_ids:
+            return
+        placeholders = ", ".join("?" for _ in game_ids)
+        with self._reader() as connection:
+            tables = {
+                # Moments are listed in insertion (rowid) order, so copy them in that order.
+                table: connection.execute(
+                    f"SELECT * FROM {table} WHERE {'id' if table == 'games' else 'game_id'} IN ({placeholders})"
+                    f"{' ORDER BY rowid' if table == 'moments' else ''}",
+                    game_ids,
+                ).fetchall()
+                for table in SQLITE_GAME_TABLES
+            }
+        with target._lock, target._connection:
+            for game_id in game_ids:
+                target._delete_game_contents(game_id)
+                target._connection.execute("DELETE FROM games WHERE id = ?", (game_id,))
+            for table in SQLITE_GAME_TABLES:
+                rows = tables[table]
+                if rows:
+                    columns = rows[0].keys()
+                    target._connection.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                        [tuple(row) for row in rows],
+                    )
+
+    def _delete_game_contents(self, game_id: str) -> None:
+        """Delete everything stored for a game except its ``games`` row."""
+        for table in ("moments", "turns", "world_events", "world_snapshots"):
+            self._connection.execute(f"DELETE FROM {table} WHERE game_id = ?", (game_id,))
 
     def delete_game(self, game_id: str) -> bool:
         with self._lock, self._connection:
-            self._connection.execute("DELETE FROM moments WHERE game_id = ?", (game_id,))
+            self._delete_game_contents(game_id)
             result = self._connection.execute("DELETE FROM games WHERE id = ?", (game_id,))
+        if self.archive is not None:
+            self.archive.delete(game_id)
         return result.rowcount == 1
 
     def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
-        with self._lock:
-            row = self._connection.execute(
+        with self._reader() as connection:
+            row = connection.execute(
                 "SELECT portrait, backdrop FROM games WHERE id = ?", (game_id,)
             ).fetchone()
         if row is None or row["portrait"] is None or row["backdrop"] is None:
@@ -177,16 +808,294 @@ class SQLiteGameRepository:
         return bytes(row["portrait"]), bytes(row["backdrop"])
 
     def all_games(self) -> list[State]:
-        with self._lock:
-            rows = self._connection.execute("SELECT state_json FROM games").fetchall()
-        return [self._decode_state(row["state_json"]) for row in rows]
+        with self._reader() as connection:
+            rows = connection.execute(
+                "SELECT id, state_json, world_state_json FROM games WHERE archived = 0"
+            ).fetchall()
+            turn_rows = connection.execute(
+                "SELECT game_id, message_json FROM turns ORDER BY game_id, turn_index ASC"
+            ).fetchall()
+        chat_histories: dict[str, list[Any]] = {}
+        for turn_row in turn_rows:
+            chat_histories.setdefault(turn_row["game_id"], []).append(self._decode(turn_row["message_json"]))
+        return [
+            self._decode_state(row["state_json"], chat_histories.get(row["id"], []), row["world_state_json"])
+            for row in rows
+        ]
+
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        """A page of games, most recently saved first; games never saved since creation come last, by id.
+
+        Saved games and the never-saved tail are read with separate queries, so
+        each one seeks into ``games_by_updated_at`` at the cursor instead of
+        scanning every row ahead of it.
+        """
+        updated_at, game_id = (None, None) if cursor is None else decode_listing_cursor(cursor)
+        queries: list[tuple[str, tuple[Any, ...]]] = []
+        if cursor is None:
+            queries.append(("updated_at IS NOT NULL", ()))
+        elif updated_at is not None:
+            queries.append(("(updated_at, id) < (?, ?)", (_timestamp(updated_at), game_id)))
+        if game_id is None or updated_at is not None:
+            queries.append(("updated_at IS NULL", ()))
+        else:
+            queries.append(("updated_at IS NULL AND id < ?", (game_id,)))
+        rows: list[sqlite3.Row] = []
+        with self._reader() as connection:
+            for where, parameters in queries:
+                rows.extend(
+                    connection.execute(
+                        f"""
+                        SELECT id, player_name, world_theme, game_over, created_at, updated_at
+                        FROM games
+                        WHERE {where}
+                        ORDER BY updated_at DESC, id DESC
+                        LIMIT ?
+                        """,
+                        (*parameters, limit + 1 - len(rows)),
+                    ).fetchall()
+                )
+                if len(rows) > limit:
+                    break
+        summaries = [
+            GameSummary(
+                id=row["id"],
+                player_name=row["player_name"],
+                world_theme=row["world_theme"],
+                game_over=bool(row["game_over"]),
+                created_at=None if row["created_at"] is None else datetime.fromisoformat(row["created_at"]),
+                updated_at=None if row["updated_at"] is None else datetime.fromisoformat(row["updated_at"]),
+            )
+            for row in rows
+        ]
+        return page_of(summaries, limit)
 
     def get_game(self, game_id: str) -> State | None:
-        with self._lock:
-            row = self._connection.execute(
-                "SELECT state_json FROM games WHERE id = ?", (game_id,)
+        restore_attempted = False
+        while True:
+            with self._reader() as connection:
+                row = connection.execute(
+                    "SELECT state_json, world_state_json, archived FROM games WHERE id = ?", (game_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if not row["archived"]:
+                    chat_history = self._chat_history(connection, game_id)
+                    return self._decode_state(row["state_json"], chat_history, row["world_state_json"])
+            if restore_attempted:
+                return None
+            # Re-read whatever this returns: a concurrent load may have restored the game first.
+            self.restore_game(game_id)
+            restore_attempted = True
+
+    def list_game_ids(self, after: str | None = None, limit: int = DEFAULT_TRANSFER_BATCH_SIZE) -> list[str]:
+        """Up to ``limit`` game ids (archived ones included) sorting after ``after``, in id order."""
+        with self._reader() as connection:
+            rows = connection.execute(
+                "SELECT id FROM games WHERE id > ? ORDER BY id ASC LIMIT ?", (after or "", limit)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def export_game(self, game_id: str) -> GameRecord | None:
+        """Everything stored for a game, read from the archive without restoring it if it is archived."""
+        record = self._export_hot_game(game_id)
+        if record is None and self.archive is not None:
+            return self.archive.get(game_id)
+        return record
+
+    def _export_hot_game(self, game_id: str) -> GameRecord | None:
+        with self._reader() as connection:
+            row = connection.execute(
+                "SELECT state_json, world_state_json, portrait, backdrop, archived FROM games WHERE id = ?", (game_id,)
             ).fetchone()
-        return None if row is None else self._decode_state(row["state_json"])
+            if row is None or row["archived"]:
+                return None
+            chat_history = self._chat_history(connection, game_id)
+            moment_rows = connection.execute(
+                "SELECT id, caption, image FROM moments WHERE game_id = ? ORDER BY rowid ASC", (game_id,)
+            ).fetchall()
+        return GameRecord(
+            state=self._decode_state(row["state_json"], chat_history, row["world_state_json"]),
+            portrait=None if row["portrait"] is None else bytes(row["portrait"]),
+            backdrop=None if row["backdrop"] is None else bytes(row["backdrop"]),
+            moments=[
+                (StoryMoment(id=moment["id"], game_id=game_id, caption=moment["caption"]), bytes(moment["image"]))
+                for moment in moment_rows
+            ],
+        )
+
+    def import_game(self, record: GameRecord) -> None:
+        """Store a game exactly as recorded, replacing anything stored under its id."""
+        self.import_games([record])
+
+    def import_games(self, records: list[GameRecord]) -> None:
+        """Import several games in one transaction."""
+        with self._lock, self._connection:
+            for record in records:
+                self._write_record(record)
+                if self.archive is not None and record.state._id in self.archive:
+                    self.archive.delete(record.state._id)
+
+    def _write_record(self, record: GameRecord) -> None:
+        state = record.state
+        if state._id is None:
+            raise ValueError("Imported games must have an id.")
+        self._delete_game_contents(state._id)
+        columns = (
+            "id",
+            "state_json",
+            "world_state_json",
+            "state_schema_version",
+            "portrait",
+            "backdrop",
+            "archived",
+            *GAME_METADATA_COLUMNS,
+        )
+        self._connection.execute(
+            f"""
+            INSERT INTO games ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT (id) DO UPDATE SET
+                {", ".join(f"{column} = excluded.{column}" for column in columns[1:])}
+            """,
+            (
+                state._id,
+                self._encode_state(state),
+                self._encode(state.world_state.to_primitive()),
+                STATE_SCHEMA_VERSION,
+                record.portrait,
+                record.backdrop,
+                0,
+                *self._metadata(state),
+            ),
+        )
+        self._insert_turns(state._id, 0, state.chat_history)
+        self._insert_world_snapshot(state._id, 0, state.revision, state.world_state.to_primitive())
+        self._connection.executemany(
+            "INSERT INTO moments (id, game_id, caption, image) VALUES (?, ?, ?, ?)",
+            [(moment.id, state._id, moment.caption, image_bytes) for moment, image_bytes in record.moments],
+        )
+
+    def list_legacy_state_documents(
+        self, after: str | None = None, limit: int = DEFAULT_MIGRATION_BATCH_SIZE
+    ) -> list[StoredStateDocument]:
+        """State documents (without chat history or world state) older than ``STATE_SCHEMA_VERSION``, in id order."""
+        with self._reader() as connection:
+            rows = connection.execute(
+                """
+                SELECT id, revision, state_json FROM games
+                WHERE state_schema_version < ? AND archived = 0 AND id > ?
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (STATE_SCHEMA_VERSION, after or "", limit),
+            ).fetchall()
+        return [StoredStateDocument(row["id"], row["revision"], self._decode(row["state_json"])) for row in rows]
+
+    def replace_state_documents(self, documents: list[StoredStateDocument]) -> int:
+        """Store upgraded documents in one transaction, skipping games saved since they were read."""
+        replaced = 0
+        with self._lock, self._connection:
+            for stored in documents:
+                document = dict(stored.document)
+                document.pop("chat_history", None)
+                document.pop("world_state", None)
+                result = self._connection.execute(
+                    """
+                    UPDATE games SET state_json = ?, state_schema_version = ?
+                    WHERE id = ? AND revision = ? AND archived = 0
+                    """,
+                    (self._encode(document), STATE_SCHEMA_VERSION, stored.game_id, stored.revision),
+                )
+                replaced += result.rowcount
+        return replaced
+
+    def archive_games(self, idle_before: datetime | None = None, limit: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> int:
+        """Move finished games (and games not saved since ``idle_before``) to the archive, then compact."""
+        if self.archive is None:
+            raise RuntimeError("No game archive is configured.")
+        with self._reader() as connection:
+            rows = connection.execute(
+                """
+                SELECT id FROM games
+                WHERE archived = 0
+                  AND (game_over = 1 OR COALESCE(updated_at, created_at) < ?)
+                LIMIT ?
+                """,
+                (_timestamp(idle_before) or "", limit),
+            ).fetchall()
+        archived = sum(self._archive_game(row["id"]) for row in rows)
+        if archived:
+            self.compact()
+        return archived
+
+    def _archive_game(self, game_id: str) -> bool:
+        assert self.archive is not None
+        record = self._export_hot_game(game_id)
+        if record is None:
+            return False
+        stored_revision = record.state.revision
+        # Archiving bumps the revision so saves from stale copies conflict instead of
+        # landing on the stub row.
+        record.state.revision += 1
+        self.archive.put(record)
+        with self._lock, self._connection:
+            result = self._connection.execute(
+                """
+                UPDATE games
+                SET state_json = '', world_state_json = NULL, portrait = NULL, backdrop = NULL, archived = 1,
+                    revision = revision + 1
+                WHERE id = ? AND revision = ? AND archived = 0
+                """,
+                (game_id, stored_revision),
+            )
+            if result.rowcount == 1:
+                self._delete_game_contents(game_id)
+        if result.rowcount != 1:
+            self.archive.delete(game_id)
+            return False
+        return True
+
+    def restore_game(self, game_id: str) -> bool:
+        """Move an archived game back into this database; returns whether this call restored it.
+
+        The archived flag is checked and the game restored under the writer lock,
+        so concurrent loads of one archived game restore it exactly once.
+        """
+        if self.archive is None:
+            return False
+        with self._lock:
+            row = self._connection.execute("SELECT archived FROM games WHERE id = ?", (game_id,)).fetchone()
+            if row is None or not row["archived"]:
+                return False
+            record = self.archive.get(game_id)
+            if record is None:
+                return False
+            with self._connection:
+                self._write_record(record)
+            self.archive.delete(game_id)
+        return True
+
+    def compact(self) -> None:
+        """Return free pages to the filesystem, switching older files to incremental auto-vacuum first."""
+        with self._lock:
+            if self._connection.execute("PRAGMA auto_vacuum").fetchone()[0] != SQLITE_AUTO_VACUUM_INCREMENTAL:
+                self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self._connection.execute("VACUUM")
+            self._connection.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def get_world_state_at(self, game_id: str, revision: int) -> WorldState | None:
+        """Rebuild the world state as it was saved at ``revision``."""
+        with self._reader() as connection:
+            world_state = self._replay_world_state(connection, game_id, revision)
+        return None if world_state is None else WorldState.from_primitive(world_state)
+
+    def get_revision(self, game_id: str) -> int | None:
+        with self._reader() as connection:
+            row = connection.execute("SELECT revision FROM games WHERE id = ?", (game_id,)).fetchone()
+        return None if row is None else row["revision"]
 
     def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
         moment = StoryMoment(game_id=game_id, caption=caption)
@@ -198,8 +1107,8 @@ class SQLiteGameRepository:
         return moment
 
     def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
-        with self._lock:
-            rows = self._connection.execute(
+        with self._reader() as connection:
+            rows = connection.execute(
                 "SELECT id, game_id, caption, image FROM moments WHERE game_id = ? ORDER BY rowid ASC",
                 (game_id,),
             ).fetchall()
@@ -208,15 +1117,201 @@ class SQLiteGameRepository:
             for row in rows
         ]
 
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        with self._reader() as connection:
+            rows = connection.execute(
+                "SELECT id, game_id, caption FROM moments WHERE game_id = ? ORDER BY rowid ASC",
+                (game_id,),
+            ).fetchall()
+        return [StoryMoment(id=row["id"], game_id=row["game_id"], caption=row["caption"]) for row in rows]
+
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        with self._reader() as connection:
+            row = connection.execute(
+                "SELECT image FROM moments WHERE id = ? AND game_id = ?", (moment_id, game_id)
+            ).fetchone()
+        return None if row is None else bytes(row["image"])
+
     def close(self) -> None:
+        if self._readers is not None:
+            while not self._readers.empty():
+                self._readers.get().close()
         with self._lock:
             self._connection.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+MONGO_SUMMARY_PROJECTION = {
+    "player_name": 1,
+    "world_theme": 1,
+    "game_over": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+MONGO_LISTING_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+# Newest upload first; the ObjectId breaks ties between uploads in the same millisecond.
+MONGO_LATEST_FILE_SORT = [("uploadDate", DESCENDING), ("_id", DESCENDING)]
+MONGO_CHUNK_SORT = [("files_id", ASCENDING), ("n", ASCENDING)]
+
+
+def mongo_document_id(game_id: str) -> ObjectId | str:
+    """Games created in MongoDB use ObjectIds; games imported from SQLite keep their string ids."""
+    return ObjectId(game_id) if ObjectId.is_valid(game_id) else game_id
+
+
+def mongo_document(state: State) -> dict[str, Any]:
+    document = state.to_primitive()
+    document.pop("_id", None)
+    return document
+
+
+def mongo_image_filenames(game_id: str) -> list[str]:
+    return [Images.name_for(game_id, ImageType.PORTRAIT), Images.name_for(game_id, ImageType.BACKDROP)]
+
+
+def mongo_moment_filename(moment_id: str) -> str:
+    return f"moment_{moment_id}"
+
+
+def mongo_listing_queries(cursor: str | None) -> list[dict[str, Any]]:
+    """Filters to read in turn, each sorted by ``MONGO_LISTING_SORT``, for the listing page after ``cursor``.
+
+    Saved games come first and games never saved since creation (no
+    ``updated_at``) last. Each part has its own filter so that every query is
+    a bounded range on the listing index rather than one that also matches the
+    whole null tail.
+    """
+    if cursor is None:
+        return [{"updated_at": {"$type": "date"}}, {"updated_at": None}]
+    updated_at, game_id = decode_listing_cursor(cursor)
+    document_id = mongo_document_id(game_id)
+    if updated_at is None:
+        return [{"updated_at": None, "_id": {"$lt": document_id}}]
+    return [
+        {"$or": [{"updated_at": {"$lt": updated_at}}, {"updated_at": updated_at, "_id": {"$lt": document_id}}]},
+        {"updated_at": None},
+    ]
+
+
+def mongo_game_summary(document: dict[str, Any]) -> GameSummary:
+    return GameSummary(
+        id=str(document["_id"]),
+        player_name=document.get("player_name", ""),
+        world_theme=document.get("world_theme", ""),
+        game_over=bool(document.get("game_over", False)),
+        created_at=document.get("created_at"),
+        updated_at=document.get("updated_at"),
+    )
+
+
+@dataclass
+class MongoStateBaseline:
+    """The game document as stored at ``revision``, kept to compute partial updates against.
+
+    ``document`` excludes ``chat_history``; chat history is append-only, so
+    its stored length is enough to know which messages are new.
+    """
+
+    revision: int
+    chat_length: int
+    document: dict[str, Any]
+
+    @classmethod
+    def of(cls, revision: int, document: dict[str, Any]) -> MongoStateBaseline:
+        return cls(
+            revision=revision,
+            chat_length=len(document.get("chat_history") or []),
+            document=copy.deepcopy({key: value for key, value in document.items() if key != "chat_history"}),
+        )
+
+
+def mongo_state_update(baseline: MongoStateBaseline | None, document: dict[str, Any]) -> dict[str, Any]:
+    """The update operators that turn the ``baseline`` document into ``document`` and bump the revision.
+
+    New chat messages are ``$push``ed, world-state fields are ``$set`` one by
+    one, other fields only when they changed, and fields the document no
+    longer has are ``$unset``. Without a baseline the whole document is ``$set``.
+    """
+    document = {key: value for key, value in document.items() if key not in ("_id", "revision")}
+    if baseline is None:
+        return {"$set": document, "$inc": {"revision": 1}}
+
+    stored = baseline.document
+    updates: dict[str, Any] = {}
+    pushes: dict[str, Any] = {}
+    chat_history = document.pop("chat_history")
+    if len(chat_history) > baseline.chat_length:
+        pushes["chat_history"] = {"$each": chat_history[baseline.chat_length :]}
+    elif len(chat_history) < baseline.chat_length:
+        updates["chat_history"] = chat_history
+    world_state = document.pop("world_state")
+    stored_world_state = stored.get("world_state")
+    if isinstance(stored_world_state, dict) and stored_world_state.keys() == world_state.keys():
+        updates.update(
+            (f"world_state.{field_name}", value)
+            for field_name, value in world_state.items()
+            if stored_world_state[field_name] != value
+        )
+    else:
+        updates["world_state"] = world_state
+    updates.update((key, value) for key, value in document.items() if key not in stored or stored[key] != value)
+    unsets = {key: "" for key in stored if key not in document and key not in ("_id", "revision", "world_state")}
+
+    update: dict[str, Any] = {"$inc": {"revision": 1}}
+    if updates:
+        update["$set"] = updates
+    if pushes:
+        update["$push"] = pushes
+    if unsets:
+        update["$unset"] = unsets
+    return update
+
+
+class MongoStateBaselines:
+    """Bounded, thread-safe LRU of the latest ``MongoStateBaseline`` per game."""
+
+    def __init__(self, max_entries: int = DEFAULT_MONGO_BASELINE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, MongoStateBaseline] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, game_id: str, revision: int) -> MongoStateBaseline | None:
+        """The baseline for ``game_id`` if it was taken at ``revision``."""
+        with self._lock:
+            baseline = self._entries.get(game_id)
+            if baseline is None or baseline.revision != revision:
+                return None
+            self._entries.move_to_end(game_id)
+            return baseline
+
+    def remember(self, game_id: str, revision: int, document: dict[str, Any]) -> None:
+        if self.max_entries < 1:
+            return
+        baseline = MongoStateBaseline.of(revision, document)
+        with self._lock:
+            self._entries[game_id] = baseline
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, game_id: str) -> None:
+        with self._lock:
+            self._entries.pop(game_id, None)
 
 
 class MongoGameRepository:
-    """MongoDB implementation retained for deployed or shared environments."""
+    """MongoDB implementation retained for deployed or shared environments.
 
-    def __init__(self) -> None:
+    Saves send partial updates: the repository remembers, per game, the
+    document it last read or wrote (bounded by ``baseline_cache_size``) and
+    diffs against it when that is still the revision being replaced. Saves
+    of games it has no baseline for fall back to a full ``$set``.
+    """
+
+    def __init__(self, baseline_cache_size: int = DEFAULT_MONGO_BASELINE_CACHE_SIZE) -> None:
         missing = [
             name
             for name in ("MONGODB_CONNECTION_STRING", "CLUSTER", "COLLECTION")
@@ -230,42 +1325,41 @@ class MongoGameRepository:
         self._games = self._database.get_collection(os.environ["COLLECTION"])
         self._moments = self._database.get_collection("moments")
         self._fs = gridfs.GridFS(self._database)
+        self._files = self._database.get_collection("fs.files")
+        self._chunks = self._database.get_collection("fs.chunks")
+        self._baselines = MongoStateBaselines(baseline_cache_size)
+        self._create_indexes()
 
-    @staticmethod
-    def _object_id(game_id: str) -> ObjectId | None:
-        try:
-            return ObjectId(game_id)
-        except Exception:
-            return None
-
-    @staticmethod
-    def _mongo_document(state: State) -> dict[str, Any]:
-        document = state.serialize()
-        document.pop("_id", None)
-        return document
+    def _create_indexes(self) -> None:
+        """Indexes behind every lookup; ``create_index`` is a no-op for indexes that already exist."""
+        # Same keys as the indexes GridFS creates on first write, so these never duplicate them.
+        self._files.create_index([("filename", ASCENDING), ("uploadDate", ASCENDING)])
+        self._chunks.create_index([("files_id", ASCENDING), ("n", ASCENDING)], unique=True)
+        self._moments.create_index([("game_id", ASCENDING)])
+        self._games.create_index([("updated_at", DESCENDING), ("_id", DESCENDING)])
 
     def save_game(self, state: State) -> None:
         if state._id is None:
-            result = self._games.insert_one(self._mongo_document(state))
+            document = mongo_document(state)
+            result = self._games.insert_one(document)
             state._id = str(result.inserted_id)
+            self._baselines.remember(state._id, state.revision, document)
             return
 
-        object_id = self._object_id(state._id)
-        if object_id is None:
-            raise ValueError("MongoDB game IDs must be valid ObjectIds")
         expected_revision = state.revision
         updated_at = datetime.now()
-        updates = self._mongo_document(replace(state, updated_at=updated_at))
-        updates.pop("revision", None)
+        document = mongo_document(replace(state, updated_at=updated_at))
         result = self._games.update_one(
-            {"_id": object_id, "revision": expected_revision},
-            {"$set": updates, "$inc": {"revision": 1}},
+            {"_id": mongo_document_id(state._id), "revision": expected_revision},
+            mongo_state_update(self._baselines.get(state._id, expected_revision), document),
             upsert=False,
         )
         if result.modified_count != 1:
+            self._baselines.forget(state._id)
             raise RevisionConflictError("Game state was modified by another save.")
         state.revision = expected_revision + 1
         state.updated_at = updated_at
+        self._baselines.remember(state._id, state.revision, document)
 
     def save_game_and_images(self, state: State, images: Images) -> None:
         self.save_game(state)
@@ -276,79 +1370,364 @@ class MongoGameRepository:
         self._fs.put(images.backdrop.bytes, filename=images.backdrop.filename)
 
     def delete_game(self, game_id: str) -> bool:
-        object_id = self._object_id(game_id)
-        if object_id is None:
-            return False
-        result = self._games.delete_one({"_id": object_id})
+        self._baselines.forget(game_id)
+        result = self._games.delete_one({"_id": mongo_document_id(game_id)})
         if result.deleted_count != 1:
             return False
         self._delete_images(game_id)
         self._delete_moments(game_id)
         return True
 
+    def _read_files(self, filenames: list[str]) -> dict[str, bytes]:
+        """The latest version of each named GridFS file, fetched with one files query and one chunks query.
+
+        GridFS writes a file's chunks before its files document, so every file
+        found here is complete.
+        """
+        file_ids: dict[str, Any] = {}
+        for stored in self._files.find({"filename": {"$in": filenames}}, {"filename": 1}).sort(MONGO_LATEST_FILE_SORT):
+            file_ids.setdefault(stored["filename"], stored["_id"])
+        if not file_ids:
+            return {}
+        chunks: dict[Any, list[bytes]] = {file_id: [] for file_id in file_ids.values()}
+        for chunk in self._chunks.find(
+            {"files_id": {"$in": list(chunks)}}, {"_id": 0, "files_id": 1, "data": 1}
+        ).sort(MONGO_CHUNK_SORT):
+            chunks[chunk["files_id"]].append(chunk["data"])
+        return {filename: b"".join(chunks[file_id]) for filename, file_id in file_ids.items()}
+
     def _delete_images(self, game_id: str) -> None:
-        for image_type in (ImageType.PORTRAIT, ImageType.BACKDROP):
-            stored = self._fs.find_one({"filename": Images.name_for(game_id, image_type)})
-            if stored is not None:
-                self._fs.delete(stored._id)
+        for stored in self._files.find({"filename": {"$in": mongo_image_filenames(game_id)}}, {"_id": 1}):
+            self._fs.delete(stored["_id"])
 
     def _delete_moments(self, game_id: str) -> None:
-        for document in self._moments.find({"game_id": game_id}):
-            stored = self._fs.find_one({"filename": f"moment_{document['_id']}"})
-            if stored is not None:
-                self._fs.delete(stored._id)
+        filenames = [
+            mongo_moment_filename(document["_id"]) for document in self._moments.find({"game_id": game_id}, {"_id": 1})
+        ]
+        if filenames:
+            for stored in self._files.find({"filename": {"$in": filenames}}, {"_id": 1}):
+                self._fs.delete(stored["_id"])
         self._moments.delete_many({"game_id": game_id})
 
     def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
-        files = [
-            self._fs.find_one({"filename": Images.name_for(game_id, ImageType.PORTRAIT)}),
-            self._fs.find_one({"filename": Images.name_for(game_id, ImageType.BACKDROP)}),
-        ]
-        if any(file is None for file in files):
+        portrait_filename, backdrop_filename = mongo_image_filenames(game_id)
+        images = self._read_files([portrait_filename, backdrop_filename])
+        if portrait_filename not in images or backdrop_filename not in images:
             return None
-        return files[0].read(), files[1].read()
+        return images[portrait_filename], images[backdrop_filename]
 
     def all_games(self) -> list[State]:
         return [self._state_from_document(document) for document in self._games.find({})]
 
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        summaries: list[GameSummary] = []
+        for query in mongo_listing_queries(cursor):
+            documents = (
+                self._games.find(query, MONGO_SUMMARY_PROJECTION)
+                .sort(MONGO_LISTING_SORT)
+                .limit(limit + 1 - len(summaries))
+            )
+            summaries.extend(mongo_game_summary(document) for document in documents)
+            if len(summaries) > limit:
+                break
+        return page_of(summaries, limit)
+
     def get_game(self, game_id: str) -> State | None:
-        object_id = self._object_id(game_id)
-        if object_id is None:
+        document = self._games.find_one({"_id": mongo_document_id(game_id)})
+        if document is None:
             return None
-        document = self._games.find_one({"_id": object_id})
-        return None if document is None else self._state_from_document(document)
+        # Remember the document before the state (which shares its containers) can be mutated.
+        self._baselines.remember(game_id, int(document.get("revision", 0)), document)
+        return self._state_from_document(document)
+
+    def get_revision(self, game_id: str) -> int | None:
+        document = self._games.find_one({"_id": mongo_document_id(game_id)}, {"revision": 1})
+        return None if document is None else int(document.get("revision", 0))
 
     @staticmethod
     def _state_from_document(document: dict[str, Any]) -> State:
-        data = dict(document)
-        data["_id"] = str(data["_id"])
-        return State.deserialize(data)
+        return State.from_primitive(document)
+
+    def list_game_ids(self, after: str | None = None, limit: int = DEFAULT_TRANSFER_BATCH_SIZE) -> list[str]:
+        """Up to ``limit`` game ids sorting after ``after``, in ``_id`` order."""
+        document_id = None if after is None else mongo_document_id(after)
+        query = {} if document_id is None else {"_id": {"$gt": document_id}}
+        game_ids = [
+            str(document["_id"])
+            for document in self._games.find(query, {"_id": 1}).sort("_id", ASCENDING).limit(limit)
+        ]
+        if isinstance(document_id, str) and len(game_ids) < limit:
+            # String ids sort before ObjectIds, and "$gt" on a string only matches strings.
+            game_ids.extend(
+                str(document["_id"])
+                for document in self._games.find({"_id": {"$type": "objectId"}}, {"_id": 1})
+                .sort("_id", ASCENDING)
+                .limit(limit - len(game_ids))
+            )
+        return game_ids
+
+    def list_legacy_state_documents(
+        self, after: str | None = None, limit: int = DEFAULT_MIGRATION_BATCH_SIZE
+    ) -> list[StoredStateDocument]:
+        """Game documents older than ``STATE_SCHEMA_VERSION``, in ``_id`` order."""
+        query: dict[str, Any] = {"schema_version": {"$ne": STATE_SCHEMA_VERSION}}
+        if after is not None:
+            # Legacy documents predate imported string ids, so they all have ObjectIds.
+            query["_id"] = {"$gt": mongo_document_id(after)}
+        return [
+            StoredStateDocument(str(document["_id"]), int(document.get("revision", 0)), document)
+            for document in self._games.find(query).sort("_id", ASCENDING).limit(limit)
+        ]
+
+    def replace_state_documents(self, documents: list[StoredStateDocument]) -> int:
+        """Replace upgraded documents with one bulk write, skipping games saved since they were read."""
+        if not documents:
+            return 0
+        for stored in documents:
+            self._baselines.forget(stored.game_id)
+        result = self._games.bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": mongo_document_id(stored.game_id), "revision": stored.revision},
+                    {
+                        **{key: value for key, value in stored.document.items() if key != "_id"},
+                        "_id": mongo_document_id(stored.game_id),
+                    },
+                )
+                for stored in documents
+            ],
+            ordered=False,
+        )
+        return result.modified_count
+
+    def export_game(self, game_id: str) -> GameRecord | None:
+        document = self._games.find_one({"_id": mongo_document_id(game_id)})
+        if document is None:
+            return None
+        portrait_filename, backdrop_filename = mongo_image_filenames(game_id)
+        images = self._read_files([portrait_filename, backdrop_filename])
+        return GameRecord(
+            state=self._state_from_document(document),
+            portrait=images.get(portrait_filename),
+            backdrop=images.get(backdrop_filename),
+            moments=self.list_moments(game_id),
+        )
+
+    def import_games(self, records: list[GameRecord]) -> None:
+        """Upsert a batch of games with one bulk write per collection.
+
+        Multi-document transactions need a replica set, so a batch is not
+        atomic; importing is idempotent, and re-importing a batch repairs it.
+        """
+        if any(record.state._id is None for record in records):
+            raise ValueError("Imported games must have an id.")
+        if not records:
+            return
+        for record in records:
+            self._baselines.forget(record.state._id)
+        self._games.bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": mongo_document_id(record.state._id)},
+                    {"_id": mongo_document_id(record.state._id), **mongo_document(record.state)},
+                    upsert=True,
+                )
+                for record in records
+            ],
+            ordered=False,
+        )
+        moment_documents = []
+        for record in records:
+            game_id = record.state._id
+            self._delete_images(game_id)
+            self._delete_moments(game_id)
+            images = ((ImageType.PORTRAIT, record.portrait), (ImageType.BACKDROP, record.backdrop))
+            for image_type, image_bytes in images:
+                if image_bytes is not None:
+                    self._fs.put(image_bytes, filename=Images.name_for(game_id, image_type))
+            for moment, image_bytes in record.moments:
+                moment_documents.append({"_id": moment.id, "game_id": game_id, "caption": moment.caption})
+                self._fs.put(image_bytes, filename=mongo_moment_filename(moment.id))
+        if moment_documents:
+            self._moments.insert_many(moment_documents, ordered=False)
 
     def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
         moment = StoryMoment(game_id=game_id, caption=caption)
         self._moments.insert_one({"_id": moment.id, "game_id": game_id, "caption": caption})
-        self._fs.put(image_bytes, filename=f"moment_{moment.id}")
+        self._fs.put(image_bytes, filename=mongo_moment_filename(moment.id))
         return moment
 
     def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
-        results: list[tuple[StoryMoment, bytes]] = []
-        for document in self._moments.find({"game_id": game_id}):
-            moment = StoryMoment(id=str(document["_id"]), game_id=game_id, caption=document.get("caption", ""))
-            stored = self._fs.find_one({"filename": f"moment_{moment.id}"})
-            if stored is None:
-                continue
-            results.append((moment, stored.read()))
-        return results
+        moments = self.list_moment_summaries(game_id)
+        if not moments:
+            return []
+        images = self._read_files([mongo_moment_filename(moment.id) for moment in moments])
+        return [
+            (moment, images[mongo_moment_filename(moment.id)])
+            for moment in moments
+            if mongo_moment_filename(moment.id) in images
+        ]
+
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return [
+            StoryMoment(id=str(document["_id"]), game_id=game_id, caption=document.get("caption", ""))
+            for document in self._moments.find({"game_id": game_id}, {"caption": 1})
+        ]
+
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        if self._moments.find_one({"_id": moment_id, "game_id": game_id}, {"_id": 1}) is None:
+            return None
+        return self._read_files([mongo_moment_filename(moment_id)]).get(mongo_moment_filename(moment_id))
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class ExecutorGameRepository:
+    """Async facade that keeps blocking repository I/O off the event loop.
+
+    Writes run on dedicated writer threads so saves for a game stay ordered
+    and never contend with each other; reads run on a separate pool so a slow
+    listing or blob read does not queue behind in-flight turns. With several
+    ``writer_threads`` (one per storage partition), each game id is pinned to
+    the thread of its partition, so partitions are written in parallel.
+    """
+
+    def __init__(
+        self,
+        repository: GameRepository,
+        reader_threads: int = DEFAULT_READER_THREADS,
+        writer_threads: int = 1,
+    ) -> None:
+        if reader_threads < 1:
+            raise ValueError("reader_threads must be at least 1.")
+        if writer_threads < 1:
+            raise ValueError("writer_threads must be at least 1.")
+        self.repository = repository
+        self._writers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cya-db-writer-{index}")
+            for index in range(writer_threads)
+        ]
+        self._new_games = count()
+        self._readers = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="cya-db-reader")
+
+    async def _run(
+        self,
+        executor: ThreadPoolExecutor,
+        operation: Callable[..., RepositoryResult],
+        *args: Any,
+    ) -> RepositoryResult:
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(operation, *args))
+
+    def _writer(self, game_id: str | None) -> ThreadPoolExecutor:
+        if game_id is None:
+            return self._writers[next(self._new_games) % len(self._writers)]
+        return self._writers[partition_of(game_id, len(self._writers))]
+
+    async def save_game(self, state: State) -> None:
+        await self._run(self._writer(state._id), self.repository.save_game, state)
+
+    async def save_game_and_images(self, state: State, images: Images) -> None:
+        await self._run(self._writer(state._id), self.repository.save_game_and_images, state, images)
+
+    async def delete_game(self, game_id: str) -> bool:
+        return await self._run(self._writer(game_id), self.repository.delete_game, game_id)
+
+    async def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        return await self._run(self._readers, self.repository.get_image_bytes, game_id)
+
+    async def all_games(self) -> list[State]:
+        return await self._run(self._readers, self.repository.all_games)
+
+    async def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        return await self._run(self._readers, self.repository.list_game_summaries, limit, cursor)
+
+    async def get_game(self, game_id: str) -> State | None:
+        return await self._run(self._readers, self.repository.get_game, game_id)
+
+    async def get_revision(self, game_id: str) -> int | None:
+        return await self._run(self._readers, self.repository.get_revision, game_id)
+
+    async def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        return await self._run(self._writer(game_id), self.repository.add_moment, game_id, caption, image_bytes)
+
+    async def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        return await self._run(self._readers, self.repository.list_moments, game_id)
+
+    async def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return await self._run(self._readers, self.repository.list_moment_summaries, game_id)
+
+    async def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        return await self._run(self._readers, self.repository.get_moment_image, game_id, moment_id)
+
+    async def close(self) -> None:
+        for writer in self._writers:
+            writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+def create_async_game_repository(repository: GameRepository) -> AsyncGameRepository:
+    """Async access for request handlers: native asyncio for MongoDB, thread pools around ``repository`` otherwise.
+
+    When ``repository`` is a ``CachedGameRepository``, native MongoDB access
+    shares its cache. Set ``CYA_MONGO_ASYNC=false`` to route MongoDB through
+    the thread pools too.
+    """
+    backend = os.getenv("CYA_STORAGE_BACKEND", "sqlite").strip().lower()
+    if backend == "mongodb" and bool_of_str(os.getenv("CYA_MONGO_ASYNC", "true")):
+        from async_mongo import create_async_mongo_game_repository
+        from game_cache import AsyncCachedGameRepository, CachedGameRepository
+
+        native = create_async_mongo_game_repository()
+        if isinstance(repository, CachedGameRepository):
+            return AsyncCachedGameRepository(native, repository)
+        return native
+    reader_threads = int(os.getenv("CYA_DB_READER_THREADS", str(DEFAULT_READER_THREADS)))
+    writer_threads = int(os.getenv("CYA_SQLITE_PARTITIONS", "1")) if backend == "sqlite" else 1
+    return ExecutorGameRepository(repository, reader_threads=reader_threads, writer_threads=writer_threads)
+
+
+def sqlite_path_from_env() -> str:
+    default_path = Path(__file__).resolve().parent / "data" / "cya.db"
+    return os.getenv("CYA_SQLITE_PATH", str(default_path))
 
 
 def create_game_repository() -> GameRepository:
     backend = os.getenv("CYA_STORAGE_BACKEND", "sqlite").strip().lower()
     if backend == "sqlite":
-        default_path = Path(__file__).resolve().parent / "data" / "cya.db"
-        sqlite_path = os.getenv("CYA_SQLITE_PATH", str(default_path))
+        sqlite_path = sqlite_path_from_env()
         print(f"Using SQLite game storage: {sqlite_path}")
-        return SQLiteGameRepository(sqlite_path)
+        archive_path = os.getenv("CYA_SQLITE_ARCHIVE_PATH") or str(
+            Path(sqlite_path).with_name(f"{Path(sqlite_path).stem}-archive.db")
+        )
+        options: dict[str, Any] = {
+            "reader_pool_size": int(os.getenv("CYA_SQLITE_READER_POOL_SIZE", str(DEFAULT_SQLITE_READER_POOL_SIZE))),
+            "mmap_size_bytes": int(os.getenv("CYA_SQLITE_MMAP_SIZE_BYTES", str(DEFAULT_SQLITE_MMAP_SIZE_BYTES))),
+            "cache_size_kib": int(os.getenv("CYA_SQLITE_CACHE_SIZE_KIB", str(DEFAULT_SQLITE_CACHE_SIZE_KIB))),
+            "codec": create_state_codec(),
+            "world_snapshot_interval": int(
+                os.getenv("CYA_SQLITE_WORLD_SNAPSHOT_INTERVAL", str(DEFAULT_WORLD_SNAPSHOT_INTERVAL))
+            ),
+        }
+        if sqlite_path == ":memory:":
+            return SQLiteGameRepository(sqlite_path, **options)
+        from partitioned import open_sqlite_game_repository
+
+        return open_sqlite_game_repository(
+            sqlite_path,
+            partitions=int(os.getenv("CYA_SQLITE_PARTITIONS", "1")),
+            archive=GameArchive(archive_path),
+            **options,
+        )
     if backend == "mongodb":
         print("Using MongoDB game storage.")
-        return MongoGameRepository()
+        return MongoGameRepository(
+            baseline_cache_size=int(
+                os.getenv("CYA_MONGO_BASELINE_CACHE_SIZE", str(DEFAULT_MONGO_BASELINE_CACHE_SIZE))
+            )
+        )
     raise RuntimeError("CYA_STORAGE_BACKEND must be either 'sqlite' or 'mongodb'")
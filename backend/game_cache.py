@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from classes import GameSummaryPage, State, StoryMoment
+from database import DEFAULT_GAME_LISTING_LIMIT, AsyncGameRepository, GameRepository, RevisionConflictError
+from images import Images
+
+DEFAULT_GAME_CACHE_SIZE = 256
+
+
+class CachedGameRepository:
+    """Bounded LRU of decoded games in front of another repository.
+
+    Entries are keyed by game id and tagged with the revision they were read or
+    saved at. A hit is only served after a revision-only lookup confirms that
+    storage still holds that revision, so writes made by other processes (for
+    example other uvicorn workers) are never masked by a stale entry. Callers
+    always receive their own copy, because the game service mutates states in
+    place before saving them.
+    """
+
+    def __init__(self, repository: GameRepository, max_entries: int = DEFAULT_GAME_CACHE_SIZE) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.repository = repository
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, State] = OrderedDict()
+        self._lock = Lock()
+
+    def _cached(self, game_id: str) -> State | None:
+        with self._lock:
+            cached = self._entries.get(game_id)
+            if cached is not None:
+                self._entries.move_to_end(game_id)
+            return cached
+
+    def _remember(self, state: State) -> None:
+        if state._id is None:
+            return
+        snapshot = state.copy()
+        with self._lock:
+            cached = self._entries.get(state._id)
+            if cached is not None and cached.revision > snapshot.revision:
+                return
+            self._entries[state._id] = snapshot
+            self._entries.move_to_end(state._id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, game_id: str) -> None:
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+    def _count_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _save(self, state: State, images: Images | None = None) -> None:
+        try:
+            if images is None:
+                self.repository.save_game(state)
+            else:
+                self.repository.save_game_and_images(state, images)
+        except RevisionConflictError:
+            if state._id is not None:
+                self.invalidate(state._id)
+            raise
+        self._remember(state)
+
+    def save_game(self, state: State) -> None:
+        self._save(state)
+
+    def save_game_and_images(self, state: State, images: Images) -> None:
+        self._save(state, images)
+
+    def delete_game(self, game_id: str) -> bool:
+        self.invalidate(game_id)
+        return self.repository.delete_game(game_id)
+
+    def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        return self.repository.get_image_bytes(game_id)
+
+    def all_games(self) -> list[State]:
+        return self.repository.all_games()
+
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        return self.repository.list_game_summaries(limit, cursor)
+
+    def get_game(self, game_id: str) -> State | None:
+        cached = self._cached(game_id)
+        if cached is not None:
+            if self.repository.get_revision(game_id) == cached.revision:
+                self._count_hit()
+                return cached.copy()
+            self.invalidate(game_id)
+
+        self._count_miss()
+        state = self.repository.get_game(game_id)
+        if state is not None:
+            self._remember(state)
+        return state
+
+    def get_revision(self, game_id: str) -> int | None:
+        return self.repository.get_revision(game_id)
+
+    def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        return self.repository.add_moment(game_id, caption, image_bytes)
+
+    def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        return self.repository.list_moments(game_id)
+
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return self.repository.list_moment_summaries(game_id)
+
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        return self.repository.get_moment_image(game_id, moment_id)
+
+    def close(self) -> None:
+        self.repository.close()
+
+
+class AsyncCachedGameRepository:
+    """Async access that shares the entries of a ``CachedGameRepository``.
+
+    Storage I/O goes through ``repository`` (a native async repository), while
+    cache entries, revision checks and counters are those of ``cache``. Saves
+    and deletes made through either the sync or the async path therefore keep
+    one cache up to date.
+    """
+
+    def __init__(self, repository: AsyncGameRepository, cache: CachedGameRepository) -> None:
+        self.repository = repository
+        self.cache = cache
+
+    async def _save(self, state: State, images: Images | None = None) -> None:
+        try:
+            if images is None:
+                await self.repository.save_game(state)
+            else:
+                await self.repository.save_game_and_images(state, images)
+        except RevisionConflictError:
+            if state._id is not None:
+                self.cache.invalidate(state._id)
+            raise
+        self.cache._remember(state)
+
+    async def save_game(self, state: State) -> None:
+        await self._save(state)
+
+    async def save_game_and_images(self, state: State, images: Images) -> None:
+        await self._save(state, images)
+
+    async def delete_game(self, game_id: str) -> bool:
+        self.cache.invalidate(game_id)
+        return await self.repository.delete_game(game_id)
+
+    async def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        return await self.repository.get_image_bytes(game_id)
+
+    async def all_games(self) -> list[State]:
+        return await self.repository.all_games()
+
+    async def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        return await self.repository.list_game_summaries(limit, cursor)
+
+    async def get_game(self, game_id: str) -> State | None:
+        cached = self.cache._cached(game_id)
+        if cached is not None:
+            if await self.repository.get_revision(game_id) == cached.revision:
+                self.cache._count_hit()
+                return cached.copy()
+            self.cache.invalidate(game_id)
+
+        self.cache._count_miss()
+        state = await self.repository.get_game(game_id)
+        if state is not None:
+            self.cache._remember(state)
+        return state
+
+    async def get_revision(self, game_id: str) -> int | None:
+        return await self.repository.get_revision(game_id)
+
+    async def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        return await self.repository.add_moment(game_id, caption, image_bytes)
+
+    async def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        return await self.repository.list_moments(game_id)
+
+    async def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return await self.repository.list_moment_summaries(game_id)
+
+    async def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        return await self.repository.get_moment_image(game_id, moment_id)
+
+    async def close(self) -> None:
+        await self.repository.close()
+
+
+def create_cached_game_repository(repository: GameRepository) -> GameRepository:
+    max_entries = int(os.getenv("CYA_GAME_CACHE_SIZE", str(DEFAULT_GAME_CACHE_SIZE)))
+    if max_entries == 0:
+        return repository
+    return CachedGameRepository(repository, max_entries=max_entries)
@@ -1,16 +1,29 @@
 import os
 import re
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from time import perf_counter
 from typing import Any
 from uuid import uuid4
 
+from pydantic import ValidationError
+
 import prompts
 from classes import MIN_HIT_POINTS, InventoryItem, Quest, Sender, State, StoryMoment
 from context import ContextBuilder
-from database import GameRepository, RevisionConflictError
+from database import AsyncGameRepository, GameRepository, RevisionConflictError
 from images import Image
-from llm import LLMClient, LLMError
+from llm import (
+    LLMCallResult,
+    LLMClient,
+    LLMError,
+    LLMResponseError,
+    StreamedStringField,
+    capture_llm_calls,
+    current_llm_calls,
+    deadline_after,
+    llm_deadline,
+)
 from llm_results import (
     ActionAssessment,
     InventoryOperation,
@@ -71,6 +84,25 @@ class TurnResult:
         return response
 
 
+@dataclass(frozen=True)
+class TurnStreamEvent:
+    """One event of a streamed turn: a piece of narration text, or the final result."""
+
+    delta: str | None = None
+    result: TurnResult | None = None
+
+
+@dataclass
+class PreparedTurn:
+    """A loaded game whose player action has been accepted and is waiting for narration."""
+
+    state: State
+    game_id: str
+    user_message: str
+    damage: int
+    turn_id: int
+
+
 class GameService:
     def __init__(
         self,
@@ -80,21 +112,32 @@ class GameService:
         summary_refresh_turn_threshold: int = DEFAULT_SUMMARY_REFRESH_TURN_THRESHOLD,
         recent_turns_to_keep_unsummarized: int = RECENT_TURNS_TO_KEEP_UNSUMMARIZED,
         trace_recorder: TraceRecorder | None = None,
+        async_repository: AsyncGameRepository | None = None,
+        turn_deadline_seconds: float | None = None,
     ) -> None:
         self.repository = repository
+        self.async_repository = async_repository
         self.llm_client = llm_client
         self.context_builder = context_builder or ContextBuilder()
         self.summary_refresh_turn_threshold = summary_refresh_turn_threshold
         self.recent_turns_to_keep_unsummarized = recent_turns_to_keep_unsummarized
         self.trace_recorder = trace_recorder or NoOpTraceRecorder()
+        self.turn_deadline_seconds = turn_deadline_seconds
 
     async def play_turn(self, game_id: str | None, content: str) -> TurnResult:
+        """Play one turn; all of its model calls and retries share ``turn_deadline_seconds``.
+
+        Model calls publish their results into a list scoped to this turn, so
+        stage traces report this turn's tokens and retries even when other
+        turns run concurrently on the same client.
+        """
         correlation_id = uuid4().hex
         started_at = perf_counter()
         trace_context: dict[str, int | None] = {"turn_id": None}
         status = "error"
         try:
-            result = await self._play_turn(game_id, content, correlation_id, trace_context)
+            with llm_deadline(deadline_after(self.turn_deadline_seconds)), capture_llm_calls():
+                result = await self._play_turn(game_id, content, correlation_id, trace_context)
             status = "success" if result.status_code == 200 else "error"
             return result
         finally:
@@ -115,13 +158,128 @@ class GameService:
         correlation_id: str,
         trace_context: dict[str, int | None],
     ) -> TurnResult:
+        prepared = await self._prepare_turn(game_id, content, correlation_id, trace_context)
+        if isinstance(prepared, TurnResult):
+            return prepared
+
+        stage_started_at = perf_counter()
+        try:
+            narration = await self._get_narration_result(prepared.state, prepared.user_message)
+        except LLMError:
+            self._record_stage(
+                correlation_id, prepared.game_id, prepared.turn_id, "narration", stage_started_at, "error"
+            )
+            return self._model_error(correlation_id)
+        self._record_stage(
+            correlation_id, prepared.game_id, prepared.turn_id, "narration", stage_started_at, "success", accepted=True
+        )
+        return await self._finish_turn(prepared, narration, correlation_id)
+
+    async def stream_turn(self, game_id: str | None, content: str) -> AsyncIterator[TurnStreamEvent]:
+        """Play a turn like ``play_turn``, yielding the narration text as the model generates it.
+
+        The stream ends with one event carrying the ``TurnResult``; the turn's
+        effects are applied and saved only once the narration is complete. The
+        stages before and after the narration share ``turn_deadline_seconds``;
+        the narration itself is not cut short while it is visibly progressing.
+        """
+        correlation_id = uuid4().hex
+        started_at = perf_counter()
+        deadline = deadline_after(self.turn_deadline_seconds)
+        llm_calls: list[LLMCallResult] = []
+        narration_stream: AsyncIterator[str] | None = None
+        trace_context: dict[str, int | None] = {"turn_id": None}
+        status = "error"
+        try:
+            with llm_deadline(deadline), capture_llm_calls(llm_calls):
+                prepared = await self._prepare_turn(game_id, content, correlation_id, trace_context)
+            if isinstance(prepared, TurnResult):
+                yield TurnStreamEvent(result=prepared)
+                return
+
+            stage_started_at = perf_counter()
+            content_field = StreamedStringField("content")
+            fragments: list[str] = []
+            narration_stream = self.llm_client.async_stream_structured_messages(
+                self.context_builder.narration_messages(prepared.state, prepared.user_message),
+                NarrationResult,
+            )
+            try:
+                # The capture is entered around each step rather than across the yields below.
+                while True:
+                    with capture_llm_calls(llm_calls):
+                        try:
+                            fragment = await anext(narration_stream)
+                        except StopAsyncIteration:
+                            break
+                    fragments.append(fragment)
+                    delta = content_field.feed(fragment)
+                    if delta:
+                        yield TurnStreamEvent(delta=delta)
+                narration = self._parse_streamed_narration("".join(fragments))
+            except LLMError:
+                self._record_stage(
+                    correlation_id,
+                    prepared.game_id,
+                    prepared.turn_id,
+                    "narration",
+                    stage_started_at,
+                    "error",
+                    llm_calls=llm_calls,
+                )
+                yield TurnStreamEvent(result=self._model_error(correlation_id))
+                return
+            self._record_stage(
+                correlation_id,
+                prepared.game_id,
+                prepared.turn_id,
+                "narration",
+                stage_started_at,
+                "success",
+                accepted=True,
+                metadata={"streamed": True},
+                llm_calls=llm_calls,
+            )
+            with llm_deadline(deadline), capture_llm_calls(llm_calls):
+                result = await self._finish_turn(prepared, narration, correlation_id)
+            status = "success" if result.status_code == 200 else "error"
+            yield TurnStreamEvent(result=result)
+        finally:
+            if narration_stream is not None:
+                with capture_llm_calls(llm_calls):
+                    await narration_stream.aclose()
+            self.trace_recorder.record_turn(
+                TurnTrace(
+                    correlation_id=correlation_id,
+                    game_id=game_id or "",
+                    turn_id=trace_context["turn_id"],
+                    duration_ms=max(0, (perf_counter() - started_at) * 1000),
+                    status=status,
+                )
+            )
+
+    @staticmethod
+    def _parse_streamed_narration(raw: str) -> NarrationResult:
+        try:
+            return NarrationResult.model_validate_json(raw)
+        except ValidationError as exc:
+            raise LLMResponseError("Streamed narration was not a valid narration result.") from exc
+
+    async def _prepare_turn(
+        self,
+        game_id: str | None,
+        content: str,
+        correlation_id: str,
+        trace_context: dict[str, int | None],
+    ) -> PreparedTurn | TurnResult:
+        """Load the game and assess the player's action; returns the result to send instead when the turn stops here."""
         if not self._is_valid_id(game_id):
             return self._error(
                 400,
                 "Game ID is required. Please initialize or load a game first.",
             )
 
-        state = self.repository.get_game(game_id)
+        state = await self._get_game(game_id)
         if state is None:
             return self._error(
                 400,
@@ -166,13 +324,17 @@ class GameService:
                 return rejection
             damage = assessment.damage
 
-        stage_started_at = perf_counter()
-        try:
-            narration = await self._get_narration_result(state, user_message)
-        except LLMError:
-            self._record_stage(correlation_id, game_id, turn_id, "narration", stage_started_at, "error")
-            return self._model_error(correlation_id)
-        self._record_stage(correlation_id, game_id, turn_id, "narration", stage_started_at, "success", accepted=True)
+        return PreparedTurn(state=state, game_id=game_id, user_message=user_message, damage=damage, turn_id=turn_id)
+
+    async def _finish_turn(
+        self, prepared: PreparedTurn, narration: NarrationResult, correlation_id: str
+    ) -> TurnResult:
+        """Apply the narration's effects and the action's damage, then save the turn."""
+        state = prepared.state
+        game_id = prepared.game_id
+        user_message = prepared.user_message
+        damage = prepared.damage
+        turn_id = prepared.turn_id
         reply = narration.content
         if len(reply) == 0:
             return self._error(500, "Gamemaster failed to generate a response.")
@@ -199,7 +361,7 @@ class GameService:
             self._update_chat_history(state, user_message, None)
             stage_started_at = perf_counter()
             try:
-                self.repository.save_game(state)
+                await self._save_game(state)
             except RevisionConflictError:
                 self._record_stage(correlation_id, game_id, turn_id, "persist_turn", stage_started_at, "conflict")
                 return self._conflict()
@@ -220,7 +382,7 @@ class GameService:
         self._update_chat_history(state, user_message, reply)
         stage_started_at = perf_counter()
         try:
-            self.repository.save_game(state)
+            await self._save_game(state)
         except RevisionConflictError:
             self._record_stage(correlation_id, game_id, turn_id, "persist_turn", stage_started_at, "conflict")
             return self._conflict()
@@ -265,6 +427,22 @@ class GameService:
             player_attributes=state.player_attributes.to_api_dict(),
         )
 
+    async def _get_game(self, game_id: str) -> State | None:
+        if self.async_repository is not None:
+            return await self.async_repository.get_game(game_id)
+        return self.repository.get_game(game_id)
+
+    async def _save_game(self, state: State) -> None:
+        if self.async_repository is not None:
+            await self.async_repository.save_game(state)
+        else:
+            self.repository.save_game(state)
+
+    async def _add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        if self.async_repository is not None:
+            return await self.async_repository.add_moment(game_id, caption, image_bytes)
+        return self.repository.add_moment(game_id, caption, image_bytes)
+
     @staticmethod
     def _find_inventory_item_by_id(items: list[InventoryItem], item_id: str) -> InventoryItem | None:
         for item in items:
@@ -332,7 +510,7 @@ class GameService:
         state.unresolved_threads = summary.unresolved_threads
         state.summary_through_turn = end
         try:
-            self.repository.save_game(state)
+            await self._save_game(state)
         except RevisionConflictError:
             self._record_stage(correlation_id, game_id, turn_id, "rolling_summary", stage_started_at, "conflict")
             return
@@ -551,7 +729,7 @@ class GameService:
                 image_bytes = Image.debug_backdrop_bytes()
             else:
                 image_bytes = await self.llm_client.generate_image_bytes(image_prompt, MOMENT_IMAGE_SIZE)
-            return self.repository.add_moment(state._id, caption, image_bytes), image_bytes
+            return await self._add_moment(state._id, caption, image_bytes), image_bytes
         except Exception:
             return None
 
@@ -616,10 +794,19 @@ class GameService:
         status: str,
         accepted: bool | None = None,
         metadata: dict[str, Any] | None = None,
+        llm_calls: list[LLMCallResult] | None = None,
     ) -> None:
+        """Record a stage trace; model stages report the LLM calls made since ``started_at``.
+
+        The calls come from ``llm_calls`` or, by default, from the turn's ``capture_llm_calls`` list.
+        """
         is_model_stage = stage in MODEL_TRACE_STAGES
-        token_usage = getattr(self.llm_client, "last_token_usage", None) if is_model_stage else None
-        retry_count = getattr(self.llm_client, "last_retry_count", None) if is_model_stage else None
+        stage_calls: list[LLMCallResult] = []
+        if is_model_stage:
+            captured = llm_calls if llm_calls is not None else current_llm_calls()
+            stage_calls = [call for call in captured or [] if call.started_at >= started_at]
+        model = getattr(self.llm_client, "text_model", None) if is_model_stage else None
+        token_usage = self._sum_token_usage(stage_calls)
         self.trace_recorder.record(
             StageTrace(
                 correlation_id=correlation_id,
@@ -629,10 +816,22 @@ class GameService:
                 duration_ms=max(0, (perf_counter() - started_at) * 1000),
                 status=status,
                 accepted=accepted,
-                model=getattr(self.llm_client, "text_model", None) if is_model_stage else None,
+                model=stage_calls[-1].model if stage_calls else model,
                 prompt_version=prompts.PROMPT_VERSION,
-                token_usage=dict(token_usage) if isinstance(token_usage, dict) else None,
-                retry_count=retry_count,
+                token_usage=token_usage,
+                retry_count=sum(call.retry_count for call in stage_calls) if stage_calls else None,
+                llm_latency_ms=sum(call.latency_ms for call in stage_calls) if stage_calls else None,
                 metadata=safe_metadata(metadata),
             )
         )
+
+    @staticmethod
+    def _sum_token_usage(calls: list[LLMCallResult]) -> dict[str, int] | None:
+        usages = [call.token_usage for call in calls if call.token_usage is not None]
+        if not usages:
+            return None
+        totals: dict[str, int] = {}
+        for usage in usages:
+            for key, count in usage.items():
+                totals[key] = totals.get(key, 0) + count
+        return totals
@@ -1,18 +1,37 @@
 import asyncio
+import random
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Protocol, TypeVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import perf_counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Protocol, TypeVar
 
 import httpx
-from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, OpenAI, RateLimitError
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+    RateLimitError,
+)
 from openai.types.chat import ChatCompletion
 
+from rate_limit import LLMRateLimiter, RateLimitTimeoutError, estimate_request_tokens
+from resilience import CircuitBreaker, RequestHedger
+
 TextModel = "gpt-4.1"
 ImageModel = "gpt-image-1"
 DefaultTemperature = 0.0
 DefaultTimeoutSeconds = 30.0
 DefaultRetryLimit = 2
 DefaultRetryBaseDelaySeconds = 0.25
+DefaultRetryMaxDelaySeconds = 8.0
 
 StructuredResult = TypeVar("StructuredResult")
 RetryResult = TypeVar("RetryResult")
@@ -30,10 +49,28 @@ class LLMResponseError(LLMError):
     """Raised when the provider returns malformed or empty structured output."""
 
 
+class LLMCircuitOpenError(LLMTransientError):
+    """Raised without calling the provider while the model's circuit breaker is open."""
+
+
+class LLMDeadlineExceededError(LLMTransientError):
+    """Raised when the caller's latency budget runs out before the provider has answered."""
+
+
 @dataclass(frozen=True)
 class RetryConfig:
     retry_limit: int = DefaultRetryLimit
     base_delay_seconds: float = DefaultRetryBaseDelaySeconds
+    max_delay_seconds: float = DefaultRetryMaxDelaySeconds
+
+
+@dataclass
+class ModelGuard:
+    """Everything that gates calls to one model: its rate limits, circuit breaker and optional hedging."""
+
+    rate_limiter: LLMRateLimiter
+    circuit_breaker: CircuitBreaker
+    hedger: RequestHedger | None = None
 
 
 class LLMClient(Protocol):
@@ -66,9 +103,98 @@ class LLMClient(Protocol):
         temperature: float = DefaultTemperature,
     ) -> StructuredResult: ...
 
+    def async_stream_structured_messages(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> AsyncIterator[str]: ...
+
     async def generate_image_bytes(self, prompt: str, size: str) -> bytes: ...
 
 
+JSON_STRING_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class StreamedStringField:
+    """Decodes one top-level string field of a JSON object while the object is still being generated.
+
+    ``feed`` takes the next fragment of raw JSON text and returns the characters
+    of the field's value decoded from it, so the value can be shown before the
+    rest of the object (or even the rest of the value) has arrived.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode_digits: str | None = None
+        self._high_surrogate: int | None = None
+        self._expecting_value = False
+        self._key: list[str] | None = None
+        self._last_key: str | None = None
+        self._capturing = False
+
+    def _decoded(self, code_point: int) -> str:
+        if 0xD800 <= code_point < 0xDC00:
+            self._high_surrogate = code_point
+            return ""
+        if 0xDC00 <= code_point < 0xE000 and self._high_surrogate is not None:
+            code_point = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code_point - 0xDC00)
+        self._high_surrogate = None
+        return chr(code_point)
+
+    def _string_character(self, character: str, output: list[str]) -> None:
+        if self._capturing:
+            output.append(character)
+        elif self._key is not None:
+            self._key.append(character)
+
+    def feed(self, fragment: str) -> str:
+        output: list[str] = []
+        for character in fragment:
+            if self._in_string:
+                if self._unicode_digits is not None:
+                    self._unicode_digits += character
+                    if len(self._unicode_digits) == 4:
+                        decoded = self._decoded(int(self._unicode_digits, 16))
+                        self._unicode_digits = None
+                        if decoded:
+                            self._string_character(decoded, output)
+                elif self._escape:
+                    self._escape = False
+                    if character == "u":
+                        self._unicode_digits = ""
+                    else:
+                        self._string_character(JSON_STRING_ESCAPES.get(character, character), output)
+                elif character == "\\":
+                    self._escape = True
+                elif character == '"':
+                    self._in_string = False
+                    self._capturing = False
+                    if self._key is not None:
+                        self._last_key = "".join(self._key)
+                        self._key = None
+                else:
+                    self._string_character(character, output)
+            elif character == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expecting_value:
+                    self._capturing = self._last_key == self.name
+                elif self._depth == 1:
+                    self._key = []
+            elif character in "{[":
+                self._depth += 1
+            elif character in "}]":
+                self._depth -= 1
+            elif character == ":" and self._depth == 1:
+                self._expecting_value = True
+            elif character == "," and self._depth == 1:
+                self._expecting_value = False
+        return "".join(output)
+
+
 def _empty_str_if_none(reply: str | None) -> str:
     return reply if reply is not None else ""
 
@@ -87,33 +213,172 @@ def _is_retryable_exception(exc: Exception) -> bool:
     return False
 
 
-def _retry_delay(config: RetryConfig, attempt: int) -> float:
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Failures that say the provider is unhealthy; a 429 only says it is busy and is left to the rate limiter."""
+    if isinstance(exc, RateLimitError) or (isinstance(exc, APIStatusError) and exc.status_code == 429):
+        return False
+    return isinstance(exc, Exception) and _is_retryable_exception(exc)
+
+
+_call_deadline: ContextVar[float | None] = ContextVar("llm_call_deadline", default=None)
+
+
+def deadline_after(seconds: float | None) -> float | None:
+    """The ``time.monotonic()`` value ``seconds`` from now, or None for no deadline."""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+@contextmanager
+def llm_deadline(deadline: float | None) -> Iterator[None]:
+    """Make every LLM call in the block, including its retries, finish by ``deadline`` (a monotonic time).
+
+    Nested deadlines never extend an outer one.
+    """
+    current = _call_deadline.get()
+    if deadline is not None and current is not None:
+        deadline = min(deadline, current)
+    token = _call_deadline.set(deadline if deadline is not None else current)
+    try:
+        yield
+    finally:
+        _call_deadline.reset(token)
+
+
+def remaining_llm_budget() -> float | None:
+    """Seconds left before the current deadline, or None when no deadline applies."""
+    deadline = _call_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@dataclass(frozen=True)
+class LLMCallResult:
+    """What one LLM call (all of its attempts together) cost."""
+
+    model: str | None
+    started_at: float
+    latency_ms: float
+    token_usage: dict[str, int] | None = None
+    retry_count: int = 0
+    cached: bool = False
+
+
+_captured_calls: ContextVar[list[LLMCallResult] | None] = ContextVar("llm_call_results", default=None)
+
+
+@contextmanager
+def capture_llm_calls(calls: list[LLMCallResult] | None = None) -> Iterator[list[LLMCallResult]]:
+    """Collect an ``LLMCallResult`` for every LLM call made in the block into ``calls``.
+
+    The list is held in a context variable, so concurrent requests only ever
+    see their own calls, and tasks started inside the block add to it too.
+    """
+    calls = [] if calls is None else calls
+    token = _captured_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _captured_calls.reset(token)
+
+
+def current_llm_calls() -> list[LLMCallResult] | None:
+    return _captured_calls.get()
+
+
+def publish_llm_call(result: LLMCallResult) -> None:
+    calls = _captured_calls.get()
+    if calls is not None:
+        calls.append(result)
+
+
+def _retry_after_seconds(exc: Exception) -> float | None:
+    """How long the provider asked us to wait, from ``retry-after-ms`` or ``retry-after`` on its response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is None:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds is not None:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _retry_delay(config: RetryConfig, attempt: int, exc: Exception | None = None) -> float | None:
+    """Seconds to wait before the next attempt, or None when the provider asked for longer than we allow.
+
+    Backoff uses full jitter so that players who failed together do not retry
+    together. A Retry-After hint from the provider is waited out, plus a little
+    jitter, as long as it is no longer than ``max_delay_seconds``.
+    """
+    retry_after = _retry_after_seconds(exc) if exc is not None else None
+    if retry_after is not None:
+        if retry_after > config.max_delay_seconds:
+            return None
+        return retry_after + random.uniform(0, max(0.0, config.base_delay_seconds))
     if config.base_delay_seconds <= 0:
         return 0
-    return config.base_delay_seconds * (2 ** attempt)
+    return random.uniform(0, min(config.max_delay_seconds, config.base_delay_seconds * (2 ** attempt)))
+
+
+def _check_deadline(deadline: float | None) -> None:
+    if deadline is not None and time.monotonic() >= deadline:
+        raise LLMDeadlineExceededError("LLM request deadline passed before the provider answered.")
+
+
+def _next_retry_delay(
+    config: RetryConfig, attempt: int, exc: Exception, deadline: float | None
+) -> float | None:
+    """The delay before retrying after ``exc``, or None when there should be no further attempt."""
+    if attempt >= config.retry_limit:
+        return None
+    delay = _retry_delay(config, attempt, exc)
+    if delay is None or (deadline is not None and time.monotonic() + delay >= deadline):
+        return None
+    return delay
 
 
 def _run_with_retries(
     operation: Callable[[], RetryResult],
     config: RetryConfig,
     retry_observer: Callable[[int], None] | None = None,
+    deadline: float | None = None,
 ) -> RetryResult:
+    """Run ``operation``, retrying retryable failures until ``deadline`` (default: the current ``llm_deadline``)."""
+    deadline = deadline if deadline is not None else _call_deadline.get()
     last_exception: Exception | None = None
     retry_count = 0
     for attempt in range(config.retry_limit + 1):
         try:
+            _check_deadline(deadline)
             result = operation()
             if retry_observer is not None:
                 retry_observer(retry_count)
             return result
+        except LLMDeadlineExceededError:
+            if retry_observer is not None:
+                retry_observer(retry_count)
+            raise
         except Exception as exc:
             if not _is_retryable_exception(exc):
                 raise
             last_exception = exc
-            if attempt >= config.retry_limit:
+            delay = _next_retry_delay(config, attempt, exc, deadline)
+            if delay is None:
                 break
             retry_count += 1
-            time.sleep(_retry_delay(config, attempt))
+            time.sleep(delay)
     if retry_observer is not None:
         retry_observer(retry_count)
     raise LLMTransientError("LLM request failed after retries.") from last_exception
@@ -123,23 +388,31 @@ async def _async_run_with_retries(
     operation: Callable[[], Awaitable[RetryResult]],
     config: RetryConfig,
     retry_observer: Callable[[int], None] | None = None,
+    deadline: float | None = None,
 ) -> RetryResult:
+    deadline = deadline if deadline is not None else _call_deadline.get()
     last_exception: Exception | None = None
     retry_count = 0
     for attempt in range(config.retry_limit + 1):
         try:
+            _check_deadline(deadline)
             result = await operation()
             if retry_observer is not None:
                 retry_observer(retry_count)
             return result
+        except LLMDeadlineExceededError:
+            if retry_observer is not None:
+                retry_observer(retry_count)
+            raise
         except Exception as exc:
             if not _is_retryable_exception(exc):
                 raise
             last_exception = exc
-            if attempt >= config.retry_limit:
+            delay = _next_retry_delay(config, attempt, exc, deadline)
+            if delay is None:
                 break
             retry_count += 1
-            await asyncio.sleep(_retry_delay(config, attempt))
+            await asyncio.sleep(delay)
     if retry_observer is not None:
         retry_observer(retry_count)
     raise LLMTransientError("LLM request failed after retries.") from last_exception
@@ -170,35 +443,179 @@ class OpenAILLMClient:
         timeout_seconds: float = DefaultTimeoutSeconds,
         retry_limit: int = DefaultRetryLimit,
         retry_base_delay_seconds: float = DefaultRetryBaseDelaySeconds,
+        text_rate_limiter: LLMRateLimiter | None = None,
+        image_rate_limiter: LLMRateLimiter | None = None,
+        text_circuit_breaker: CircuitBreaker | None = None,
+        image_circuit_breaker: CircuitBreaker | None = None,
+        text_hedger: RequestHedger | None = None,
     ) -> None:
         self.text_model = text_model
         self.image_model = image_model
+        self.timeout_seconds = timeout_seconds
         self.retry_config = RetryConfig(
             retry_limit=retry_limit,
             base_delay_seconds=retry_base_delay_seconds,
         )
-        self.last_retry_count: int | None = None
-        self.last_token_usage: dict[str, int] | None = None
-        self._client = OpenAI(api_key=api_key, timeout=timeout_seconds, max_retries=0)
-        self._async_client = AsyncOpenAI(api_key=api_key, timeout=timeout_seconds, max_retries=0)
+        self.text_rate_limiter = text_rate_limiter or LLMRateLimiter("text")
+        self.image_rate_limiter = image_rate_limiter or LLMRateLimiter("image")
+        self._text_guard = ModelGuard(
+            self.text_rate_limiter, text_circuit_breaker or CircuitBreaker(text_model), text_hedger
+        )
+        self._image_guard = ModelGuard(self.image_rate_limiter, image_circuit_breaker or CircuitBreaker(image_model))
+        self._client = OpenAI(
+            api_key=api_key,
+            timeout=timeout_seconds,
+            max_retries=0,
+            http_client=DefaultHttpxClient(event_hooks={"response": [self._observe_response]}),
+        )
+        self._async_client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=timeout_seconds,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(event_hooks={"response": [self._async_observe_response]}),
+        )
 
-    def _record_response_metadata(self, response: Any) -> None:
-        self.last_token_usage = _token_usage_from_response(response)
+    def _rate_limiter_for(self, path: str) -> LLMRateLimiter:
+        return self.image_rate_limiter if "/images/" in path else self.text_rate_limiter
+
+    def _observe_response(self, response: Any) -> None:
+        self._rate_limiter_for(response.request.url.path).observe_response(response.status_code, response.headers)
+
+    async def _async_observe_response(self, response: Any) -> None:
+        self._observe_response(response)
+
+    def _request_timeout(self) -> float:
+        """The per-request timeout, shortened so a single attempt cannot outlive the current deadline."""
+        remaining = remaining_llm_budget()
+        if remaining is None:
+            return self.timeout_seconds
+        return max(0.001, min(self.timeout_seconds, remaining))
+
+    def _admit(self, guard: ModelGuard) -> None:
+        if not guard.circuit_breaker.allow_request():
+            raise LLMCircuitOpenError(f"Calls to {guard.circuit_breaker.model} are paused after repeated failures.")
+
+    @staticmethod
+    def _deadline_exceeded(guard: ModelGuard) -> LLMDeadlineExceededError:
+        # The call never reached the provider, so it says nothing about the provider's health.
+        guard.circuit_breaker.record_cancelled()
+        return LLMDeadlineExceededError("LLM request deadline passed while waiting for the rate limiter.")
+
+    def _record_outcome(self, guard: ModelGuard, exc: BaseException | None) -> None:
+        if exc is None or (isinstance(exc, Exception) and not _is_provider_failure(exc)):
+            guard.circuit_breaker.record_success()
+        elif isinstance(exc, Exception):
+            guard.circuit_breaker.record_failure()
+        else:
+            guard.circuit_breaker.record_cancelled()
+
+    def _guarded(
+        self, guard: ModelGuard, estimated_tokens: int, operation: Callable[[], RetryResult]
+    ) -> Callable[[], RetryResult]:
+        """Run each attempt of ``operation`` behind the model's circuit breaker and inside its rate limits."""
+
+        def call() -> RetryResult:
+            self._admit(guard)
+            try:
+                with guard.rate_limiter.acquire(estimated_tokens, timeout=remaining_llm_budget()) as permit:
+                    response = operation()
+                    permit.record_usage(_token_usage_from_response(response))
+            except RateLimitTimeoutError as exc:
+                raise self._deadline_exceeded(guard) from exc
+            except BaseException as exc:
+                self._record_outcome(guard, exc)
+                raise
+            self._record_outcome(guard, None)
+            return response
+
+        return call
+
+    def _async_guarded(
+        self,
+        guard: ModelGuard,
+        estimated_tokens: int,
+        operation: Callable[[], Awaitable[RetryResult]],
+        stage: str = "",
+    ) -> Callable[[], Awaitable[RetryResult]]:
+        """Async ``_guarded``; hedged calls are timed against earlier calls of the same ``stage``."""
+
+        async def attempt() -> RetryResult:
+            self._admit(guard)
+            try:
+                with await guard.rate_limiter.async_acquire(estimated_tokens, timeout=remaining_llm_budget()) as permit:
+                    response = await operation()
+                    permit.record_usage(_token_usage_from_response(response))
+            except RateLimitTimeoutError as exc:
+                raise self._deadline_exceeded(guard) from exc
+            except BaseException as exc:
+                self._record_outcome(guard, exc)
+                raise
+            self._record_outcome(guard, None)
+            return response
+
+        async def call() -> RetryResult:
+            if guard.hedger is None:
+                return await attempt()
+            return await guard.hedger.run(attempt, stage)
+
+        return call
+
+    def rate_limit_stats(self) -> dict[str, dict[str, Any]]:
+        """Queue depth, wait times and current budgets of the text and image limiters."""
+        return {limiter.name: limiter.stats() for limiter in (self.text_rate_limiter, self.image_rate_limiter)}
+
+    def circuit_states(self) -> dict[str, str]:
+        breakers = (self._text_guard.circuit_breaker, self._image_guard.circuit_breaker)
+        return {breaker.model: breaker.state for breaker in breakers}
+
+    def _call(self, model: str, operation: Callable[[], RetryResult]) -> RetryResult:
+        """Run ``operation`` with retries and publish its ``LLMCallResult``."""
+        started_at = perf_counter()
+        retry_counts: list[int] = []
+        response = None
+        try:
+            response = _run_with_retries(operation, self.retry_config, retry_counts.append)
+            return response
+        finally:
+            self._publish(model, started_at, response, retry_counts)
+
+    async def _async_call(self, model: str, operation: Callable[[], Awaitable[RetryResult]]) -> RetryResult:
+        started_at = perf_counter()
+        retry_counts: list[int] = []
+        response = None
+        try:
+            response = await _async_run_with_retries(operation, self.retry_config, retry_counts.append)
+            return response
+        finally:
+            self._publish(model, started_at, response, retry_counts)
+
+    @staticmethod
+    def _publish(model: str, started_at: float, response: Any, retry_counts: list[int]) -> None:
+        publish_llm_call(
+            LLMCallResult(
+                model=model,
+                started_at=started_at,
+                latency_ms=(perf_counter() - started_at) * 1000,
+                token_usage=_token_usage_from_response(response) if response is not None else None,
+                retry_count=retry_counts[-1] if retry_counts else 0,
+            )
+        )
 
     def text(self, system: str, user: str, temperature: float = DefaultTemperature) -> str:
-        response: ChatCompletion = _run_with_retries(
-            lambda: self._client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                temperature=temperature,
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        response: ChatCompletion = self._call(
+            self.text_model,
+            self._guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._client.chat.completions.create(
+                    model=self.text_model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _empty_str_if_none(response.choices[0].message.content)
 
     def structured(
@@ -208,36 +625,39 @@ class OpenAILLMClient:
         response_model: type[StructuredResult],
         temperature: float = DefaultTemperature,
     ) -> StructuredResult:
-        response: ChatCompletion = _run_with_retries(
-            lambda: self._client.beta.chat.completions.parse(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                response_format=response_model,
-                temperature=temperature,
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        response: ChatCompletion = self._call(
+            self.text_model,
+            self._guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._client.beta.chat.completions.parse(
+                    model=self.text_model,
+                    messages=messages,
+                    response_format=response_model,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _parsed_or_raise(response.choices[0].message.parsed)
 
     async def async_text(self, system: str, user: str, temperature: float = DefaultTemperature) -> str:
-        response = await _async_run_with_retries(
-            lambda: self._async_client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                temperature=temperature,
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        response = await self._async_call(
+            self.text_model,
+            self._async_guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._async_client.chat.completions.create(
+                    model=self.text_model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
+                "text",
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _empty_str_if_none(response.choices[0].message.content)
 
     async def async_structured(
@@ -247,33 +667,39 @@ class OpenAILLMClient:
         response_model: type[StructuredResult],
         temperature: float = DefaultTemperature,
     ) -> StructuredResult:
-        response = await _async_run_with_retries(
-            lambda: self._async_client.beta.chat.completions.parse(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                response_format=response_model,
-                temperature=temperature,
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        response = await self._async_call(
+            self.text_model,
+            self._async_guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._async_client.beta.chat.completions.parse(
+                    model=self.text_model,
+                    messages=messages,
+                    response_format=response_model,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
+                response_model.__name__,
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _parsed_or_raise(response.choices[0].message.parsed)
 
     async def async_messages(self, messages: list[dict[str, str]], temperature: float = DefaultTemperature) -> str:
-        response = await _async_run_with_retries(
-            lambda: self._async_client.chat.completions.create(
-                model=self.text_model,
-                messages=messages,
-                temperature=temperature,
+        response = await self._async_call(
+            self.text_model,
+            self._async_guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._async_client.chat.completions.create(
+                    model=self.text_model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
+                "text",
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _empty_str_if_none(response.choices[0].message.content)
 
     async def async_structured_messages(
@@ -282,33 +708,104 @@ class OpenAILLMClient:
         response_model: type[StructuredResult],
         temperature: float = DefaultTemperature,
     ) -> StructuredResult:
-        response = await _async_run_with_retries(
-            lambda: self._async_client.beta.chat.completions.parse(
-                model=self.text_model,
-                messages=messages,
-                response_format=response_model,
-                temperature=temperature,
+        response = await self._async_call(
+            self.text_model,
+            self._async_guarded(
+                self._text_guard,
+                estimate_request_tokens(messages),
+                lambda: self._async_client.beta.chat.completions.parse(
+                    model=self.text_model,
+                    messages=messages,
+                    response_format=response_model,
+                    temperature=temperature,
+                    timeout=self._request_timeout(),
+                ),
+                response_model.__name__,
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
-        self._record_response_metadata(response)
         return _parsed_or_raise(response.choices[0].message.parsed)
 
+    async def async_stream_structured_messages(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON text of a structured response as the model generates it.
+
+        Only opening the stream is retried; a failure after text has been
+        yielded cannot be replayed and is raised as ``LLMTransientError``.
+        """
+        guard = self._text_guard
+        manager = None
+        permit = None
+
+        async def open_stream() -> Any:
+            nonlocal manager, permit
+            self._admit(guard)
+            # The permit is held until the stream ends, since the call is in flight until then.
+            try:
+                permit = await guard.rate_limiter.async_acquire(
+                    estimate_request_tokens(messages), timeout=remaining_llm_budget()
+                )
+            except RateLimitTimeoutError as exc:
+                raise self._deadline_exceeded(guard) from exc
+            try:
+                manager = self._async_client.beta.chat.completions.stream(
+                    model=self.text_model,
+                    messages=messages,
+                    response_format=response_model,
+                    temperature=temperature,
+                    stream_options={"include_usage": True},
+                    timeout=self._request_timeout(),
+                )
+                return await manager.__aenter__()
+            except BaseException as exc:
+                permit.release(succeeded=False)
+                self._record_outcome(guard, exc)
+                raise
+
+        started_at = perf_counter()
+        retry_counts: list[int] = []
+        completion = None
+        # Published even when the stream never opens, so its retries still reach the trace.
+        try:
+            stream = await _async_run_with_retries(open_stream, self.retry_config, retry_counts.append)
+            completed = False
+            try:
+                async for event in stream:
+                    if event.type == "content.delta":
+                        yield event.delta
+                completion = await stream.get_final_completion()
+                permit.record_usage(_token_usage_from_response(completion))
+                completed = True
+                self._record_outcome(guard, None)
+            except BaseException as exc:
+                self._record_outcome(guard, exc)
+                if isinstance(exc, Exception) and _is_retryable_exception(exc):
+                    raise LLMTransientError("LLM stream failed before it completed.") from exc
+                raise
+            finally:
+                permit.release(succeeded=completed)
+                await manager.__aexit__(None, None, None)
+        finally:
+            self._publish(self.text_model, started_at, completion, retry_counts)
+
     async def generate_image_bytes(self, prompt: str, size: str) -> bytes:
         import base64
-        result = await _async_run_with_retries(
-            lambda: self._async_client.images.generate(
-                model=self.image_model,
-                prompt=prompt,
-                size=size,
-                n=1,
-                response_format="b64_json",
+        result = await self._async_call(
+            self.image_model,
+            self._async_guarded(
+                self._image_guard,
+                0,
+                lambda: self._async_client.images.generate(
+                    model=self.image_model,
+                    prompt=prompt,
+                    size=size,
+                    n=1,
+                    response_format="b64_json",
+                    timeout=self._request_timeout(),
+                ),
             ),
-            self.retry_config,
-            self._set_last_retry_count,
         )
         return base64.b64decode(result.data[0].b64_json)
-
-    def _set_last_retry_count(self, retry_count: int) -> None:
-        self.last_retry_count = retry_count
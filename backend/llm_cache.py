@@ -0,0 +1,386 @@
+"""Response cache for deterministic structured LLM calls.
+
+Structured calls made at temperature 0 with identical prompts (a repeated
+action assessment, a common character-generation input, a double-submitted
+turn) get the same answer every time, so ``CachedLLMClient`` answers repeats
+from a cache instead of the provider. Entries are keyed by model, messages,
+response schema and temperature and expire after a TTL. They live in an
+in-memory LRU and, optionally, in a SQLite file shared by workers and
+restarts. Concurrent identical calls share one provider request.
+
+Caching is enabled per stage; a stage is identified by the response model it
+parses (see ``LLM_CACHE_STAGES``). Free-text and image calls always go to the
+provider.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import cache
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from llm import DefaultTemperature, LLMCallResult, LLMClient, StructuredResult, publish_llm_call
+from llm_results import ActionAssessment, MomentPackage, NarrationResult, StartingStateResult, StorySummaryResult
+
+DEFAULT_LLM_CACHE_SIZE = 1024
+DEFAULT_LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+LLM_CACHE_STAGES: dict[str, type[BaseModel]] = {
+    "chargen": StartingStateResult,
+    "action_assessment": ActionAssessment,
+    "narration": NarrationResult,
+    "rolling_summary": StorySummaryResult,
+    "moment": MomentPackage,
+}
+# Only calls sampled at this temperature or below are deterministic enough to replay.
+MAX_CACHEABLE_TEMPERATURE = 0.0
+CACHE_HIT_TOKEN_USAGE = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+@cache
+def _schema_fingerprint(response_model: type[BaseModel]) -> str:
+    return json.dumps(response_model.model_json_schema(), sort_keys=True)
+
+
+def llm_cache_key(
+    model: str, messages: list[dict[str, str]], response_model: type[BaseModel], temperature: float
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "schema": _schema_fingerprint(response_model),
+            "temperature": temperature,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMResponseStore:
+    """On-disk tier: cached responses survive restarts and are shared by workers on one host."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).expanduser().resolve().parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    response_json TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> tuple[float, str] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires_at, response_json FROM llm_responses WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def put(self, key: str, expires_at: float, response_json: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, expires_at, response_json) VALUES (?, ?, ?)",
+                (key, expires_at, response_json),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class LLMResponseCache:
+    """Serialized responses by key: a bounded in-memory LRU in front of an optional ``SQLiteLLMResponseStore``."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_LLM_CACHE_SIZE,
+        ttl_seconds: float = DEFAULT_LLM_CACHE_TTL_SECONDS,
+        store: SQLiteLLMResponseStore | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive.")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def _remember(self, key: str, expires_at: float, response_json: str) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, response_json)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if self.store is None:
+            return None
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        self._remember(key, *stored)
+        return stored[1]
+
+    def put(self, key: str, response_json: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, response_json)
+        if self.store is not None:
+            self.store.put(key, expires_at, response_json)
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+
+
+class CachedLLMClient:
+    """``LLMClient`` that answers repeated deterministic structured calls of the enabled stages from a cache.
+
+    ``hits`` and ``misses`` count lookups per stage; a call that joins an
+    identical in-flight request counts as a hit. Hits publish an ``LLMCallResult``
+    with zero tokens; misses leave publishing to the wrapped client.
+    """
+
+    def __init__(self, client: LLMClient, cache: LLMResponseCache, stages: set[str]) -> None:
+        unknown = stages - set(LLM_CACHE_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown LLM cache stages: {', '.join(sorted(unknown))}")
+        self.client = client
+        self.cache = cache
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._stages = {LLM_CACHE_STAGES[stage]: stage for stage in stages}
+        self._in_flight: dict[str, asyncio.Future[str]] = {}
+
+    @property
+    def text_model(self) -> str | None:
+        return getattr(self.client, "text_model", None)
+
+    def rate_limit_stats(self) -> dict[str, dict[str, Any]]:
+        stats = getattr(self.client, "rate_limit_stats", None)
+        return stats() if stats is not None else {}
+
+    def circuit_states(self) -> dict[str, str]:
+        states = getattr(self.client, "circuit_states", None)
+        return states() if states is not None else {}
+
+    def _cached_stage(self, response_model: type[Any], temperature: float) -> str | None:
+        if temperature > MAX_CACHEABLE_TEMPERATURE:
+            return None
+        return self._stages.get(response_model)
+
+    def _key(self, messages: list[dict[str, str]], response_model: type[BaseModel], temperature: float) -> str:
+        return llm_cache_key(self.text_model or type(self.client).__name__, messages, response_model, temperature)
+
+    def _record_hit(self, stage: str, started_at: float) -> None:
+        self.hits[stage] += 1
+        publish_llm_call(
+            LLMCallResult(
+                model=self.text_model,
+                started_at=started_at,
+                latency_ms=(time.perf_counter() - started_at) * 1000,
+                token_usage=dict(CACHE_HIT_TOKEN_USAGE),
+                cached=True,
+            )
+        )
+
+    async def _cache_get(self, key: str) -> str | None:
+        # The on-disk tier is blocking I/O, so it is kept off the event loop.
+        if self.cache.store is None:
+            return self.cache.get(key)
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _cache_put(self, key: str, response_json: str) -> None:
+        if self.cache.store is None:
+            self.cache.put(key, response_json)
+        else:
+            await asyncio.to_thread(self.cache.put, key, response_json)
+
+    async def _cached_call(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[StructuredResult],
+        temperature: float,
+        call: Callable[[], Awaitable[StructuredResult]],
+    ) -> StructuredResult:
+        started_at = time.perf_counter()
+        stage = self._cached_stage(response_model, temperature)
+        if stage is None:
+            return await call()
+        assert issubclass(response_model, BaseModel)
+
+        key = self._key(messages, response_model, temperature)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            try:
+                response_json = await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+                # The caller that started the request was cancelled; make the call ourselves.
+                return await self._cached_call(messages, response_model, temperature, call)
+            self._record_hit(stage, started_at)
+            return response_model.model_validate_json(response_json)
+        response_json = await self._cache_get(key)
+        if response_json is not None:
+            self._record_hit(stage, started_at)
+            return response_model.model_validate_json(response_json)
+
+        self.misses[stage] += 1
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await call()
+            response_json = result.model_dump_json()
+            await self._cache_put(key, response_json)
+            future.set_result(response_json)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Nobody may be waiting; mark the exception as retrieved so it is not logged.
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def text(self, system: str, user: str, temperature: float = DefaultTemperature) -> str:
+        return self.client.text(system, user, temperature)
+
+    def structured(
+        self,
+        system: str,
+        user: str,
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> StructuredResult:
+        started_at = time.perf_counter()
+        stage = self._cached_stage(response_model, temperature)
+        if stage is None:
+            return self.client.structured(system, user, response_model, temperature)
+        assert issubclass(response_model, BaseModel)
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        key = self._key(messages, response_model, temperature)
+        response_json = self.cache.get(key)
+        if response_json is not None:
+            self._record_hit(stage, started_at)
+            return response_model.model_validate_json(response_json)
+        self.misses[stage] += 1
+        result = self.client.structured(system, user, response_model, temperature)
+        self.cache.put(key, result.model_dump_json())
+        return result
+
+    async def async_text(self, system: str, user: str, temperature: float = DefaultTemperature) -> str:
+        return await self.client.async_text(system, user, temperature)
+
+    async def async_structured(
+        self,
+        system: str,
+        user: str,
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> StructuredResult:
+        return await self._cached_call(
+            [{"role": "system", "content": system}, {"role": "user", "content": user}],
+            response_model,
+            temperature,
+            lambda: self.client.async_structured(system, user, response_model, temperature),
+        )
+
+    async def async_messages(self, messages: list[dict[str, str]], temperature: float = DefaultTemperature) -> str:
+        return await self.client.async_messages(messages, temperature)
+
+    async def async_structured_messages(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> StructuredResult:
+        return await self._cached_call(
+            messages,
+            response_model,
+            temperature,
+            lambda: self.client.async_structured_messages(messages, response_model, temperature),
+        )
+
+    async def async_stream_structured_messages(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[StructuredResult],
+        temperature: float = DefaultTemperature,
+    ) -> AsyncIterator[str]:
+        """Stream from the provider; a cached response is replayed as a single fragment."""
+        started_at = time.perf_counter()
+        stage = self._cached_stage(response_model, temperature)
+        if stage is not None:
+            assert issubclass(response_model, BaseModel)
+            key = self._key(messages, response_model, temperature)
+            response_json = await self._cache_get(key)
+            if response_json is not None:
+                self._record_hit(stage, started_at)
+                yield response_json
+                return
+            self.misses[stage] += 1
+        fragments: list[str] = []
+        async for fragment in self.client.async_stream_structured_messages(messages, response_model, temperature):
+            fragments.append(fragment)
+            yield fragment
+        if stage is not None:
+            try:
+                result = response_model.model_validate_json("".join(fragments))
+            except ValidationError:
+                # Malformed output is reported by the caller's own parse; never cache it.
+                return
+            await self._cache_put(key, result.model_dump_json())
+
+    async def generate_image_bytes(self, prompt: str, size: str) -> bytes:
+        return await self.client.generate_image_bytes(prompt, size)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {stage: {"hits": self.hits[stage], "misses": self.misses[stage]} for stage in self._stages.values()}
+
+
+def create_cached_llm_client(client: LLMClient) -> LLMClient:
+    """Wrap ``client`` when ``CYA_LLM_CACHE_STAGES`` names at least one stage to cache."""
+    stages = {stage.strip() for stage in os.getenv("CYA_LLM_CACHE_STAGES", "").split(",") if stage.strip()}
+    if not stages:
+        return client
+    cache_path = os.getenv("CYA_LLM_CACHE_PATH")
+    response_cache = LLMResponseCache(
+        max_entries=int(os.getenv("CYA_LLM_CACHE_SIZE", str(DEFAULT_LLM_CACHE_SIZE))),
+        ttl_seconds=float(os.getenv("CYA_LLM_CACHE_TTL_SECONDS", str(DEFAULT_LLM_CACHE_TTL_SECONDS))),
+        store=SQLiteLLMResponseStore(cache_path) if cache_path else None,
+    )
+    print(f"Caching LLM responses for stages: {', '.join(sorted(stages))}")
+    return CachedLLMClient(client, response_cache, stages)
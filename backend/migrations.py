@@ -0,0 +1,81 @@
+"""One-time upgrade of stored game documents to ``STATE_SCHEMA_VERSION``.
+
+Documents written by older releases (string inventory items,
+``active_quests``/``completed_quests`` lists, missing player attributes, ...)
+are still readable, but every load has to run them through the permissive
+``State.deserialize``. This runner rewrites them once so later loads take the
+strict ``State.from_primitive`` path. Batches are upgraded in worker processes
+while the next batch is read and finished batches are written.
+
+Games saved while the runner is going are skipped; the save already stored a
+current document. The runner is safe to rerun and to interrupt.
+
+Run it after deploying with ``python -m migrations``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import replace
+
+from classes import State
+from database import DEFAULT_MIGRATION_BATCH_SIZE, MigratableGameRepository, StoredStateDocument
+
+
+def upgrade_state_documents(documents: list[StoredStateDocument]) -> list[StoredStateDocument]:
+    return [replace(stored, document=State.deserialize(stored.document).to_primitive()) for stored in documents]
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted work immediately, for single-worker runs and small stores."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def migrate_state_documents(
+    repository: MigratableGameRepository,
+    batch_size: int = DEFAULT_MIGRATION_BATCH_SIZE,
+    workers: int | None = None,
+) -> int:
+    """Upgrade every legacy state document; returns how many were rewritten."""
+    workers = workers or os.cpu_count() or 1
+    migrated = 0
+    after: str | None = None
+    in_flight: deque[Future] = deque()
+    with _InlineExecutor() if workers == 1 else ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = repository.list_legacy_state_documents(after=after, limit=batch_size)
+            if batch:
+                after = batch[-1].game_id
+                in_flight.append(executor.submit(upgrade_state_documents, batch))
+            while in_flight and (len(in_flight) > workers or not batch):
+                migrated += repository.replace_state_documents(in_flight.popleft().result())
+            if not batch:
+                return migrated
+
+
+def main() -> None:
+    from database import create_game_repository
+
+    parser = argparse.ArgumentParser(description="Upgrade stored game documents to the current schema version.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MIGRATION_BATCH_SIZE, help="documents per batch")
+    parser.add_argument("--workers", type=int, default=None, help="upgrade processes (default: one per CPU)")
+    arguments = parser.parse_args()
+
+    repository = create_game_repository()
+    migrated = migrate_state_documents(repository, batch_size=arguments.batch_size, workers=arguments.workers)
+    print(f"Upgraded {migrated} game document(s).")
+    repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,7 @@ class StageTrace:
     prompt_version: str | None = None
     token_usage: dict[str, int] | None = None
     retry_count: int | None = None
+    llm_latency_ms: float | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
@@ -44,11 +45,21 @@ class TurnTrace:
     status: str
 
 
+@dataclass(frozen=True)
+class ProviderTrace:
+    model: str
+    event: str
+    circuit_state: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
 class TraceRecorder(Protocol):
     def record(self, trace: StageTrace) -> None: ...
 
     def record_turn(self, trace: TurnTrace) -> None: ...
 
+    def record_provider(self, trace: ProviderTrace) -> None: ...
+
 
 class NoOpTraceRecorder:
     def record(self, trace: StageTrace) -> None:
@@ -57,11 +68,15 @@ class NoOpTraceRecorder:
     def record_turn(self, trace: TurnTrace) -> None:
         return None
 
+    def record_provider(self, trace: ProviderTrace) -> None:
+        return None
+
 
 class InMemoryTraceRecorder:
     def __init__(self) -> None:
         self.traces: list[StageTrace] = []
         self.turn_traces: list[TurnTrace] = []
+        self.provider_traces: list[ProviderTrace] = []
 
     def record(self, trace: StageTrace) -> None:
         self.traces.append(trace)
@@ -69,6 +84,9 @@ class InMemoryTraceRecorder:
     def record_turn(self, trace: TurnTrace) -> None:
         self.turn_traces.append(trace)
 
+    def record_provider(self, trace: ProviderTrace) -> None:
+        self.provider_traces.append(trace)
+
 
 def safe_metadata(metadata: dict[str, Any] | None = None) -> dict[str, Any]:
     if metadata is None:
@@ -0,0 +1,309 @@
+"""Hash-partitioned SQLite storage.
+
+SQLite allows one writer per database file, so a single file caps how many
+saves per second a deployment can commit. ``PartitionedGameRepository``
+spreads games over ``N`` SQLite files, each with its own writer connection,
+and routes every game id to ``partition_of(game_id, N)``. Operations on one
+game touch only its partition; listings and id scans merge the partitions'
+already-sorted pages, so cursors and ordering are the same as with one file.
+
+The partition count is recorded in a manifest next to the database path
+(``cya-partitions.json`` for ``cya.db``). When ``CYA_SQLITE_PARTITIONS``
+changes, games have to move to their new partitions first; stop the server
+and run ``python -m partitioned --partitions N``. Resharding copies rows
+verbatim, switches the manifest and then deletes the old files, so an
+interrupted run can simply be repeated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import os
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import uuid4
+
+from archive import DEFAULT_ARCHIVE_BATCH_SIZE
+from classes import GameRecord, GameSummary, GameSummaryPage, State, StoryMoment, WorldState
+from database import (
+    DEFAULT_GAME_LISTING_LIMIT,
+    DEFAULT_MIGRATION_BATCH_SIZE,
+    DEFAULT_TRANSFER_BATCH_SIZE,
+    GameWrite,
+    SQLiteGameRepository,
+    StoredStateDocument,
+    page_of,
+    partition_of,
+)
+from images import Images
+
+Keyed = TypeVar("Keyed")
+
+
+def partition_manifest_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}-partitions.json")
+
+
+def partition_paths(path: str | Path, partitions: int) -> list[Path]:
+    """Database files for ``partitions`` partitions; one partition is the plain, unpartitioned file."""
+    path = Path(path)
+    if partitions == 1:
+        return [path]
+    return [path.with_name(f"{path.stem}-{index}-of-{partitions}{path.suffix}") for index in range(partitions)]
+
+
+def read_partition_count(path: str | Path) -> int:
+    manifest = partition_manifest_path(path)
+    if not manifest.exists():
+        return 1
+    return int(json.loads(manifest.read_text(encoding="utf-8"))["partitions"])
+
+
+def write_partition_count(path: str | Path, partitions: int) -> None:
+    manifest = partition_manifest_path(path)
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    pending = manifest.with_name(f"{manifest.name}.tmp")
+    with pending.open("w", encoding="utf-8") as file:
+        json.dump({"partitions": partitions}, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(pending, manifest)
+
+
+def _summary_order(summary: GameSummary) -> tuple[bool, datetime, str]:
+    """Sort key matching SQLite's ``ORDER BY updated_at DESC, id DESC`` when sorted in reverse."""
+    return summary.updated_at is not None, summary.updated_at or datetime.min, summary.id
+
+
+class PartitionedGameRepository:
+    """Games spread over several ``SQLiteGameRepository`` files by a stable hash of their id."""
+
+    def __init__(self, partitions: list[SQLiteGameRepository]) -> None:
+        if not partitions:
+            raise ValueError("At least one partition is required.")
+        self.partitions = partitions
+        self._writers = ThreadPoolExecutor(max_workers=len(partitions), thread_name_prefix="cya-db-partition")
+
+    def partition(self, game_id: str) -> SQLiteGameRepository:
+        return self.partitions[partition_of(game_id, len(self.partitions))]
+
+    def _group(self, items: Iterable[Keyed], game_id: Callable[[Keyed], str]) -> dict[int, list[Keyed]]:
+        groups: dict[int, list[Keyed]] = defaultdict(list)
+        for item in items:
+            groups[partition_of(game_id(item), len(self.partitions))].append(item)
+        return groups
+
+    def _in_parallel(
+        self, operation: Callable[[SQLiteGameRepository, list[Keyed]], Any], groups: dict[int, list[Keyed]]
+    ) -> list[Any]:
+        """Run ``operation`` for each partition's group on that partition, concurrently when there are several."""
+        if len(groups) <= 1:
+            return [operation(self.partitions[index], items) for index, items in groups.items()]
+        futures = [self._writers.submit(operation, self.partitions[index], items) for index, items in groups.items()]
+        return [future.result() for future in futures]
+
+    def save_game(self, state: State) -> None:
+        self._save_state(state)
+
+    def save_game_and_images(self, state: State, images: Images) -> None:
+        self._save_state(state, images)
+
+    def _save_state(self, state: State, images: Images | None = None) -> None:
+        if state._id is None:
+            # The id decides the partition, so it is assigned before the game is stored.
+            state._id = str(uuid4())
+            self.partition(state._id).insert_game(state, images)
+        elif images is None:
+            self.partition(state._id).save_game(state)
+        else:
+            self.partition(state._id).save_game_and_images(state, images)
+
+    def save_games(self, writes: list[GameWrite]) -> list[GameWrite]:
+        """Commit each partition's share of ``writes`` in its own transaction, partitions in parallel."""
+        results = self._in_parallel(
+            SQLiteGameRepository.save_games, self._group(writes, lambda write: write.state._id or "")
+        )
+        return [conflict for conflicts in results for conflict in conflicts]
+
+    def delete_game(self, game_id: str) -> bool:
+        return self.partition(game_id).delete_game(game_id)
+
+    def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        return self.partition(game_id).get_image_bytes(game_id)
+
+    def all_games(self) -> list[State]:
+        return [state for partition in self.partitions for state in partition.all_games()]
+
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        # The first limit + 1 summaries overall are among each partition's first limit + 1.
+        pages = [partition.list_game_summaries(limit=limit + 1, cursor=cursor) for partition in self.partitions]
+        merged = heapq.merge(*(page.summaries for page in pages), key=_summary_order, reverse=True)
+        return page_of(list(islice(merged, limit + 1)), limit)
+
+    def get_game(self, game_id: str) -> State | None:
+        return self.partition(game_id).get_game(game_id)
+
+    def get_revision(self, game_id: str) -> int | None:
+        return self.partition(game_id).get_revision(game_id)
+
+    def get_world_state_at(self, game_id: str, revision: int) -> WorldState | None:
+        return self.partition(game_id).get_world_state_at(game_id, revision)
+
+    def list_game_ids(self, after: str | None = None, limit: int = DEFAULT_TRANSFER_BATCH_SIZE) -> list[str]:
+        merged = heapq.merge(*(partition.list_game_ids(after=after, limit=limit) for partition in self.partitions))
+        return list(islice(merged, limit))
+
+    def export_game(self, game_id: str) -> GameRecord | None:
+        return self.partition(game_id).export_game(game_id)
+
+    def import_game(self, record: GameRecord) -> None:
+        self.import_games([record])
+
+    def import_games(self, records: list[GameRecord]) -> None:
+        self._in_parallel(
+            SQLiteGameRepository.import_games, self._group(records, lambda record: record.state._id or "")
+        )
+
+    def list_legacy_state_documents(
+        self, after: str | None = None, limit: int = DEFAULT_MIGRATION_BATCH_SIZE
+    ) -> list[StoredStateDocument]:
+        merged = heapq.merge(
+            *(partition.list_legacy_state_documents(after=after, limit=limit) for partition in self.partitions),
+            key=lambda stored: stored.game_id,
+        )
+        return list(islice(merged, limit))
+
+    def replace_state_documents(self, documents: list[StoredStateDocument]) -> int:
+        return sum(
+            self._in_parallel(
+                SQLiteGameRepository.replace_state_documents, self._group(documents, lambda stored: stored.game_id)
+            )
+        )
+
+    def archive_games(self, idle_before: datetime | None = None, limit: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> int:
+        archived = 0
+        for partition in self.partitions:
+            if archived >= limit:
+                break
+            archived += partition.archive_games(idle_before=idle_before, limit=limit - archived)
+        return archived
+
+    def restore_game(self, game_id: str) -> bool:
+        return self.partition(game_id).restore_game(game_id)
+
+    def compact(self) -> None:
+        for partition in self.partitions:
+            partition.compact()
+
+    def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        return self.partition(game_id).add_moment(game_id, caption, image_bytes)
+
+    def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        return self.partition(game_id).list_moments(game_id)
+
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return self.partition(game_id).list_moment_summaries(game_id)
+
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        return self.partition(game_id).get_moment_image(game_id, moment_id)
+
+    def close(self) -> None:
+        self._writers.shutdown(wait=True)
+        for partition in self.partitions:
+            partition.close()
+
+
+def open_sqlite_game_repository(
+    path: str | Path, partitions: int = 1, **options: Any
+) -> SQLiteGameRepository | PartitionedGameRepository:
+    """Open the SQLite store at ``path`` split into ``partitions`` files.
+
+    ``options`` are passed to every partition's ``SQLiteGameRepository``. A new
+    store is created with the requested partition count; an existing store
+    stored with a different count has to be resharded first.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1.")
+    stored_partitions = read_partition_count(path)
+    if stored_partitions != partitions:
+        if partition_manifest_path(path).exists() or Path(path).exists():
+            raise RuntimeError(
+                f"{path} is stored in {stored_partitions} partition(s), not {partitions}; "
+                f"run `python -m partitioned --partitions {partitions}` to reshard it first."
+            )
+        write_partition_count(path, partitions)
+    if partitions == 1:
+        return SQLiteGameRepository(path, **options)
+    return PartitionedGameRepository(
+        [SQLiteGameRepository(partition_path, **options) for partition_path in partition_paths(path, partitions)]
+    )
+
+
+def reshard(path: str | Path, partitions: int, batch_size: int = DEFAULT_TRANSFER_BATCH_SIZE) -> int:
+    """Move every game stored at ``path`` into ``partitions`` partitions; returns how many games moved.
+
+    Rows are copied verbatim (archived stubs included; the archive file is
+    shared by all partitions and does not move). The manifest only switches
+    once every game is copied, and the old files are deleted after that, so
+    rerunning an interrupted reshard starts it over safely. The store must
+    not be in use while it is resharded.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1.")
+    current = read_partition_count(path)
+    if current == partitions:
+        return 0
+    old_paths = partition_paths(path, current)
+    sources = [SQLiteGameRepository(old_path) for old_path in old_paths if old_path.exists()]
+    moved = 0
+    try:
+        targets = [SQLiteGameRepository(new_path) for new_path in partition_paths(path, partitions)]
+        try:
+            for source in sources:
+                after: str | None = None
+                while game_ids := source.list_game_ids(after=after, limit=batch_size):
+                    after = game_ids[-1]
+                    groups: dict[int, list[str]] = defaultdict(list)
+                    for game_id in game_ids:
+                        groups[partition_of(game_id, partitions)].append(game_id)
+                    for index, group in groups.items():
+                        source.copy_games_to(targets[index], group)
+                    moved += len(game_ids)
+        finally:
+            for target in targets:
+                target.close()
+    finally:
+        for source in sources:
+            source.close()
+    write_partition_count(path, partitions)
+    for old_path in old_paths:
+        for suffix in ("", "-wal", "-shm"):
+            old_path.with_name(f"{old_path.name}{suffix}").unlink(missing_ok=True)
+    return moved
+
+
+def main() -> None:
+    from database import sqlite_path_from_env
+
+    parser = argparse.ArgumentParser(description="Move SQLite games into a different number of partition files.")
+    parser.add_argument("--partitions", type=int, required=True, help="new partition count (1 for a single file)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_TRANSFER_BATCH_SIZE, help="games per copy")
+    arguments = parser.parse_args()
+
+    path = sqlite_path_from_env()
+    moved = reshard(path, arguments.partitions, batch_size=arguments.batch_size)
+    print(f"Moved {moved} game(s) into {arguments.partitions} partition(s) at {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Client-side rate limiting for LLM provider calls.
+
+Each ``LLMRateLimiter`` guards one budget, such as the text model or the image
+model. A call first reserves one request and its estimated tokens from
+per-minute buckets, sleeping until the budget allows it, and then waits for a
+concurrency slot. The concurrency limit adapts: it grows slowly while calls
+succeed and halves when the provider answers 429. The buckets follow the
+provider's ``x-ratelimit-*`` response headers, so calls slow down before the
+provider starts rejecting them instead of after.
+
+Both ways of acquiring a permit take an optional ``timeout``; a call that
+would have to wait longer than that is refused with ``RateLimitTimeoutError``
+and its reservation is refunded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from types import TracebackType
+from typing import Any
+
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+CHARACTERS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKEN_ESTIMATE = 512
+DEFAULT_MAX_CONCURRENCY = {"text": 32, "image": 8}
+CONCURRENCY_DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+def estimate_request_tokens(
+    messages: list[dict[str, str]], completion_tokens: int = DEFAULT_COMPLETION_TOKEN_ESTIMATE
+) -> int:
+    """Rough token cost of a chat request, used until the provider reports the real usage."""
+    characters = sum(len(message.get("content") or "") for message in messages)
+    return characters // CHARACTERS_PER_TOKEN + completion_tokens
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> float | None:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RateLimitTimeoutError(TimeoutError):
+    """Raised when a call would have to wait longer than its timeout for the budget or a slot."""
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class TokenBucket:
+    """A per-minute budget that refills continuously; reservations may run it into debt."""
+
+    def __init__(self, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = capacity
+        self._clock = clock
+        self._available = capacity
+        self._updated_at = clock()
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / RATE_LIMIT_WINDOW_SECONDS
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._available
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._available = min(self.capacity, self._available + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return how many seconds the caller must wait before spending it."""
+        self._refill()
+        self._available -= amount
+        if self._available >= 0:
+            return 0.0
+        return -self._available / self.refill_per_second
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or, when negative, refund) ``amount`` after the real cost of a call is known."""
+        self._refill()
+        self._available = min(self.capacity, self._available - amount)
+
+    def resize(self, capacity: float) -> None:
+        self._refill()
+        self.capacity = capacity
+        self._available = min(self._available, capacity)
+
+    def cap_available(self, remaining: float) -> None:
+        """Never assume more budget than the provider says is left."""
+        self._refill()
+        self._available = min(self._available, remaining)
+
+
+class RateLimitPermit:
+    """A granted call; release it (or leave its ``with`` block) when the call finishes."""
+
+    def __init__(self, limiter: LLMRateLimiter, estimated_tokens: int) -> None:
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.total_tokens: int | None = None
+        self._released = False
+
+    def record_usage(self, token_usage: dict[str, int] | None) -> None:
+        if token_usage is not None:
+            self.total_tokens = token_usage.get("total_tokens")
+
+    def release(self, succeeded: bool = True) -> None:
+        if self._released:
+            return
+        self._released = True
+        self.limiter._release(self, succeeded)
+
+    def __enter__(self) -> RateLimitPermit:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.release(succeeded=exc is None)
+
+
+class LLMRateLimiter:
+    """Request, token and concurrency budgets for one model, shared by threads and the event loop."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_concurrency: int | None = None,
+        min_concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._configured_limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._buckets: dict[str, TokenBucket | None] = {
+            kind: TokenBucket(limit, clock) if limit else None for kind, limit in self._configured_limits.items()
+        }
+        # None means "no cap yet": the first 429 sets the limit from the calls in flight at the time.
+        self._concurrency_limit: float | None = float(max_concurrency) if max_concurrency else None
+        self._in_flight = 0
+        self._waiters: deque[Callable[[], None]] = deque()
+        self._decreased_at = -math.inf
+        self._queue_depth = 0
+        self.calls = 0
+        self.delayed_calls = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.rate_limited_responses = 0
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        delay = 0.0
+        requests = self._buckets["requests"]
+        if requests is not None:
+            delay = max(delay, requests.reserve(1))
+        tokens = self._buckets["tokens"]
+        if tokens is not None and estimated_tokens > 0:
+            delay = max(delay, tokens.reserve(estimated_tokens))
+        return delay
+
+    def _refund(self, estimated_tokens: int) -> None:
+        requests = self._buckets["requests"]
+        if requests is not None:
+            requests.adjust(-1)
+        tokens = self._buckets["tokens"]
+        if tokens is not None and estimated_tokens > 0:
+            tokens.adjust(-estimated_tokens)
+
+    def _time_out(self, estimated_tokens: int) -> RateLimitTimeoutError:
+        with self._lock:
+            self._refund(estimated_tokens)
+        return RateLimitTimeoutError(f"{self.name} rate limit wait would exceed the caller's timeout.")
+
+    def _has_free_slot(self) -> bool:
+        if self._concurrency_limit is None:
+            return True
+        return self._in_flight < max(self.min_concurrency, int(self._concurrency_limit))
+
+    def _enter_or_queue(self, wake: Callable[[], None]) -> bool:
+        if not self._waiters and self._has_free_slot():
+            self._in_flight += 1
+            return True
+        self._waiters.append(wake)
+        return False
+
+    def _wake_waiters(self) -> None:
+        # The slot is handed to the woken waiter here, so a newcomer cannot take it first.
+        while self._waiters and self._has_free_slot():
+            self._in_flight += 1
+            self._waiters.popleft()()
+
+    def _start_waiting(self, estimated_tokens: int) -> float:
+        with self._lock:
+            self._queue_depth += 1
+            return self._reserve(estimated_tokens)
+
+    def _granted(self, started_at: float, estimated_tokens: int, delayed: bool) -> RateLimitPermit:
+        waited = max(0.0, self._clock() - started_at)
+        with self._lock:
+            self._queue_depth -= 1
+            self.calls += 1
+            if delayed:
+                self.delayed_calls += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return RateLimitPermit(self, estimated_tokens)
+
+    def _abandon(self) -> None:
+        with self._lock:
+            self._queue_depth -= 1
+
+    def acquire(self, estimated_tokens: int = 0, timeout: float | None = None) -> RateLimitPermit:
+        """Block the calling thread until a call fits the budget, or for at most ``timeout`` seconds."""
+        started_at = self._clock()
+        delay = self._start_waiting(estimated_tokens)
+        try:
+            if timeout is not None and delay >= timeout:
+                raise self._time_out(estimated_tokens)
+            if delay > 0:
+                time.sleep(delay)
+            slot_granted = threading.Event()
+            with self._lock:
+                entered = self._enter_or_queue(slot_granted.set)
+            if not entered and not slot_granted.wait(None if timeout is None else timeout - delay):
+                with self._lock:
+                    # Unless the slot was handed over just as the wait ran out.
+                    timed_out = slot_granted.set in self._waiters
+                    if timed_out:
+                        self._waiters.remove(slot_granted.set)
+                if timed_out:
+                    raise self._time_out(estimated_tokens)
+        except BaseException:
+            self._abandon()
+            raise
+        return self._granted(started_at, estimated_tokens, delayed=delay > 0 or not entered)
+
+    async def async_acquire(self, estimated_tokens: int = 0, timeout: float | None = None) -> RateLimitPermit:
+        """Wait, without blocking the event loop, until a call fits the budget, or for at most ``timeout`` seconds."""
+        started_at = self._clock()
+        delay = self._start_waiting(estimated_tokens)
+        try:
+            if timeout is not None and delay >= timeout:
+                raise self._time_out(estimated_tokens)
+            if delay > 0:
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    # The call will never be made, so its reservation goes back to the buckets.
+                    with self._lock:
+                        self._refund(estimated_tokens)
+                    raise
+            loop = asyncio.get_running_loop()
+            slot_granted: asyncio.Future[None] = loop.create_future()
+
+            def wake() -> None:
+                loop.call_soon_threadsafe(_resolve, slot_granted)
+
+            with self._lock:
+                entered = self._enter_or_queue(wake)
+            if not entered:
+                try:
+                    await asyncio.wait_for(slot_granted, None if timeout is None else timeout - delay)
+                except (asyncio.CancelledError, TimeoutError) as exc:
+                    with self._lock:
+                        if wake in self._waiters:
+                            self._waiters.remove(wake)
+                        else:
+                            # The slot was handed over just as the wait ended; pass it on.
+                            self._in_flight -= 1
+                            self._wake_waiters()
+                    if isinstance(exc, TimeoutError):
+                        raise self._time_out(estimated_tokens) from None
+                    with self._lock:
+                        self._refund(estimated_tokens)
+                    raise
+        except BaseException:
+            self._abandon()
+            raise
+        return self._granted(started_at, estimated_tokens, delayed=delay > 0 or not entered)
+
+    def _release(self, permit: RateLimitPermit, succeeded: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            tokens = self._buckets["tokens"]
+            if tokens is not None and permit.total_tokens is not None:
+                tokens.adjust(permit.total_tokens - permit.estimated_tokens)
+            if succeeded and self._concurrency_limit is not None:
+                grown = self._concurrency_limit + 1 / self._concurrency_limit
+                self._concurrency_limit = min(grown, self.max_concurrency) if self.max_concurrency else grown
+            self._wake_waiters()
+
+    def observe_response(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt to a provider response: back off on 429 and follow ``x-ratelimit-*`` headers."""
+        with self._lock:
+            if status_code == 429:
+                self.rate_limited_responses += 1
+                self._decrease_concurrency()
+            for kind in ("requests", "tokens"):
+                self._follow_headers(kind, headers)
+
+    def _decrease_concurrency(self) -> None:
+        now = self._clock()
+        # A burst of 429s from calls that were already in flight is one signal, not many.
+        if now - self._decreased_at < CONCURRENCY_DECREASE_COOLDOWN_SECONDS:
+            return
+        self._decreased_at = now
+        current = self._concurrency_limit if self._concurrency_limit is not None else float(self._in_flight)
+        self._concurrency_limit = max(float(self.min_concurrency), current / 2)
+
+    def _follow_headers(self, kind: str, headers: Mapping[str, str]) -> None:
+        limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+        remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+        bucket = self._buckets[kind]
+        if limit is not None and limit > 0:
+            configured = self._configured_limits[kind]
+            capacity = min(limit, configured) if configured else limit
+            if bucket is None:
+                bucket = self._buckets[kind] = TokenBucket(capacity, self._clock)
+            elif bucket.capacity != capacity:
+                bucket.resize(capacity)
+        if bucket is not None and remaining is not None:
+            bucket.cap_available(remaining)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            requests = self._buckets["requests"]
+            tokens = self._buckets["tokens"]
+            return {
+                "queue_depth": self._queue_depth,
+                "in_flight": self._in_flight,
+                "concurrency_limit": int(self._concurrency_limit) if self._concurrency_limit is not None else None,
+                "requests_per_minute": requests.capacity if requests is not None else None,
+                "tokens_per_minute": tokens.capacity if tokens is not None else None,
+                "calls": self.calls,
+                "delayed_calls": self.delayed_calls,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "rate_limited_responses": self.rate_limited_responses,
+            }
+
+
+def create_llm_rate_limiter(name: str) -> LLMRateLimiter:
+    """Build the limiter for one budget (``text`` or ``image``) from ``CYA_LLM_<NAME>_*`` settings."""
+    prefix = f"CYA_LLM_{name.upper()}_"
+
+    def optional_int(setting: str) -> int | None:
+        value = os.getenv(prefix + setting)
+        return int(value) if value else None
+
+    max_concurrency = os.getenv(prefix + "MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY.get(name, 0)))
+    return LLMRateLimiter(
+        name,
+        requests_per_minute=optional_int("REQUESTS_PER_MINUTE"),
+        tokens_per_minute=optional_int("TOKENS_PER_MINUTE"),
+        max_concurrency=int(max_concurrency) or None,
+    )
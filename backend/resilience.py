@@ -0,0 +1,236 @@
+"""Fail-fast and tail-latency protection for LLM provider calls.
+
+``CircuitBreaker`` stops calling a model after repeated provider failures, so
+turns fail in milliseconds during an incident instead of each waiting through
+every timeout and retry. After a recovery period it lets a few probe calls
+through (half-open) and closes again once one succeeds.
+
+``RequestHedger`` sends a duplicate of a slow call once it has taken longer than
+the recent p95 latency of calls of the same stage and uses whichever copy
+answers first, which cuts the tail caused by a single stuck request at the cost
+of some duplicate tokens.
+
+Both report what they do to the trace recorder as ``ProviderTrace`` events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from observability import NoOpTraceRecorder, ProviderTrace, TraceRecorder
+from utils import bool_of_str
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RECOVERY_SECONDS = 30.0
+DEFAULT_CIRCUIT_HALF_OPEN_PROBES = 1
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_HEDGE_WINDOW = 200
+
+HedgedResult = TypeVar("HedgedResult")
+
+
+class CircuitBreaker:
+    """Per-model circuit: closed until ``failure_threshold`` consecutive failures, then open for a while."""
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds: float = DEFAULT_CIRCUIT_RECOVERY_SECONDS,
+        half_open_probes: int = DEFAULT_CIRCUIT_HALF_OPEN_PROBES,
+        trace_recorder: TraceRecorder | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_probes = half_open_probes
+        self.trace_recorder = trace_recorder or NoOpTraceRecorder()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._half_open_if_recovered()
+            return self._state
+
+    def _transition(self, state: str, **metadata: object) -> None:
+        self._state = state
+        self.trace_recorder.record_provider(
+            ProviderTrace(model=self.model, event=f"circuit_{state}", circuit_state=state, metadata=metadata)
+        )
+
+    def _half_open_if_recovered(self) -> None:
+        if self._state == CIRCUIT_OPEN and self._clock() - self._opened_at >= self.recovery_seconds:
+            self._probes_in_flight = 0
+            self._transition(CIRCUIT_HALF_OPEN)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the provider now; a half-open circuit admits a limited number of probes."""
+        with self._lock:
+            self._half_open_if_recovered()
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            if self._state == CIRCUIT_HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state == CIRCUIT_HALF_OPEN:
+                self._probes_in_flight = 0
+                self._transition(CIRCUIT_CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == CIRCUIT_HALF_OPEN:
+                self._open(reason="probe_failed")
+                return
+            self._consecutive_failures += 1
+            if self._state == CIRCUIT_CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open(reason="failure_threshold", failures=self._consecutive_failures)
+
+    def record_cancelled(self) -> None:
+        """A call was abandoned without an answer, so it says nothing about the provider's health."""
+        with self._lock:
+            if self._state == CIRCUIT_HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def _open(self, **metadata: object) -> None:
+        self._opened_at = self._clock()
+        self._probes_in_flight = 0
+        self._transition(CIRCUIT_OPEN, **metadata)
+
+
+class RequestHedger:
+    """Races a second copy of a call once the first has run past its stage's recent latency percentile.
+
+    Latencies are kept in a separate window per ``stage``, so short calls are
+    not hedged against the p95 of long ones and long calls are not hedged
+    after every short one.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+        window: int = DEFAULT_HEDGE_WINDOW,
+        trace_recorder: TraceRecorder | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.model = model
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.trace_recorder = trace_recorder or NoOpTraceRecorder()
+        self.circuit_breaker = circuit_breaker
+        self.window = window
+        self._latencies: dict[str, deque[float]] = {}
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+
+    def record_latency(self, seconds: float, stage: str = "") -> None:
+        self._latencies.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, stage: str = "") -> float | None:
+        """Seconds to wait before hedging a ``stage`` call, or None until enough of its latencies have been seen."""
+        latencies = self._latencies.get(stage, ())
+        if len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    async def _timed(self, operation: Callable[[], Awaitable[HedgedResult]], stage: str) -> HedgedResult:
+        started_at = time.perf_counter()
+        result = await operation()
+        self.record_latency(time.perf_counter() - started_at, stage)
+        return result
+
+    async def run(self, operation: Callable[[], Awaitable[HedgedResult]], stage: str = "") -> HedgedResult:
+        """Run ``operation``, starting a duplicate if it is still running after ``hedge_delay(stage)``."""
+        delay = self.hedge_delay(stage)
+        primary = asyncio.create_task(self._timed(operation, stage))
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                circuit_closed = self.circuit_breaker is None or self.circuit_breaker.state == CIRCUIT_CLOSED
+                if not done and circuit_closed:
+                    self.hedged_calls += 1
+                    tasks.add(asyncio.create_task(self._timed(operation, stage)))
+            last_exception: BaseException | None = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            self._record_hedge(stage, delay, "primary" if task is primary else "hedge")
+                        return task.result()
+                    last_exception = task.exception()
+            if len(tasks) > 1:
+                self._record_hedge(stage, delay, None)
+            assert last_exception is not None
+            raise last_exception
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _record_hedge(self, stage: str, delay: float | None, winner: str | None) -> None:
+        if winner == "hedge":
+            self.hedge_wins += 1
+        state = self.circuit_breaker.state if self.circuit_breaker is not None else CIRCUIT_CLOSED
+        self.trace_recorder.record_provider(
+            ProviderTrace(
+                model=self.model,
+                event="hedged",
+                circuit_state=state,
+                metadata={"stage": stage, "delay_ms": (delay or 0) * 1000, "winner": winner},
+            )
+        )
+
+
+def create_circuit_breaker(model: str, trace_recorder: TraceRecorder | None = None) -> CircuitBreaker:
+    return CircuitBreaker(
+        model,
+        failure_threshold=int(os.getenv("CYA_LLM_CIRCUIT_FAILURE_THRESHOLD", str(DEFAULT_CIRCUIT_FAILURE_THRESHOLD))),
+        recovery_seconds=float(os.getenv("CYA_LLM_CIRCUIT_RECOVERY_SECONDS", str(DEFAULT_CIRCUIT_RECOVERY_SECONDS))),
+        half_open_probes=int(os.getenv("CYA_LLM_CIRCUIT_HALF_OPEN_PROBES", str(DEFAULT_CIRCUIT_HALF_OPEN_PROBES))),
+        trace_recorder=trace_recorder,
+    )
+
+
+def create_request_hedger(
+    model: str, circuit_breaker: CircuitBreaker | None = None, trace_recorder: TraceRecorder | None = None
+) -> RequestHedger | None:
+    """Build a hedger for ``model`` when ``CYA_LLM_HEDGING`` is enabled."""
+    if not bool_of_str(os.getenv("CYA_LLM_HEDGING", "false")):
+        return None
+    return RequestHedger(
+        model,
+        percentile=float(os.getenv("CYA_LLM_HEDGE_PERCENTILE", str(DEFAULT_HEDGE_PERCENTILE))),
+        min_samples=int(os.getenv("CYA_LLM_HEDGE_MIN_SAMPLES", str(DEFAULT_HEDGE_MIN_SAMPLES))),
+        trace_recorder=trace_recorder,
+        circuit_breaker=circuit_breaker,
+    )
@@ -0,0 +1,137 @@
+"""Pluggable compression for stored game documents.
+
+Compressed payloads are bytes that start with a one-byte header naming the
+codec that wrote them, so rows written with different codecs can be read side
+by side. Uncompressed documents stay plain JSON text, which is also how every
+row written before codecs existed is stored.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, Protocol
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only where zstandard is absent
+    zstandard = None
+
+ZLIB_HEADER = 0x01
+ZSTD_HEADER = 0x02
+ZSTD_DICTIONARY_HEADER = 0x03
+DEFAULT_ZLIB_LEVEL = 6
+DEFAULT_ZSTD_LEVEL = 3
+DEFAULT_ZSTD_DICTIONARY_BYTES = 32 * 1024
+MIN_COMPRESSED_PAYLOAD_BYTES = 128
+
+
+class StateCodecError(RuntimeError):
+    """Raised when a stored payload cannot be decoded with the configured codecs."""
+
+
+class StateCodec(Protocol):
+    header: int
+
+    def compress(self, payload: bytes) -> bytes: ...
+
+    def decompress(self, payload: bytes) -> bytes: ...
+
+
+class ZlibCodec:
+    header = ZLIB_HEADER
+
+    def __init__(self, level: int = DEFAULT_ZLIB_LEVEL) -> None:
+        self.level = level
+
+    def compress(self, payload: bytes) -> bytes:
+        return zlib.compress(payload, self.level)
+
+    def decompress(self, payload: bytes) -> bytes:
+        return zlib.decompress(payload)
+
+
+class ZstdCodec:
+    """Zstandard compression, optionally primed with a dictionary trained on stored documents.
+
+    Requires the optional ``zstandard`` package.
+    """
+
+    def __init__(self, level: int = DEFAULT_ZSTD_LEVEL, dictionary: bytes | None = None) -> None:
+        if zstandard is None:
+            raise RuntimeError("The zstd state codec requires the 'zstandard' package.")
+        self.level = level
+        self.header = ZSTD_HEADER if dictionary is None else ZSTD_DICTIONARY_HEADER
+        dictionary_data = None if dictionary is None else zstandard.ZstdCompressionDict(dictionary)
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary_data)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary_data)
+
+    def compress(self, payload: bytes) -> bytes:
+        return self._compressor.compress(payload)
+
+    def decompress(self, payload: bytes) -> bytes:
+        return self._decompressor.decompress(payload)
+
+
+def train_zstd_dictionary(samples: Iterable[bytes], size: int = DEFAULT_ZSTD_DICTIONARY_BYTES) -> bytes:
+    """Train a dictionary from encoded documents, e.g. a sample of chat messages."""
+    if zstandard is None:
+        raise RuntimeError("Training a zstd dictionary requires the 'zstandard' package.")
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to JSON")
+
+
+def encode_document(document: Any, codec: StateCodec | None = None) -> str | bytes:
+    """Encode a JSON-compatible document, compressing it when it is large enough to benefit."""
+    text = json.dumps(document, default=_json_default)
+    if codec is None:
+        return text
+    payload = text.encode("utf-8")
+    if len(payload) < MIN_COMPRESSED_PAYLOAD_BYTES:
+        return text
+    return bytes([codec.header]) + codec.compress(payload)
+
+
+def decode_document(raw: str | bytes, codecs: Mapping[int, StateCodec]) -> Any:
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if not raw:
+        raise StateCodecError("Stored document is empty.")
+    codec = codecs.get(raw[0])
+    if codec is None:
+        raise StateCodecError(f"No state codec is configured for header byte {raw[0]:#04x}.")
+    return json.loads(codec.decompress(raw[1:]))
+
+
+def decoders_for(codec: StateCodec | None) -> dict[int, StateCodec]:
+    """Codecs able to read rows written by ``codec`` and by any header-free codec."""
+    decoders: dict[int, StateCodec] = {ZLIB_HEADER: ZlibCodec()}
+    if zstandard is not None:
+        decoders[ZSTD_HEADER] = ZstdCodec()
+    if codec is not None:
+        decoders[codec.header] = codec
+    return decoders
+
+
+def create_state_codec() -> StateCodec | None:
+    name = os.getenv("CYA_STATE_CODEC", "zlib").strip().lower()
+    if name == "json":
+        return None
+    if name == "zlib":
+        return ZlibCodec()
+    if name == "zstd":
+        dictionary_path = os.getenv("CYA_ZSTD_DICTIONARY_PATH")
+        dictionary = None
+        if dictionary_path:
+            with open(dictionary_path, "rb") as dictionary_file:
+                dictionary = dictionary_file.read()
+        return ZstdCodec(dictionary=dictionary)
+    raise RuntimeError("CYA_STATE_CODEC must be one of 'json', 'zlib' or 'zstd'")
@@ -0,0 +1,320 @@
+"""In-memory stand-ins for the parts of PyMongo the Mongo repositories use.
+
+``FakeCollection`` keeps documents in a list and evaluates the query
+operators the repositories send; ``AsyncFakeDatabase`` exposes the same
+collections with the coroutine methods of ``AsyncCollection``.
+``use_fake_mongo`` points ``MongoGameRepository`` at a ``FakeDatabase``, and
+``use_fake_async_gridfs`` lets ``AsyncMongoGameRepository`` store files in
+one, so both repositories run against the same stand-in.
+"""
+
+import copy
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from gridfs import DEFAULT_CHUNK_SIZE as GRIDFS_CHUNK_SIZE_BYTES
+
+import async_mongo
+import database as database_module
+from database import MONGO_CHUNK_SORT
+
+# MongoDB compares values of different types by type first, in this order.
+_BSON_TYPE_ORDER = (type(None), (int, float), str, ObjectId, datetime)
+
+
+def _matches_condition(value, condition):
+    if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$type" and not isinstance(value, {"date": datetime, "objectId": ObjectId}[operand]):
+                return False
+            if operator in ("$gt", "$lt"):
+                # MongoDB only compares values of the same BSON type.
+                if value is None or type(value) is not type(operand):
+                    return False
+                if (operator == "$gt" and not value > operand) or (operator == "$lt" and not value < operand):
+                    return False
+        return True
+    return value == condition
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+        elif not _matches_condition(document.get(key), condition):
+            return False
+    return True
+
+
+def _project(document, projection):
+    if projection is None:
+        return copy.deepcopy(document)
+    included = {key for key, flag in projection.items() if flag}
+    projected = {key: document[key] for key in included if key in document}
+    if projection.get("_id", 1):
+        projected["_id"] = document["_id"]
+    return copy.deepcopy(projected)
+
+
+def _sort_key(value):
+    rank = next(
+        (rank for rank, types in enumerate(_BSON_TYPE_ORDER) if isinstance(value, types)), len(_BSON_TYPE_ORDER)
+    )
+    return (rank, value) if value is not None else (rank,)
+
+
+def _apply_update(document, update):
+    for path, value in update.get("$set", {}).items():
+        *parents, key = path.split(".")
+        target = document
+        for parent in parents:
+            target = target[parent]
+        target[key] = copy.deepcopy(value)
+    for path, value in update.get("$push", {}).items():
+        document.setdefault(path, []).extend(copy.deepcopy(value["$each"]))
+    for path in update.get("$unset", {}):
+        document.pop(path, None)
+    for path, amount in update.get("$inc", {}).items():
+        document[path] = document.get(path, 0) + amount
+
+
+class FakeCursor:
+    def __init__(self, documents, projection):
+        self._documents = documents
+        self._projection = projection
+        self._limit = None
+
+    def sort(self, keys, direction=1):
+        if isinstance(keys, str):
+            keys = [(keys, direction)]
+        for key, key_direction in reversed(keys):
+            self._documents.sort(key=lambda document, key=key: _sort_key(document.get(key)), reverse=key_direction < 0)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _results(self):
+        documents = self._documents if self._limit is None else self._documents[: self._limit]
+        return [_project(document, self._projection) for document in documents]
+
+    def __iter__(self):
+        return iter(self._results())
+
+    async def __aiter__(self):
+        for document in self._results():
+            yield document
+
+
+class FakeCollection:
+    """The subset of ``Collection`` the repositories use, kept in memory."""
+
+    def __init__(self):
+        self.documents = []
+        self.updates = []
+        self.indexes = []
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([document for document in self.documents if _matches(document, query or {})], projection)
+
+    def find_one(self, query, projection=None):
+        return next(iter(self.find(query, projection)), None)
+
+    def insert_one(self, document):
+        document.setdefault("_id", ObjectId())
+        self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    def insert_many(self, documents, ordered=True):
+        for document in documents:
+            self.insert_one(document)
+
+    def update_one(self, query, update, upsert=False):
+        self.updates.append(copy.deepcopy(update))
+        for document in self.documents:
+            if _matches(document, query):
+                _apply_update(document, update)
+                return SimpleNamespace(modified_count=1)
+        return SimpleNamespace(modified_count=0)
+
+    def bulk_write(self, requests, ordered=True):
+        modified = 0
+        for request in requests:
+            for index, document in enumerate(self.documents):
+                if _matches(document, request._filter):
+                    self.documents[index] = copy.deepcopy(request._doc)
+                    modified += 1
+                    break
+            else:
+                if request._upsert:
+                    self.documents.append(copy.deepcopy(request._doc))
+        return SimpleNamespace(modified_count=modified)
+
+    def delete_one(self, query):
+        for document in self.documents:
+            if _matches(document, query):
+                self.documents.remove(document)
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def delete_many(self, query):
+        remaining = [document for document in self.documents if not _matches(document, query)]
+        deleted = len(self.documents) - len(remaining)
+        self.documents = remaining
+        return SimpleNamespace(deleted_count=deleted)
+
+    def create_index(self, keys, **options):
+        self.indexes.append(keys)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def get_collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+class AsyncFakeCollection:
+    """The subset of ``AsyncCollection`` the repositories use, over a ``FakeCollection``."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, query=None, projection=None):
+        return self._collection.find(query, projection)
+
+    async def find_one(self, query, projection=None):
+        return self._collection.find_one(query, projection)
+
+    async def insert_one(self, document):
+        return self._collection.insert_one(document)
+
+    async def insert_many(self, documents, ordered=True):
+        self._collection.insert_many(documents, ordered)
+
+    async def update_one(self, query, update, upsert=False):
+        return self._collection.update_one(query, update, upsert)
+
+    async def delete_one(self, query):
+        return self._collection.delete_one(query)
+
+    async def delete_many(self, query):
+        return self._collection.delete_many(query)
+
+    async def create_index(self, keys, **options):
+        self._collection.create_index(keys, **options)
+
+
+class AsyncFakeDatabase:
+    """An ``AsyncDatabase`` view of ``database``, so sync and async repositories can share one store."""
+
+    def __init__(self, database=None):
+        self.database = database or FakeDatabase()
+        self.collections = self.database.collections
+
+    def get_collection(self, name):
+        return AsyncFakeCollection(self.database.get_collection(name))
+
+
+class FakeGridFS:
+    """``gridfs.GridFS`` over a ``FakeDatabase``, storing files in the standard ``fs.files``/``fs.chunks`` layout."""
+
+    def __init__(self, database):
+        self._files = database.get_collection("fs.files")
+        self._chunks = database.get_collection("fs.chunks")
+
+    def put(self, data, filename):
+        file_id = ObjectId()
+        self._chunks.insert_many(
+            [
+                {"files_id": file_id, "n": n, "data": data[offset : offset + GRIDFS_CHUNK_SIZE_BYTES]}
+                for n, offset in enumerate(range(0, len(data), GRIDFS_CHUNK_SIZE_BYTES))
+            ]
+        )
+        self._files.insert_one(
+            {
+                "_id": file_id,
+                "filename": filename,
+                "length": len(data),
+                "chunkSize": GRIDFS_CHUNK_SIZE_BYTES,
+                "uploadDate": datetime.now(UTC),
+            }
+        )
+        return file_id
+
+    def delete(self, file_id):
+        self._files.delete_one({"_id": file_id})
+        self._chunks.delete_many({"files_id": file_id})
+
+
+class FakeGridOut:
+    def __init__(self, document, chunks):
+        self._id = document["_id"]
+        self.filename = document["filename"]
+        self._chunks = chunks
+
+    async def read(self):
+        chunks = self._chunks.find({"files_id": self._id}).sort(MONGO_CHUNK_SORT)
+        return b"".join(chunk["data"] for chunk in chunks)
+
+
+class FakeGridOutCursor:
+    def __init__(self, cursor, chunks):
+        self._cursor = cursor
+        self._chunks = chunks
+
+    def sort(self, keys, direction=1):
+        self._cursor.sort(keys, direction)
+        return self
+
+    async def __aiter__(self):
+        for document in self._cursor:
+            yield FakeGridOut(document, self._chunks)
+
+
+class FakeAsyncGridFSBucket:
+    """``gridfs.asynchronous.AsyncGridFSBucket`` over an ``AsyncFakeDatabase``."""
+
+    def __init__(self, database):
+        self._fs = FakeGridFS(database.database)
+        self._files = database.database.get_collection("fs.files")
+        self._chunks = database.database.get_collection("fs.chunks")
+
+    async def upload_from_stream(self, filename, source):
+        return self._fs.put(source, filename=filename)
+
+    async def delete(self, file_id):
+        self._fs.delete(file_id)
+
+    def find(self, query):
+        return FakeGridOutCursor(self._files.find(query), self._chunks)
+
+
+def use_fake_async_gridfs(monkeypatch) -> None:
+    """Make ``AsyncMongoGameRepository`` accept an ``AsyncFakeDatabase`` for its GridFS bucket."""
+    monkeypatch.setattr(async_mongo, "AsyncGridFSBucket", FakeAsyncGridFSBucket)
+
+
+def use_fake_mongo(monkeypatch) -> FakeDatabase:
+    """Make ``MongoGameRepository()`` connect to a fresh ``FakeDatabase``, which is returned."""
+    fake_database = FakeDatabase()
+    monkeypatch.setenv("MONGODB_CONNECTION_STRING", "mongodb://localhost:27017")
+    monkeypatch.setenv("CLUSTER", "cya")
+    monkeypatch.setenv("COLLECTION", "games")
+    monkeypatch.setattr(
+        database_module,
+        "MongoClient",
+        lambda connection_string, **options: SimpleNamespace(
+            get_database=lambda name: fake_database, close=lambda: None
+        ),
+    )
+    monkeypatch.setattr(database_module.gridfs, "GridFS", FakeGridFS)
+    return fake_database
@@ -7,11 +7,18 @@ from fastapi.responses import JSONResponse
 
 import app
 from classes import Sender, State
-from game_service import TurnResult
+from game_service import TurnResult, TurnStreamEvent
 from images import Image
 from llm_results import BooleanDecision, DamageDecision
 
 
+def async_returning(function):
+    async def wrapper(*args):
+        return function(*args)
+
+    return wrapper
+
+
 def test_empty_str_if_none_normalizes_none_only():
     assert app.empty_str_if_none(None) == ""
     assert app.empty_str_if_none("") == ""
@@ -147,7 +154,7 @@ def test_response_rejects_long_message(monkeypatch):
 
 
 def test_response_rejects_unknown_game(monkeypatch):
-    monkeypatch.setattr(app, "load_state_from_db", lambda game_id: None)
+    monkeypatch.setattr(app, "load_state_from_db", async_returning(lambda game_id: None))
 
     result = asyncio.run(app.response(app.ResponseRequest(content="Hello", gameId="unknown-game")))
 
@@ -240,6 +247,58 @@ def test_response_returns_game_over_turn_result(monkeypatch):
     }
 
 
+def read_streamed_body(response) -> str:
+    async def collect() -> str:
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_response_stream_sends_deltas_then_result(monkeypatch):
+    class FakeService:
+        async def stream_turn(self, game_id, content):
+            yield TurnStreamEvent(delta="A bridge ")
+            yield TurnStreamEvent(delta="appears.")
+            yield TurnStreamEvent(
+                result=TurnResult(sender=Sender.GAMEMASTER, content="A bridge appears.", hit_points=3)
+            )
+
+    monkeypatch.setattr(app, "create_game_service", lambda: FakeService())
+
+    response = asyncio.run(app.response_stream(app.ResponseRequest(content="Look around.", gameId="active-game")))
+
+    assert response.media_type == "text/event-stream"
+    assert read_streamed_body(response) == (
+        'event: delta\ndata: {"content": "A bridge "}\n\n'
+        'event: delta\ndata: {"content": "appears."}\n\n'
+        f'event: result\ndata: {{"sender": "{Sender.GAMEMASTER}", "content": "A bridge appears.", "hitPoints": 3}}\n\n'
+    )
+
+
+def test_response_stream_sends_error_event(monkeypatch):
+    class FakeService:
+        async def stream_turn(self, game_id, content):
+            yield TurnStreamEvent(
+                result=TurnResult(sender=Sender.ERROR, content="The gamemaster is unavailable.", status_code=502)
+            )
+
+    monkeypatch.setattr(app, "create_game_service", lambda: FakeService())
+
+    response = asyncio.run(app.response_stream(app.ResponseRequest(content="Look around.", gameId="active-game")))
+
+    assert read_streamed_body(response) == (
+        f'event: error\ndata: {{"sender": "{Sender.ERROR}", "content": "The gamemaster is unavailable.", '
+        '"statusCode": 502}\n\n'
+    )
+
+
+def test_response_stream_rejects_blank_game_id():
+    result = asyncio.run(app.response_stream(app.ResponseRequest(content="Look around.", gameId=" ")))
+
+    assert isinstance(result, JSONResponse)
+    assert result.status_code == 400
+
+
 def test_get_suggested_responses_rejects_blank_game_id():
     result = asyncio.run(app.get_suggested_responses(gameId=" ", n=3))
 
@@ -258,7 +317,7 @@ def test_get_suggested_responses_bounds_count(suggestion_count):
 
 
 def test_get_suggested_responses_handles_empty_history(monkeypatch):
-    monkeypatch.setattr(app, "load_state_from_db", lambda game_id: State(_id=game_id, chat_history=[]))
+    monkeypatch.setattr(app, "load_state_from_db", async_returning(lambda game_id: State(_id=game_id, chat_history=[])))
 
     result = asyncio.run(app.get_suggested_responses(gameId="active-game", n=3))
 
@@ -317,7 +376,7 @@ def test_initialize_reports_storage_failure(monkeypatch):
         raise RuntimeError("sqlite file is not writable")
 
     monkeypatch.setattr(app, "get_new_images_for", fake_get_new_images_for)
-    monkeypatch.setattr(app, "db", SimpleNamespace(save_game_and_images=fail_save_game_and_images))
+    monkeypatch.setattr(app, "async_db", SimpleNamespace(save_game_and_images=async_returning(fail_save_game_and_images)))
 
     result = asyncio.run(
         app.initialize(
@@ -335,16 +394,20 @@ def test_initialize_reports_storage_failure(monkeypatch):
     assert b"sqlite file is not writable" in result.body
 
 
-@pytest.mark.parametrize("request_cls, handler, message", [
-    (app.DeleteGameRequest, app.delete_game, b"delete a game"),
-    (app.LoadGameRequest, app.load_game, b"load a game"),
-])
-def test_game_id_endpoints_reject_blank_ids(request_cls, handler, message):
-    result = handler(request_cls(objectIDString=" "))
+def test_delete_game_rejects_blank_id():
+    result = app.delete_game(app.DeleteGameRequest(objectIDString=" "))
 
     assert isinstance(result, JSONResponse)
     assert result.status_code == 400
-    assert message in result.body
+    assert b"delete a game" in result.body
+
+
+def test_load_game_rejects_blank_id():
+    result = asyncio.run(app.load_game(app.LoadGameRequest(objectIDString=" ")))
+
+    assert isinstance(result, JSONResponse)
+    assert result.status_code == 400
+    assert b"load a game" in result.body
 
 
 def test_delete_game_rejects_unknown_game(monkeypatch):
@@ -383,7 +446,11 @@ def test_initialize_awaits_async_image_generation(monkeypatch):
         return images
 
     monkeypatch.setattr(app, "get_new_images_for", fake_get_new_images_for)
-    monkeypatch.setattr(app, "db", SimpleNamespace(save_game_and_images=lambda state, images: saved.append((state, images))))
+    monkeypatch.setattr(
+        app,
+        "async_db",
+        SimpleNamespace(save_game_and_images=async_returning(lambda state, images: saved.append((state, images)))),
+    )
 
     result = asyncio.run(
         app.initialize(
@@ -411,7 +478,13 @@ def test_get_new_images_for_debug_mode_uses_embedded_placeholders(monkeypatch):
 
     monkeypatch.setenv("SKIP_IMAGE_GENERATION", "true")
     monkeypatch.setattr(app.llm_client, "generate_image_bytes", fail_generate_image_bytes)
-    monkeypatch.setattr(app, "db", SimpleNamespace(save_game=lambda state: setattr(state, "_id", "debug-game") or saved_states.append(state)))
+    monkeypatch.setattr(
+        app,
+        "async_db",
+        SimpleNamespace(
+            save_game=async_returning(lambda state: setattr(state, "_id", "debug-game") or saved_states.append(state))
+        ),
+    )
 
     images = asyncio.run(app.get_new_images_for(state))
 
@@ -526,7 +599,7 @@ def test_initialize_without_confirmed_fields_uses_defaults(monkeypatch):
         )
 
     monkeypatch.setattr(app, "get_new_images_for", fake_get_new_images_for)
-    monkeypatch.setattr(app, "db", SimpleNamespace(save_game_and_images=lambda state, images: None))
+    monkeypatch.setattr(app, "async_db", SimpleNamespace(save_game_and_images=async_returning(lambda state, images: None)))
 
     result = asyncio.run(
         app.initialize(
@@ -552,8 +625,8 @@ def test_initialize_with_confirmed_starting_inventory_persists_structured_items(
     monkeypatch.setattr(app, "get_new_images_for", fake_get_new_images_for)
     monkeypatch.setattr(
         app,
-        "db",
-        SimpleNamespace(save_game_and_images=lambda state, images: saved_states.append(state)),
+        "async_db",
+        SimpleNamespace(save_game_and_images=async_returning(lambda state, images: saved_states.append(state))),
     )
 
     result = asyncio.run(
@@ -588,52 +661,180 @@ def test_load_game_returns_story_summary_and_unresolved_threads(monkeypatch):
     )
     monkeypatch.setattr(
         app,
-        "db",
+        "async_db",
         SimpleNamespace(
-            get_game=lambda game_id: state,
-            get_image_bytes=lambda game_id: (b"portrait", b"backdrop"),
+            get_game=async_returning(lambda game_id: state),
+            get_image_bytes=async_returning(lambda game_id: (b"portrait", b"backdrop")),
         ),
     )
 
-    result = app.load_game(app.LoadGameRequest(objectIDString="game-1"))
+    result = asyncio.run(app.load_game(app.LoadGameRequest(objectIDString="game-1")))
 
     assert result["storySummary"] == "Iris crossed the causeway."
     assert result["unresolvedThreads"] == ["open the sun gate"]
 
 
+def test_load_game_returns_chat_history_and_game_over_summary(monkeypatch):
+    state = State(
+        _id="game-1",
+        chat_history=[{"role": "system", "content": "setup"}, {"role": "assistant", "content": "Hello."}],
+        game_over=True,
+        game_over_summary="Iris fell at the gate.",
+    )
+    monkeypatch.setattr(
+        app,
+        "async_db",
+        SimpleNamespace(
+            get_game=async_returning(lambda game_id: state),
+            get_image_bytes=async_returning(lambda game_id: (b"portrait", b"backdrop")),
+        ),
+    )
+
+    result = asyncio.run(app.load_game(app.LoadGameRequest(objectIDString="game-1")))
+
+    assert result["chatHistory"] == state.chat_history
+    assert result["gameOverSummary"] == "Iris fell at the gate."
+
+
+def test_games_endpoint_returns_summary_page(monkeypatch):
+    from classes import GameSummary, GameSummaryPage
+
+    calls = []
+    summary = GameSummary(id="game-1", player_name="Iris", world_theme="tidal caves")
+
+    def list_game_summaries(limit, cursor):
+        calls.append((limit, cursor))
+        return GameSummaryPage(summaries=[summary], next_cursor="next-page")
+
+    monkeypatch.setattr(
+        app,
+        "async_db",
+        SimpleNamespace(list_game_summaries=async_returning(list_game_summaries)),
+    )
+
+    result = asyncio.run(app.games(limit=1, cursor="this-page"))
+
+    assert calls == [(1, "this-page")]
+    assert result == {
+        "results": [
+            {
+                "objectIDString": "game-1",
+                "playerName": "Iris",
+                "worldTheme": "tidal caves",
+                "gameOver": False,
+                "createdAt": "",
+                "updatedAt": "",
+            }
+        ],
+        "nextCursor": "next-page",
+    }
+
+
+@pytest.mark.parametrize("limit", [0, app.MAX_GAME_LISTING_LIMIT + 1])
+def test_games_endpoint_rejects_out_of_range_limit(limit):
+    result = asyncio.run(app.games(limit=limit))
+
+    assert isinstance(result, JSONResponse)
+    assert result.status_code == 400
+
+
+def test_games_endpoint_rejects_invalid_cursor(monkeypatch):
+    from database import SQLiteGameRepository
+
+    monkeypatch.setattr(app, "async_db", app.create_async_game_repository(SQLiteGameRepository(":memory:")))
+
+    result = asyncio.run(app.games(cursor="garbage"))
+
+    assert isinstance(result, JSONResponse)
+    assert result.status_code == 400
+    assert b"Invalid listing cursor" in result.body
+
+
 def test_moments_endpoint_requires_game_id():
-    result = app.moments(gameId=" ")
+    result = asyncio.run(app.moments(gameId=" "))
 
     assert isinstance(result, JSONResponse)
     assert result.status_code == 400
 
 
-def test_moments_endpoint_returns_camel_case_results(monkeypatch):
+def test_moments_endpoint_returns_camel_case_results_with_image_links(monkeypatch):
     from classes import StoryMoment
 
     moment = StoryMoment(id="moment-1", game_id="game-1", caption="Iris drives back the tide-wraith.")
     monkeypatch.setattr(
         app,
-        "db",
-        SimpleNamespace(list_moments=lambda game_id: [(moment, b"image-bytes")] if game_id == "game-1" else []),
+        "async_db",
+        SimpleNamespace(
+            list_moment_summaries=async_returning(lambda game_id: [moment] if game_id == "game-1" else [])
+        ),
     )
 
-    result = app.moments(gameId="game-1")
+    result = asyncio.run(app.moments(gameId="game-1"))
 
     assert result == {
         "results": [
             {
                 "id": "moment-1",
                 "caption": "Iris drives back the tide-wraith.",
-                "imageSrc": Image.json_content_from_bytes(b"image-bytes"),
+                "imageSrc": "/api/moment_image?gameId=game-1&momentId=moment-1",
             }
         ]
     }
 
 
 def test_moments_endpoint_returns_empty_results_for_game_with_no_moments(monkeypatch):
-    monkeypatch.setattr(app, "db", SimpleNamespace(list_moments=lambda game_id: []))
+    monkeypatch.setattr(app, "async_db", SimpleNamespace(list_moment_summaries=async_returning(lambda game_id: [])))
 
-    result = app.moments(gameId="game-1")
+    result = asyncio.run(app.moments(gameId="game-1"))
 
     assert result == {"results": []}
+
+
+def test_moment_image_endpoint_returns_cacheable_png(monkeypatch):
+    monkeypatch.setattr(
+        app,
+        "async_db",
+        SimpleNamespace(
+            get_moment_image=async_returning(
+                lambda game_id, moment_id: b"image-bytes" if (game_id, moment_id) == ("game-1", "moment-1") else None
+            )
+        ),
+    )
+
+    result = asyncio.run(app.moment_image(gameId="game-1", momentId="moment-1"))
+
+    assert result.status_code == 200
+    assert result.body == b"image-bytes"
+    assert result.media_type == "image/png"
+    assert "immutable" in result.headers["cache-control"]
+
+
+def test_moment_image_endpoint_reports_missing_moment(monkeypatch):
+    monkeypatch.setattr(app, "async_db", SimpleNamespace(get_moment_image=async_returning(lambda *ids: None)))
+
+    result = asyncio.run(app.moment_image(gameId="game-1", momentId="other-game-moment"))
+
+    assert result.status_code == 404
+
+
+def test_moment_image_endpoint_requires_ids():
+    result = asyncio.run(app.moment_image(gameId="game-1", momentId=" "))
+
+    assert result.status_code == 400
+
+
+def test_health_reports_llm_rate_limits_and_circuits(monkeypatch):
+    monkeypatch.setattr(
+        app,
+        "llm_client",
+        SimpleNamespace(
+            rate_limit_stats=lambda: {"text": {"queue_depth": 2}},
+            circuit_states=lambda: {"gpt-test": "open"},
+        ),
+    )
+
+    assert app.health() == {
+        "status": "ok",
+        "llmRateLimits": {"text": {"queue_depth": 2}},
+        "llmCircuits": {"gpt-test": "open"},
+    }
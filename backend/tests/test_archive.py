@@ -0,0 +1,178 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Barrier
+
+import pytest
+
+from archive import GameArchive
+from classes import GameRecord, InventoryItem, State, StoryMoment, WorldState
+from database import RevisionConflictError, SQLiteGameRepository
+from images import Images
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = SQLiteGameRepository(tmp_path / "cya.db", archive=GameArchive(tmp_path / "cya-archive.db"))
+    yield repository
+    repository.close()
+
+
+def finished_game(repository, player_name="Iris") -> State:
+    state = State(
+        player_name=player_name,
+        chat_history=[{"role": "user", "content": "Go."}, {"role": "assistant", "content": "The end."}],
+        world_state=WorldState(current_location="gate", inventory=[InventoryItem(id="item-1", name="rope")]),
+    )
+    repository.save_game(state)
+    repository.add_moment(state._id, "The gate opens.", b"moment-image")
+    state.game_over = True
+    repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+    return state
+
+
+def test_archive_moves_finished_games_out_of_the_hot_database(repository):
+    state = finished_game(repository)
+    active = State(player_name="Morgan")
+    repository.save_game(active)
+
+    assert repository.archive_games() == 1
+
+    row = repository._connection.execute(
+        "SELECT state_json, portrait, archived FROM games WHERE id = ?", (state._id,)
+    ).fetchone()
+    assert tuple(row) == ("", None, 1)
+    assert repository._connection.execute("SELECT COUNT(*) FROM turns").fetchone()[0] == 0
+    assert repository._connection.execute("SELECT COUNT(*) FROM moments").fetchone()[0] == 0
+    assert state._id in repository.archive
+    assert [summary.id for summary in repository.list_game_summaries().summaries] == [state._id, active._id]
+    assert repository.all_games() == [repository.get_game(active._id)]
+
+
+def test_get_game_restores_archived_games_transparently(repository):
+    state = finished_game(repository)
+    repository.archive_games()
+
+    loaded = repository.get_game(state._id)
+
+    assert loaded.chat_history == state.chat_history
+    assert loaded.world_state == state.world_state
+    assert loaded.revision == state.revision + 1
+    assert repository.get_image_bytes(state._id) == (b"portrait", b"backdrop")
+    assert [moment.caption for moment in repository.list_moment_summaries(state._id)] == ["The gate opens."]
+    assert state._id not in repository.archive
+    loaded.hit_points = 2
+    repository.save_game(loaded)
+    assert repository.get_game(state._id).hit_points == 2
+
+
+class SlowFirstReadArchive(GameArchive):
+    """Delays the first read so that a second concurrent load gets to restore the game first."""
+
+    def __init__(self, path) -> None:
+        super().__init__(path)
+        self.reads = 0
+
+    def get(self, game_id):
+        self.reads += 1
+        if self.reads == 1:
+            time.sleep(0.2)
+        return super().get(game_id)
+
+
+def test_concurrent_loads_of_an_archived_game_all_see_it(tmp_path):
+    repository = SQLiteGameRepository(tmp_path / "cya.db", archive=SlowFirstReadArchive(tmp_path / "cya-archive.db"))
+    state = finished_game(repository)
+    repository.archive_games()
+    barrier = Barrier(2)
+
+    def load(_):
+        barrier.wait()
+        return repository.get_game(state._id)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        loaded = list(executor.map(load, range(2)))
+
+    assert all(game is not None and game.chat_history == state.chat_history for game in loaded)
+    assert loaded[0].revision == loaded[1].revision
+    assert state._id not in repository.archive
+    assert len(repository.list_moment_summaries(state._id)) == 1
+    repository.close()
+
+
+def test_archive_includes_idle_games(repository):
+    idle = State(player_name="Idle")
+    repository.save_game(idle)
+    recent = State(player_name="Recent")
+    repository.save_game(recent)
+    with repository._connection:
+        repository._connection.execute(
+            "UPDATE games SET created_at = ? WHERE id = ?",
+            ((datetime.now() - timedelta(days=40)).isoformat(), idle._id),
+        )
+
+    assert repository.archive_games(idle_before=datetime.now() - timedelta(days=30)) == 1
+    assert idle._id in repository.archive
+    assert recent._id not in repository.archive
+
+
+def test_saves_from_copies_loaded_before_archiving_conflict(repository):
+    state = finished_game(repository)
+    repository.archive_games()
+
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(state)
+
+    assert repository.get_game(state._id).revision == state.revision + 1
+
+
+def test_archive_compacts_the_hot_database(repository):
+    for index in range(5):
+        finished_game(repository, player_name=f"Player {index}")
+    with repository._lock:
+        repository._connection.execute("PRAGMA auto_vacuum = NONE")
+        repository._connection.execute("VACUUM")
+
+    repository.archive_games()
+
+    assert repository._connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert repository._connection.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_deleting_an_archived_game_removes_the_archived_copy(repository):
+    state = finished_game(repository)
+    repository.archive_games()
+
+    assert repository.delete_game(state._id) is True
+    assert state._id not in repository.archive
+    assert repository.get_game(state._id) is None
+
+
+def test_export_and_import_round_trip_between_databases(repository):
+    state = finished_game(repository)
+    record = repository.export_game(state._id)
+    target = SQLiteGameRepository(":memory:")
+
+    target.import_game(record)
+    target.import_game(record)
+
+    assert target.get_game(state._id) == repository.get_game(state._id)
+    assert target.get_image_bytes(state._id) == (b"portrait", b"backdrop")
+    assert target.list_moments(state._id) == repository.list_moments(state._id)
+
+
+def test_archive_round_trips_records():
+    archive = GameArchive(":memory:")
+    state = State(_id="game-1", player_name="Iris", chat_history=[{"role": "user", "content": "Go."}] * 20)
+    record = GameRecord(state, b"portrait", None, [(StoryMoment(id="m", game_id="game-1", caption="c"), b"i")])
+
+    archive.put(record)
+
+    assert archive.get("game-1") == record
+    archive.delete("game-1")
+    assert archive.get("game-1") is None
+
+
+def test_archive_games_requires_an_archive():
+    with pytest.raises(RuntimeError, match="archive"):
+        SQLiteGameRepository(":memory:").archive_games()
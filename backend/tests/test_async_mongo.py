@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+from mongo_fakes import GRIDFS_CHUNK_SIZE_BYTES, AsyncFakeDatabase, use_fake_async_gridfs, use_fake_mongo
+
+from async_mongo import AsyncMongoGameRepository, create_async_mongo_game_repository
+from classes import State, WorldState
+from database import (
+    ExecutorGameRepository,
+    MongoGameRepository,
+    RevisionConflictError,
+    SQLiteGameRepository,
+    create_async_game_repository,
+)
+from game_cache import AsyncCachedGameRepository, CachedGameRepository
+from images import Images
+
+
+@pytest.fixture
+def database(monkeypatch):
+    use_fake_async_gridfs(monkeypatch)
+    return AsyncFakeDatabase()
+
+
+@pytest.fixture
+def repository(database):
+    return AsyncMongoGameRepository(database, "games")
+
+
+def test_async_mongo_repository_round_trips_games_with_revision_checks(repository, database):
+    async def scenario():
+        state = State(player_name="Iris", chat_history=[{"role": "user", "content": "Go."}])
+        await repository.save_game(state)
+        stale = await repository.get_game(state._id)
+        loaded = await repository.get_game(state._id)
+        loaded.chat_history.append({"role": "assistant", "content": "You walk."})
+        loaded.world_state.current_location = "market"
+        await repository.save_game(loaded)
+        with pytest.raises(RevisionConflictError):
+            await repository.save_game(stale)
+        return state, await repository.get_game(state._id), await repository.get_revision(state._id)
+
+    state, reloaded, revision = asyncio.run(scenario())
+
+    assert reloaded.revision == revision == 1
+    assert reloaded.chat_history[-1] == {"role": "assistant", "content": "You walk."}
+    assert reloaded.world_state.current_location == "market"
+    assert reloaded.created_at == state.created_at
+    assert database.collections["games"].updates[0] == {
+        "$inc": {"revision": 1},
+        "$set": {"world_state.current_location": "market", "updated_at": reloaded.updated_at},
+        "$push": {"chat_history": {"$each": [{"role": "assistant", "content": "You walk."}]}},
+    }
+    assert [("game_id", 1)] in database.collections["moments"].indexes
+
+
+def test_async_mongo_repository_stores_chunked_images_and_reads_the_latest_version(repository, database):
+    portrait = bytes(range(256)) * (GRIDFS_CHUNK_SIZE_BYTES // 256 + 10)
+
+    async def scenario():
+        state = State(player_name="Iris")
+        await repository.save_game(state)
+        await repository.save_game_and_images(state, Images(state._id, b"old-portrait", b"old-backdrop"))
+        await repository.save_game_and_images(state, Images(state._id, portrait, b"backdrop"))
+        return await repository.get_image_bytes(state._id), await repository.get_image_bytes("missing")
+
+    images, missing = asyncio.run(scenario())
+
+    assert images == (portrait, b"backdrop")
+    assert missing is None
+    assert len([chunk for chunk in database.collections["fs.chunks"].documents if len(chunk["data"]) > 100]) == 2
+
+
+def test_async_mongo_repository_manages_moments_and_deletes_everything_for_a_game(repository, database):
+    async def scenario():
+        state = State(player_name="Iris")
+        await repository.save_game_and_images(state, Images("pending", b"p", b"b"))
+        await repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+        first = await repository.add_moment(state._id, "The gate opens.", b"first")
+        await repository.add_moment(state._id, "The bridge falls.", b"second")
+        results = (
+            await repository.list_moments(state._id),
+            await repository.list_moment_summaries(state._id),
+            await repository.get_moment_image(state._id, first.id),
+            await repository.get_moment_image("other-game", first.id),
+        )
+        deleted = await repository.delete_game(state._id)
+        return state, first, results, deleted, await repository.get_game(state._id)
+
+    state, first, results, deleted, after_delete = asyncio.run(scenario())
+    moments, summaries, image, other_game_image = results
+
+    assert [(moment.caption, image_bytes) for moment, image_bytes in moments] == [
+        ("The gate opens.", b"first"),
+        ("The bridge falls.", b"second"),
+    ]
+    assert [summary.id for summary in summaries][0] == first.id
+    assert image == b"first"
+    assert other_game_image is None
+    assert deleted is True
+    assert after_delete is None
+    assert database.collections["moments"].documents == []
+    assert [stored["filename"] for stored in database.collections["fs.files"].documents] == [
+        "pending_portrait",
+        "pending_backdrop",
+    ]
+
+
+def test_async_mongo_repository_pages_game_summaries(repository):
+    async def scenario():
+        states = [State(player_name=f"player-{index}") for index in range(5)]
+        for state in states:
+            await repository.save_game(state)
+            await repository.save_game(state)
+        first_page = await repository.list_game_summaries(limit=3)
+        second_page = await repository.list_game_summaries(limit=3, cursor=first_page.next_cursor)
+        return states, first_page, second_page
+
+    states, first_page, second_page = asyncio.run(scenario())
+
+    listed = [summary.player_name for summary in first_page.summaries + second_page.summaries]
+    assert listed == [state.player_name for state in reversed(states)]
+    assert second_page.next_cursor is None
+
+
+def test_async_mongo_listing_lists_never_saved_games_after_saved_ones(repository):
+    async def scenario():
+        states = [State(player_name=f"player-{index}") for index in range(4)]
+        for index, state in enumerate(states):
+            await repository.save_game(state)
+            if index % 2 == 0:
+                await repository.save_game(state)
+        pages = []
+        cursor = None
+        while True:
+            page = await repository.list_game_summaries(limit=1, cursor=cursor)
+            pages.append(page.summaries)
+            cursor = page.next_cursor
+            if cursor is None:
+                return states, pages
+
+    states, pages = asyncio.run(scenario())
+
+    listed = [summary.player_name for page in pages for summary in page]
+    assert listed[:2] == ["player-2", "player-0"]
+    assert sorted(listed[2:]) == ["player-1", "player-3"]
+    assert all(len(page) == 1 for page in pages)
+
+
+def test_create_async_game_repository_uses_native_mongo_with_pool_options(monkeypatch):
+    monkeypatch.setenv("CYA_STORAGE_BACKEND", "mongodb")
+    monkeypatch.setenv("MONGODB_CONNECTION_STRING", "mongodb://localhost:27017")
+    monkeypatch.setenv("CLUSTER", "cya")
+    monkeypatch.setenv("COLLECTION", "games")
+    monkeypatch.setenv("CYA_MONGO_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("CYA_MONGO_MIN_POOL_SIZE", "2")
+
+    repository = create_async_game_repository(SQLiteGameRepository(":memory:"))
+
+    assert isinstance(repository, AsyncMongoGameRepository)
+    assert repository._client.options.pool_options.max_pool_size == 7
+    assert repository._client.options.pool_options.min_pool_size == 2
+    asyncio.run(repository.close())
+
+    cache = CachedGameRepository(SQLiteGameRepository(":memory:"))
+    cached = create_async_game_repository(cache)
+    assert isinstance(cached, AsyncCachedGameRepository)
+    assert cached.cache is cache
+    assert isinstance(cached.repository, AsyncMongoGameRepository)
+    asyncio.run(cached.close())
+
+    monkeypatch.setenv("CYA_MONGO_ASYNC", "false")
+    assert isinstance(create_async_game_repository(SQLiteGameRepository(":memory:")), ExecutorGameRepository)
+
+
+def test_async_mongo_repository_reports_missing_configuration(monkeypatch):
+    for name in ("MONGODB_CONNECTION_STRING", "CLUSTER", "COLLECTION"):
+        monkeypatch.delenv(name, raising=False)
+
+    with pytest.raises(RuntimeError, match="MONGODB_CONNECTION_STRING.*CLUSTER.*COLLECTION"):
+        create_async_mongo_game_repository()
+
+
+def test_async_mongo_repository_ignores_world_state_it_never_loaded(repository, database):
+    async def scenario():
+        state = State(world_state=WorldState(current_location="gate"))
+        await repository.save_game(state)
+        fresh = AsyncMongoGameRepository(database, "games")
+        state.world_state.current_location = "market"
+        await fresh.save_game(state)
+
+    asyncio.run(scenario())
+
+    assert "world_state" in database.collections["games"].updates[-1]["$set"]
+
+
+def test_async_mongo_shares_the_game_cache_with_the_synchronous_stack(monkeypatch):
+    database = use_fake_mongo(monkeypatch)
+    use_fake_async_gridfs(monkeypatch)
+    cache = CachedGameRepository(MongoGameRepository())
+    repository = AsyncCachedGameRepository(AsyncMongoGameRepository(AsyncFakeDatabase(database), "games"), cache)
+    state = State(player_name="Iris")
+
+    async def scenario():
+        await repository.save_game(state)
+        stale = await repository.get_game(state._id)
+        loaded = await repository.get_game(state._id)
+        loaded.player_name = "Morgan"
+        await repository.save_game(loaded)
+        with pytest.raises(RevisionConflictError):
+            await repository.save_game(stale)
+
+    asyncio.run(scenario())
+
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert cache.get_game(state._id).player_name == "Morgan"
+    assert cache.misses == 1
+    assert cache.delete_game(state._id) is True
+    assert asyncio.run(repository.get_game(state._id)) is None
+
+
+def test_async_mongo_reads_and_deletes_files_written_by_the_sync_repository(monkeypatch):
+    database = use_fake_mongo(monkeypatch)
+    use_fake_async_gridfs(monkeypatch)
+    sync_repository = MongoGameRepository()
+    repository = AsyncMongoGameRepository(AsyncFakeDatabase(database), "games")
+    state = State(player_name="Iris")
+    sync_repository.save_game(state)
+    sync_repository.save_game_and_images(state, Images(state._id, b"old-portrait", b"old-backdrop"))
+    sync_repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+
+    images = asyncio.run(repository.get_image_bytes(state._id))
+    deleted = asyncio.run(repository.delete_game(state._id))
+
+    assert images == (b"portrait", b"backdrop")
+    assert deleted is True
+    assert database.collections["fs.files"].documents == []
+    assert database.collections["fs.chunks"].documents == []
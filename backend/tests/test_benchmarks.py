@@ -0,0 +1,44 @@
+from benchmarks.repositories import BenchmarkConfig, compare, percentile, run_benchmarks
+
+
+def test_repository_benchmark_times_every_operation_and_cleans_up():
+    config = BenchmarkConfig(games=4, history_length=6, blob_bytes=256, moments_per_game=1, operations=3, scan_rounds=1)
+
+    report = run_benchmarks(config, ["sqlite", "sqlite-partitioned"])
+
+    assert report["config"]["games"] == 4
+    for operations in report["results"].values():
+        assert set(operations) == {
+            "save_game_and_images",
+            "add_moment",
+            "get_game",
+            "save_game",
+            "get_image_bytes",
+            "list_moments",
+            "list_game_summaries",
+            "all_games",
+            "delete_game",
+        }
+        assert operations["get_game"]["count"] == 3
+        assert operations["get_game"]["p50_ms"] <= operations["get_game"]["p99_ms"]
+
+
+def test_compare_reports_operations_slower_than_the_tolerance():
+    def report(p50_ms, ops_per_second):
+        return {
+            "results": {"sqlite": {"get_game": {"p50_ms": p50_ms, "p99_ms": 1.0, "ops_per_second": ops_per_second}}}
+        }
+
+    assert compare(report(1.0, 100.0), report(1.1, 95.0), tolerance=0.2) == []
+    assert compare(report(1.0, 100.0), report(1.5, 60.0), tolerance=0.2) == [
+        "sqlite get_game p50_ms: 1.000 -> 1.500",
+        "sqlite get_game ops/s: 100.0 -> 60.0",
+    ]
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert percentile(samples, 0.5) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([3.0], 0.99) == 3.0
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 
 import pytest
@@ -6,6 +7,7 @@ from classes import (
     DEFAULT_MAX_CARRY_WEIGHT_KG,
     MAX_HIT_POINTS,
     MIN_HIT_POINTS,
+    STATE_SCHEMA_VERSION,
     InventoryItem,
     PlayerAttributes,
     Quest,
@@ -86,6 +88,103 @@ def test_deserialize_round_trips_serialized_state():
     assert deserialized_state == state
 
 
+def populated_state() -> State:
+    return State(
+        _id="saved-game",
+        player_name="Morgan",
+        chat_history=[{"role": "user", "content": "look"}, {"role": "assistant", "content": "A gate."}],
+        hit_points=3,
+        unresolved_threads=["open the gate"],
+        updated_at=datetime(2024, 5, 1, 12, 30),
+        revision=4,
+        world_state=WorldState(
+            current_location="glass market",
+            inventory=[InventoryItem(id="item-1", name="brass key", weight_kg=0.2, quantity=2)],
+            conditions=["tired"],
+            known_npcs={"Iris": "glassmaker"},
+            quests=[Quest(id="quest-1", title="find the lantern", step_history=["asked Iris"])],
+            world_flags={"gate_open": True},
+        ),
+        player_attributes=PlayerAttributes(age_years=29, height_cm=170.0),
+    )
+
+
+def test_to_primitive_matches_serialize():
+    state = populated_state()
+
+    unsaved_state = State(player_name="Ada")
+
+    assert state.to_primitive() == {**state.serialize(), "schema_version": STATE_SCHEMA_VERSION}
+    assert unsaved_state.to_primitive() == {**unsaved_state.serialize(), "schema_version": STATE_SCHEMA_VERSION}
+
+
+def test_from_primitive_round_trips_json_form():
+    state = populated_state()
+    document = json.loads(json.dumps(state.serialize(), default=datetime.isoformat))
+
+    assert State.deserialize(dict(document)) == state
+    assert State.from_primitive(document) == state
+
+
+def test_from_primitive_accepts_native_datetimes():
+    state = populated_state()
+
+    assert State.from_primitive(state.to_primitive()) == state
+
+
+def test_to_primitive_copies_containers():
+    state = populated_state()
+    document = state.to_primitive()
+    document["chat_history"].append({"role": "user", "content": "wait"})
+    document["world_state"]["inventory"].clear()
+    document["world_state"]["quests"][0]["step_history"].append("found the cellar")
+
+    assert len(state.chat_history) == 2
+    assert len(state.world_state.inventory) == 1
+    assert state.world_state.quests[0].step_history == ["asked Iris"]
+
+
+def test_copy_shares_no_mutable_values_with_the_original():
+    state = populated_state()
+    state.world_state.world_flags["door"] = {"locked": True}
+    copied = state.copy()
+
+    copied.chat_history[0]["content"] = "rewritten"
+    copied.world_state.world_flags["door"]["locked"] = False
+    copied.world_state.quests[0].step_history.append("found the cellar")
+    copied.world_state.inventory[0].quantity += 1
+
+    assert copied != state
+    assert state.chat_history[0]["content"] != "rewritten"
+    assert state.world_state.world_flags["door"] == {"locked": True}
+    assert state.world_state.quests[0].step_history == ["asked Iris"]
+    assert state.world_state.inventory[0].quantity == populated_state().world_state.inventory[0].quantity
+
+
+def test_from_primitive_falls_back_to_deserialize_for_legacy_documents():
+    document = State(player_name="Ada").serialize()
+    document.pop("player_attributes")
+    document["world_state"]["inventory"] = ["lantern"]
+    document["world_state"]["active_quests"] = ["find the lantern"]
+
+    state = State.from_primitive(document)
+
+    assert state.player_attributes == PlayerAttributes()
+    assert state.world_state.inventory[0].name == "lantern"
+    assert state.world_state.quests[0].title == "find the lantern"
+
+
+def test_from_primitive_trusts_documents_at_the_current_schema_version():
+    document = populated_state().to_primitive()
+    document["world_state"]["inventory"] = ["lantern"]
+
+    with pytest.raises(TypeError):
+        State.from_primitive(document)
+
+    del document["schema_version"]
+    assert State.from_primitive(document).world_state.inventory[0].name == "lantern"
+
+
 def test_deserialize_old_state_without_world_state_uses_defaults():
     serialized_state = State(player_name="Ada").serialize()
     serialized_state.pop("world_state")
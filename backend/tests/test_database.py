@@ -1,15 +1,24 @@
+import asyncio
+import json
+import sqlite3
+import threading
 from datetime import datetime
 
 import pytest
 
 from classes import InventoryItem, PlayerAttributes, State, WorldState
 from database import (
+    ExecutorGameRepository,
+    InvalidListingCursorError,
     MongoGameRepository,
+    MongoStateBaseline,
     RevisionConflictError,
     SQLiteGameRepository,
     create_game_repository,
+    mongo_state_update,
 )
 from images import Images
+from state_codec import ZlibCodec
 
 
 def test_sqlite_repository_round_trips_game_and_images():
@@ -114,6 +123,29 @@ def test_sqlite_repository_add_and_list_moments():
     assert all(moment.game_id == state._id for moment, _ in moments)
 
 
+def test_sqlite_repository_lists_moment_metadata_and_fetches_images_separately():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    first = repository.add_moment(state._id, "The gate opens.", b"first-image")
+    second = repository.add_moment(state._id, "The tide turns.", b"second-image")
+
+    assert repository.list_moment_summaries(state._id) == [first, second]
+    assert repository.get_moment_image(state._id, second.id) == b"second-image"
+    assert repository.get_moment_image("other-game", second.id) is None
+    assert repository.get_moment_image(state._id, "missing") is None
+
+
+def test_sqlite_repository_looks_up_moments_by_game_index():
+    repository = SQLiteGameRepository(":memory:")
+
+    plan = repository._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM moments WHERE game_id = ? ORDER BY rowid ASC", ("game-1",)
+    ).fetchall()
+
+    assert any("moments_by_game_id" in row["detail"] for row in plan)
+
+
 def test_sqlite_repository_list_moments_empty_for_unknown_game():
     repository = SQLiteGameRepository(":memory:")
 
@@ -130,6 +162,356 @@ def test_sqlite_repository_delete_removes_moments():
     assert repository.list_moments(state._id) == []
 
 
+def test_sqlite_repository_appends_only_new_chat_messages():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(chat_history=[{"role": "system", "content": "setup"}])
+    repository.save_game(state)
+
+    state.chat_history.append({"role": "user", "content": "Go."})
+    state.chat_history.append({"role": "assistant", "content": "You go."})
+    repository.save_game(state)
+
+    rows = repository._connection.execute(
+        "SELECT turn_index, message_json FROM turns WHERE game_id = ? ORDER BY turn_index", (state._id,)
+    ).fetchall()
+    stored_state = repository._connection.execute(
+        "SELECT state_json FROM games WHERE id = ?", (state._id,)
+    ).fetchone()
+    assert [row["turn_index"] for row in rows] == [0, 1, 2]
+    assert [json.loads(row["message_json"]) for row in rows] == state.chat_history
+    assert "chat_history" not in json.loads(stored_state["state_json"])
+    assert repository.get_game(state._id).chat_history == state.chat_history
+
+
+def test_sqlite_repository_stale_save_does_not_append_turns():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(chat_history=[{"role": "system", "content": "setup"}])
+    repository.save_game(state)
+    stale_copy = repository.get_game(state._id)
+    repository.save_game(state)
+
+    stale_copy.chat_history.append({"role": "user", "content": "Too late."})
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(stale_copy)
+
+    assert repository.get_game(state._id).chat_history == [{"role": "system", "content": "setup"}]
+
+
+def test_sqlite_repository_migrates_legacy_chat_history_into_turns(tmp_path):
+    path = tmp_path / "legacy.db"
+    legacy_state = State(_id="legacy-game", player_name="Morgan", chat_history=[{"role": "user", "content": "Hi."}])
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE games (id TEXT PRIMARY KEY, state_json TEXT NOT NULL, portrait BLOB, backdrop BLOB)"
+    )
+    connection.execute(
+        "INSERT INTO games (id, state_json) VALUES (?, ?)",
+        ("legacy-game", json.dumps(legacy_state.serialize(), default=str)),
+    )
+    connection.commit()
+    connection.close()
+
+    repository = SQLiteGameRepository(path)
+
+    loaded = repository.get_game("legacy-game")
+    assert loaded.player_name == "Morgan"
+    assert loaded.chat_history == [{"role": "user", "content": "Hi."}]
+    stored_state = repository._connection.execute("SELECT state_json FROM games").fetchone()
+    assert "chat_history" not in json.loads(stored_state["state_json"])
+    repository.close()
+
+
+def test_sqlite_repository_keeps_metadata_columns_in_sync():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(player_name="Iris", world_theme="drowned city")
+    repository.save_game(state)
+
+    state.game_over = True
+    repository.save_game(state)
+
+    row = repository._connection.execute(
+        "SELECT revision, created_at, updated_at, game_over, player_name, world_theme FROM games WHERE id = ?",
+        (state._id,),
+    ).fetchone()
+    assert row["revision"] == 1
+    assert row["created_at"] == state.created_at.isoformat(timespec="microseconds")
+    assert row["updated_at"] == state.updated_at.isoformat(timespec="microseconds")
+    assert row["game_over"] == 1
+    assert row["player_name"] == "Iris"
+    assert row["world_theme"] == "drowned city"
+
+
+def test_sqlite_repository_migrates_metadata_columns_for_existing_games(tmp_path):
+    path = tmp_path / "v1.db"
+    legacy_state = State(_id="legacy-game", player_name="Morgan", world_theme="salt flats", revision=3)
+    document = legacy_state.serialize()
+    del document["chat_history"]
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE games (id TEXT PRIMARY KEY, state_json TEXT NOT NULL, portrait BLOB, backdrop BLOB)"
+    )
+    connection.execute(
+        "INSERT INTO games (id, state_json) VALUES (?, ?)",
+        ("legacy-game", json.dumps(document, default=str)),
+    )
+    connection.execute("PRAGMA user_version = 1")
+    connection.commit()
+    connection.close()
+
+    repository = SQLiteGameRepository(path)
+    row = repository._connection.execute(
+        "SELECT revision, player_name, world_theme, game_over FROM games WHERE id = 'legacy-game'"
+    ).fetchone()
+    loaded = repository.get_game("legacy-game")
+    loaded.hit_points = 2
+    repository.save_game(loaded)
+
+    assert tuple(row) == (3, "Morgan", "salt flats", 0)
+    assert repository.get_game("legacy-game").revision == 4
+    repository.close()
+
+
+def test_sqlite_repository_conflict_check_ignores_revision_inside_state_json():
+    repository = SQLiteGameRepository(":memory:")
+    state = State()
+    repository.save_game(state)
+    repository._connection.execute(
+        "UPDATE games SET state_json = json_set(state_json, '$.revision', 7) WHERE id = ?", (state._id,)
+    )
+
+    repository.save_game(state)
+
+    assert state.revision == 1
+
+
+def test_sqlite_repository_orders_listings_by_updated_at_index():
+    repository = SQLiteGameRepository(":memory:")
+
+    plan = repository._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM games ORDER BY updated_at DESC, id DESC"
+    ).fetchall()
+
+    assert any("games_by_updated_at" in row["detail"] for row in plan)
+
+
+def test_sqlite_repository_pages_game_summaries_newest_first():
+    repository = SQLiteGameRepository(":memory:")
+    never_updated = State(player_name="Fresh")
+    repository.save_game(never_updated)
+    updated_ids = []
+    for name in ("Ada", "Bo", "Cy"):
+        state = State(player_name=name, world_theme="moors")
+        repository.save_game(state)
+        repository.save_game(state)
+        updated_ids.append(state._id)
+
+    pages = []
+    cursor = None
+    while True:
+        page = repository.list_game_summaries(limit=2, cursor=cursor)
+        pages.append([summary.id for summary in page.summaries])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [[updated_ids[2], updated_ids[1]], [updated_ids[0], never_updated._id]]
+    first = repository.list_game_summaries(limit=1).summaries[0]
+    assert first.player_name == "Cy"
+    assert first.world_theme == "moors"
+    assert first.updated_at is not None
+
+
+def test_sqlite_repository_pages_through_games_never_updated():
+    repository = SQLiteGameRepository(":memory:")
+    for name in ("Ada", "Bo", "Cy"):
+        repository.save_game(State(player_name=name))
+
+    first = repository.list_game_summaries(limit=2)
+    second = repository.list_game_summaries(limit=2, cursor=first.next_cursor)
+
+    assert len(first.summaries) == 2
+    assert len(second.summaries) == 1
+    assert second.next_cursor is None
+    listed = {summary.id for summary in first.summaries + second.summaries}
+    assert listed == {state._id for state in repository.all_games()}
+
+
+def test_sqlite_listing_pages_seek_into_the_index_from_any_cursor():
+    repository = SQLiteGameRepository(":memory:")
+    for name in ("Ada", "Bo", "Cy", "Di"):
+        state = State(player_name=name)
+        repository.save_game(state)
+        if name != "Di":
+            repository.save_game(state)
+    statements = []
+    repository._connection.set_trace_callback(statements.append)
+
+    cursor = None
+    for _ in range(4):
+        page = repository.list_game_summaries(limit=1, cursor=cursor)
+        cursor = page.next_cursor
+    repository._connection.set_trace_callback(None)
+
+    listings = [statement for statement in statements if "FROM games" in statement]
+    assert listings
+    for statement in listings:
+        plan = repository._connection.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+        assert [row["detail"].split(" USING ")[0] for row in plan] == ["SEARCH games"], statement
+
+
+def test_sqlite_repository_rejects_malformed_listing_cursor():
+    repository = SQLiteGameRepository(":memory:")
+
+    with pytest.raises(InvalidListingCursorError):
+        repository.list_game_summaries(cursor="not-a-cursor")
+
+
+def test_sqlite_repository_reads_plain_rows_after_enabling_compression(tmp_path):
+    database_path = tmp_path / "cya.db"
+    plain = SQLiteGameRepository(database_path)
+    state = State(player_name="Iris", chat_history=[{"role": "user", "content": "Go."}])
+    plain.save_game(state)
+    plain.close()
+
+    compressed = SQLiteGameRepository(database_path, codec=ZlibCodec())
+    loaded = compressed.get_game(state._id)
+    assert loaded is not None
+    loaded.chat_history.append({"role": "assistant", "content": "The corridor stretches on. " * 20})
+    loaded.world_theme = "A drowned cathedral " * 20
+    compressed.save_game(loaded)
+
+    state_json = compressed._connection.execute("SELECT state_json FROM games").fetchone()[0]
+    messages = [row[0] for row in compressed._connection.execute("SELECT message_json FROM turns ORDER BY turn_index")]
+    assert isinstance(state_json, bytes)
+    assert isinstance(messages[0], str)
+    assert isinstance(messages[1], bytes)
+    assert compressed.get_game(state._id).chat_history == loaded.chat_history
+    assert compressed.all_games()[0].world_theme == loaded.world_theme
+    compressed.close()
+
+
+def test_sqlite_repository_reports_current_revision():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    repository.save_game(state)
+
+    assert repository.get_revision(state._id) == 1
+    assert repository.get_revision("missing") is None
+
+
+def test_sqlite_repository_stores_world_state_changes_as_events():
+    repository = SQLiteGameRepository(":memory:")
+    state = State(world_state=WorldState(current_location="gate", conditions=["tired"]))
+    repository.save_game(state)
+    state.world_state.current_location = "causeway"
+    state.world_state.inventory.append(InventoryItem(id="item-1", name="rope"))
+    repository.save_game(state)
+    repository.save_game(state)
+
+    events = repository._connection.execute("SELECT seq, revision FROM world_events ORDER BY seq").fetchall()
+    state_json = json.loads(repository._connection.execute("SELECT state_json FROM games").fetchone()[0])
+
+    assert [tuple(event) for event in events] == [(1, 1), (2, 1)]
+    assert "world_state" not in state_json
+    assert repository.get_game(state._id).world_state == state.world_state
+    assert repository.all_games()[0].world_state == state.world_state
+
+
+def test_sqlite_repository_saves_and_loads_without_replaying_world_events():
+    repository = SQLiteGameRepository(":memory:")
+    state = State()
+    repository.save_game(state)
+    for turn in range(3):
+        state.world_state.current_location = f"room {turn}"
+        repository.save_game(state)
+    statements = []
+    repository._connection.set_trace_callback(statements.append)
+
+    state.world_state.known_npcs["Warden"] = "met"
+    repository.save_game(state)
+    loaded = repository.get_game(state._id)
+    repository._connection.set_trace_callback(None)
+
+    assert loaded.world_state == state.world_state
+    assert not [statement for statement in statements if "SELECT" in statement and "event_json" in statement]
+    assert repository.get_world_state_at(state._id, 3).known_npcs == {}
+
+
+def test_sqlite_repository_snapshots_world_state_every_interval():
+    repository = SQLiteGameRepository(":memory:", world_snapshot_interval=3)
+    state = State()
+    repository.save_game(state)
+    for turn in range(7):
+        state.world_state.current_location = f"room {turn}"
+        repository.save_game(state)
+
+    snapshots = repository._connection.execute("SELECT seq FROM world_snapshots ORDER BY seq").fetchall()
+
+    assert [row["seq"] for row in snapshots] == [0, 3, 6]
+    assert repository.get_game(state._id).world_state.current_location == "room 6"
+
+
+def test_sqlite_repository_rebuilds_world_state_at_past_revisions():
+    repository = SQLiteGameRepository(":memory:", world_snapshot_interval=2)
+    state = State()
+    repository.save_game(state)
+    locations = []
+    for turn in range(5):
+        state.world_state.current_location = f"room {turn}"
+        state.world_state.known_npcs[f"npc {turn}"] = "met"
+        repository.save_game(state)
+        locations.append(state.world_state.current_location)
+
+    assert repository.get_world_state_at(state._id, 0) == WorldState()
+    for revision, location in enumerate(locations, start=1):
+        past = repository.get_world_state_at(state._id, revision)
+        assert past.current_location == location
+        assert len(past.known_npcs) == revision
+    assert repository.get_world_state_at("missing", 1) is None
+
+
+def test_sqlite_repository_migrates_world_state_into_snapshots(tmp_path):
+    path = tmp_path / "v3.db"
+    repository = SQLiteGameRepository(path)
+    state = State(player_name="Morgan", world_state=WorldState(current_location="gate"))
+    repository.save_game(state)
+    legacy_document = state.serialize()
+    del legacy_document["chat_history"]
+    legacy_document["world_state"] = {"current_location": "salt flats", "active_quests": ["cross the flats"]}
+    with repository._connection:
+        repository._connection.execute("DROP TABLE world_events")
+        repository._connection.execute("DROP TABLE world_snapshots")
+        repository._connection.execute(
+            "UPDATE games SET state_json = ?", (json.dumps(legacy_document, default=str),)
+        )
+        repository._connection.execute("PRAGMA user_version = 3")
+    repository.close()
+
+    migrated = SQLiteGameRepository(path)
+    loaded = migrated.get_game(state._id)
+    loaded.world_state.current_location = "causeway"
+    migrated.save_game(loaded)
+
+    assert loaded.world_state.quests[0].title == "cross the flats"
+    assert migrated.get_world_state_at(state._id, 0).current_location == "salt flats"
+    assert migrated.get_game(state._id).world_state.current_location == "causeway"
+    migrated.close()
+
+
+def test_sqlite_repository_delete_removes_world_events():
+    repository = SQLiteGameRepository(":memory:")
+    state = State()
+    repository.save_game(state)
+    state.world_state.current_location = "gate"
+    repository.save_game(state)
+
+    repository.delete_game(state._id)
+
+    assert repository._connection.execute("SELECT COUNT(*) FROM world_events").fetchone()[0] == 0
+    assert repository._connection.execute("SELECT COUNT(*) FROM world_snapshots").fetchone()[0] == 0
+
+
 def test_sqlite_repository_persists_after_reopening(tmp_path):
     path = tmp_path / "cya.db"
     first = SQLiteGameRepository(path)
@@ -143,6 +525,105 @@ def test_sqlite_repository_persists_after_reopening(tmp_path):
     second.close()
 
 
+def test_executor_repository_round_trips_game_off_the_event_loop():
+    repository = SQLiteGameRepository(":memory:")
+    async_repository = ExecutorGameRepository(repository)
+    state = State(player_name="Iris")
+
+    async def scenario():
+        await async_repository.save_game(state)
+        await async_repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+        moment = await async_repository.add_moment(state._id, "A moment.", b"image-bytes")
+        return (
+            await async_repository.get_game(state._id),
+            await async_repository.get_image_bytes(state._id),
+            await async_repository.list_moments(state._id),
+            await async_repository.all_games(),
+            moment,
+        )
+
+    loaded, image_bytes, moments, games, moment = asyncio.run(scenario())
+    asyncio.run(async_repository.close())
+
+    assert loaded.player_name == "Iris"
+    assert loaded.revision == 1
+    assert image_bytes == (b"portrait", b"backdrop")
+    assert moments == [(moment, b"image-bytes")]
+    assert games == [loaded]
+
+
+def test_executor_repository_runs_writes_on_a_single_writer_thread():
+    writer_threads = set()
+
+    class RecordingRepository:
+        def save_game(self, state):
+            writer_threads.add(threading.current_thread().name)
+
+    async_repository = ExecutorGameRepository(RecordingRepository(), reader_threads=2)
+
+    async def scenario():
+        await asyncio.gather(*(async_repository.save_game(State()) for _ in range(8)))
+
+    asyncio.run(scenario())
+    asyncio.run(async_repository.close())
+
+    assert len(writer_threads) == 1
+    assert next(iter(writer_threads)).startswith("cya-db-writer")
+
+
+def test_executor_repository_requires_a_reader_thread():
+    with pytest.raises(ValueError):
+        ExecutorGameRepository(SQLiteGameRepository(":memory:"), reader_threads=0)
+
+
+def test_sqlite_reader_pool_reads_without_waiting_for_the_writer_lock(tmp_path):
+    repository = SQLiteGameRepository(tmp_path / "cya.db", reader_pool_size=2)
+    state = State(player_name="Iris", chat_history=[{"role": "user", "content": "Go."}])
+    repository.save_game(state)
+    repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+    results = []
+
+    with repository._lock:
+        reader = threading.Thread(
+            target=lambda: results.append(
+                (repository.get_game(state._id), repository.get_image_bytes(state._id))
+            )
+        )
+        reader.start()
+        reader.join(timeout=5)
+
+    assert not reader.is_alive()
+    loaded, image_bytes = results[0]
+    assert loaded.player_name == "Iris"
+    assert loaded.chat_history == state.chat_history
+    assert image_bytes == (b"portrait", b"backdrop")
+    repository.close()
+
+
+def test_sqlite_reader_connections_are_read_only_and_tuned(tmp_path):
+    repository = SQLiteGameRepository(
+        tmp_path / "cya.db",
+        reader_pool_size=1,
+        mmap_size_bytes=1024 * 1024,
+        cache_size_kib=2048,
+    )
+
+    with repository._reader() as connection:
+        assert connection is not repository._connection
+        assert connection.execute("PRAGMA mmap_size").fetchone()[0] == 1024 * 1024
+        assert connection.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM games")
+    repository.close()
+
+
+def test_sqlite_in_memory_repository_reads_through_the_writer_connection():
+    repository = SQLiteGameRepository(":memory:", reader_pool_size=4)
+
+    with repository._reader() as connection:
+        assert connection is repository._connection
+
+
 def test_repository_factory_defaults_to_sqlite(monkeypatch, tmp_path):
     monkeypatch.delenv("CYA_STORAGE_BACKEND", raising=False)
     monkeypatch.setenv("CYA_SQLITE_PATH", str(tmp_path / "default.db"))
@@ -166,3 +647,81 @@ def test_mongodb_repository_reports_missing_configuration(monkeypatch):
 
     with pytest.raises(RuntimeError, match="MONGODB_CONNECTION_STRING.*CLUSTER.*COLLECTION"):
         MongoGameRepository()
+
+
+def apply_mongo_update(document, update):
+    """Apply the update operators ``mongo_state_update`` emits, the way MongoDB would."""
+    document = json.loads(json.dumps(document, default=str))
+    for path, value in update.get("$set", {}).items():
+        *parents, key = path.split(".")
+        target = document
+        for parent in parents:
+            target = target[parent]
+        target[key] = value
+    for path, value in update.get("$push", {}).items():
+        document.setdefault(path, []).extend(value["$each"])
+    for path in update.get("$unset", {}):
+        document.pop(path, None)
+    for path, amount in update["$inc"].items():
+        document[path] += amount
+    return json.loads(json.dumps(document, default=str))
+
+
+def test_mongo_state_update_pushes_new_messages_and_sets_changed_world_fields():
+    state = State(
+        _id="game-1",
+        player_name="Iris",
+        chat_history=[{"role": "user", "content": "Go."}] * 30,
+        world_state=WorldState(current_location="gate", known_npcs={"Ada": "smith"}),
+    )
+    stored = state.to_primitive()
+    baseline = MongoStateBaseline.of(state.revision, stored)
+    state.chat_history.append({"role": "assistant", "content": "You walk."})
+    state.world_state.current_location = "market"
+    state.hit_points = 4
+
+    update = mongo_state_update(baseline, state.to_primitive())
+
+    assert update == {
+        "$inc": {"revision": 1},
+        "$set": {"world_state.current_location": "market", "hit_points": 4},
+        "$push": {"chat_history": {"$each": [{"role": "assistant", "content": "You walk."}]}},
+    }
+    expected = {**state.to_primitive(), "revision": state.revision + 1}
+    assert apply_mongo_update(stored, update) == json.loads(json.dumps(expected, default=str))
+
+
+def test_mongo_state_update_replaces_legacy_fields_and_shortened_history():
+    state = State(_id="game-1", chat_history=[{"role": "user", "content": "Go."}] * 3)
+    stored = state.serialize()
+    stored["world_state"]["active_quests"] = ["find the lantern"]
+    stored["legacy_field"] = True
+    state.chat_history = state.chat_history[:1]
+
+    update = mongo_state_update(MongoStateBaseline.of(state.revision, stored), state.to_primitive())
+
+    assert update["$unset"] == {"legacy_field": ""}
+    assert update["$set"]["world_state"] == state.world_state.to_primitive()
+    assert update["$set"]["chat_history"] == state.chat_history
+    assert "$push" not in update
+    expected = {**state.to_primitive(), "revision": state.revision + 1}
+    assert apply_mongo_update(stored, update) == json.loads(json.dumps(expected, default=str))
+
+
+def test_mongo_state_update_without_a_baseline_sets_the_whole_document():
+    document = State(_id="game-1", revision=3).to_primitive()
+
+    update = mongo_state_update(None, document)
+
+    assert update["$inc"] == {"revision": 1}
+    assert set(update["$set"]) == set(document) - {"_id", "revision"}
+
+
+def test_mongo_state_baseline_is_independent_of_later_mutation():
+    state = State(world_state=WorldState(world_flags={"door": {"open": False}}))
+    document = state.to_primitive()
+    baseline = MongoStateBaseline.of(0, document)
+    state.world_state.world_flags["door"]["open"] = True
+
+    assert baseline.document["world_state"]["world_flags"] == {"door": {"open": False}}
+    assert "world_state.world_flags" in mongo_state_update(baseline, state.to_primitive())["$set"]
@@ -0,0 +1,143 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from classes import InventoryItem, State, WorldState
+from database import RevisionConflictError, SQLiteGameRepository
+from game_cache import CachedGameRepository, create_cached_game_repository
+
+
+class CountingRepository(SQLiteGameRepository):
+    def __init__(self) -> None:
+        super().__init__(":memory:")
+        self.get_game_calls = 0
+
+    def get_game(self, game_id: str) -> State | None:
+        self.get_game_calls += 1
+        return super().get_game(game_id)
+
+
+def saved_game(repository, player_name="Iris") -> State:
+    state = State(
+        player_name=player_name,
+        chat_history=[{"role": "user", "content": "Go."}],
+        world_state=WorldState(inventory=[InventoryItem(name="torch")]),
+    )
+    repository.save_game(state)
+    return state
+
+
+def test_cache_serves_repeated_reads_without_decoding_again():
+    storage = CountingRepository()
+    repository = CachedGameRepository(storage)
+    state = saved_game(repository)
+
+    first = repository.get_game(state._id)
+    second = repository.get_game(state._id)
+
+    assert first == second == state
+    assert first is not second
+    assert storage.get_game_calls == 0
+    assert repository.hits == 2
+
+
+def test_hit_counter_is_exact_under_concurrent_readers():
+    repository = CachedGameRepository(CountingRepository())
+    state = saved_game(repository)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: repository.get_game(state._id), range(400)))
+
+    assert repository.hits == 400
+    assert repository.misses == 0
+
+
+def test_cache_hands_out_copies_that_callers_can_mutate():
+    repository = CachedGameRepository(CountingRepository())
+    state = saved_game(repository)
+
+    loaded = repository.get_game(state._id)
+    loaded.chat_history.append({"role": "assistant", "content": "A door."})
+    loaded.world_state.inventory.clear()
+
+    reloaded = repository.get_game(state._id)
+    assert reloaded.chat_history == [{"role": "user", "content": "Go."}]
+    assert len(reloaded.world_state.inventory) == 1
+
+
+def test_cache_reloads_when_another_process_saved_a_newer_revision():
+    storage = CountingRepository()
+    repository = CachedGameRepository(storage)
+    state = saved_game(repository)
+    repository.get_game(state._id)
+
+    other_worker_copy = storage.get_game(state._id)
+    other_worker_copy.player_name = "Morgan"
+    storage.save_game(other_worker_copy)
+    calls_before = storage.get_game_calls
+
+    loaded = repository.get_game(state._id)
+
+    assert loaded.player_name == "Morgan"
+    assert loaded.revision == 1
+    assert storage.get_game_calls == calls_before + 1
+
+
+def test_cache_caches_the_saved_revision():
+    repository = CachedGameRepository(CountingRepository())
+    state = saved_game(repository)
+    state.player_name = "Morgan"
+    repository.save_game(state)
+
+    loaded = repository.get_game(state._id)
+
+    assert loaded.player_name == "Morgan"
+    assert loaded.revision == 1
+    assert repository.hits == 1
+
+
+def test_cache_invalidates_on_revision_conflict():
+    repository = CachedGameRepository(CountingRepository())
+    state = saved_game(repository)
+    stale = repository.get_game(state._id)
+    repository.save_game(state)
+
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(stale)
+
+    assert repository.get_game(state._id).revision == 1
+    assert repository.misses == 1
+
+
+def test_cache_forgets_deleted_games():
+    repository = CachedGameRepository(CountingRepository())
+    state = saved_game(repository)
+
+    assert repository.delete_game(state._id) is True
+    assert repository.get_game(state._id) is None
+
+
+def test_cache_evicts_least_recently_used_games():
+    storage = CountingRepository()
+    repository = CachedGameRepository(storage, max_entries=2)
+    first = saved_game(repository, "First")
+    second = saved_game(repository, "Second")
+    repository.get_game(first._id)
+    saved_game(repository, "Third")
+
+    repository.get_game(first._id)
+    assert storage.get_game_calls == 0
+    repository.get_game(second._id)
+    assert storage.get_game_calls == 1
+
+
+def test_cached_repository_factory_can_be_disabled(monkeypatch):
+    storage = CountingRepository()
+
+    monkeypatch.setenv("CYA_GAME_CACHE_SIZE", "0")
+    assert create_cached_game_repository(storage) is storage
+
+    monkeypatch.setenv("CYA_GAME_CACHE_SIZE", "8")
+    cached = create_cached_game_repository(storage)
+    assert isinstance(cached, CachedGameRepository)
+    assert cached.max_entries == 8
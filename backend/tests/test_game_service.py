@@ -1,15 +1,16 @@
 import asyncio
 from copy import deepcopy
+from time import perf_counter
 from types import SimpleNamespace
-from typing import Any
+from typing import Any, AsyncIterator
 
 import pytest
 
 from classes import InventoryItem, PlayerAttributes, Quest, Sender, State, StoryMoment, WorldState
-from database import RevisionConflictError
-from game_service import GameService
+from database import ExecutorGameRepository, RevisionConflictError
+from game_service import GameService, TurnStreamEvent
 from images import Image
-from llm import LLMResponseError, LLMTransientError
+from llm import LLMCallResult, LLMResponseError, LLMTransientError, publish_llm_call, remaining_llm_budget
 from llm_results import ActionAssessment, MomentPackage, NarrationResult, StateDelta, StorySummaryResult
 from observability import InMemoryTraceRecorder
 
@@ -108,8 +109,6 @@ class FakeLLMClient:
         self.image_bytes = image_bytes
         self.text_model = "fake-text-model"
         self.retry_config = SimpleNamespace(retry_limit=2)
-        self.last_retry_count = 0
-        self.last_token_usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
         self.structured_models: list[type[Any]] = []
         self.structured_message_models: list[type[Any]] = []
         self.structured_prompts: list[tuple[str, str, type[Any]]] = []
@@ -117,7 +116,18 @@ class FakeLLMClient:
         self.text_calls: list[tuple[str, str]] = []
         self.image_calls: list[tuple[str, str]] = []
 
+    def _publish_call(self) -> None:
+        publish_llm_call(
+            LLMCallResult(
+                model=self.text_model,
+                started_at=perf_counter(),
+                latency_ms=1.0,
+                token_usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            )
+        )
+
     def text(self, system: str, user: str, temperature: float = 0.0) -> str:
+        self._publish_call()
         self.text_calls.append((system, user))
         return self.game_over_summary
 
@@ -140,6 +150,7 @@ class FakeLLMClient:
         response_model: type[Any],
         temperature: float = 0.0,
     ) -> Any:
+        self._publish_call()
         self.structured_models.append(response_model)
         self.structured_prompts.append((system, user, response_model))
         if response_model is ActionAssessment:
@@ -177,6 +188,7 @@ class FakeLLMClient:
         response_model: type[Any],
         temperature: float = 0.0,
     ) -> Any:
+        self._publish_call()
         self.structured_message_models.append(response_model)
         self.messages_calls.append(deepcopy(messages))
         if response_model is NarrationResult:
@@ -191,6 +203,17 @@ class FakeLLMClient:
             )
         raise AssertionError(f"unexpected structured message response model: {response_model!r}")
 
+    async def async_stream_structured_messages(
+        self,
+        messages: list[dict[str, str]],
+        response_model: type[Any],
+        temperature: float = 0.0,
+    ) -> AsyncIterator[str]:
+        narration = await self.async_structured_messages(messages, response_model, temperature)
+        raw = narration.model_dump_json()
+        for start in range(0, len(raw), 7):
+            yield raw[start : start + 7]
+
     async def generate_image_url(self, prompt: str, size: str) -> str:
         return ""
 
@@ -238,6 +261,47 @@ def test_play_turn_success_updates_history_applies_damage_and_saves():
     assert len(llm_client.messages_calls) == 1
 
 
+def test_play_turn_gives_every_model_call_the_shared_turn_deadline():
+    budgets = []
+
+    class BudgetRecordingLLMClient(FakeLLMClient):
+        async def async_structured(self, system, user, response_model, temperature=0.0):
+            budgets.append(remaining_llm_budget())
+            return await super().async_structured(system, user, response_model, temperature)
+
+        async def async_structured_messages(self, messages, response_model, temperature=0.0):
+            budgets.append(remaining_llm_budget())
+            return await super().async_structured_messages(messages, response_model, temperature)
+
+    state = State(_id="game-1", hit_points=5, chat_history=[{"role": "system", "content": "setup"}])
+    service = GameService(FakeRepository({"game-1": state}), BudgetRecordingLLMClient(), turn_deadline_seconds=20)
+
+    result = run_turn(service, "game-1", "Look around.")
+
+    assert result.status_code == 200
+    assert len(budgets) == 2
+    assert all(0 < budget <= 20 for budget in budgets)
+    assert budgets[1] <= budgets[0]
+    assert remaining_llm_budget() is None
+
+
+def test_play_turn_uses_async_repository_when_provided():
+    state = State(_id="game-1", hit_points=5, chat_history=[{"role": "system", "content": "setup"}])
+    sync_repository = FakeRepository()
+    repository = FakeRepository({"game-1": state})
+    async_repository = ExecutorGameRepository(repository)
+    service = GameService(sync_repository, FakeLLMClient(), async_repository=async_repository)
+
+    result = run_turn(service, "game-1", "Look around.")
+    asyncio.run(async_repository.close())
+
+    assert result.status_code == 200
+    assert repository.get_game_calls == ["game-1"]
+    assert repository.saved_states == [state]
+    assert sync_repository.get_game_calls == []
+    assert sync_repository.saved_states == []
+
+
 def test_play_turn_records_correlated_stage_traces_without_raw_player_text():
     state = State(_id="game-1", hit_points=5, chat_history=[{"role": "system", "content": "setup"}])
     repository = FakeRepository({"game-1": state})
@@ -283,6 +347,52 @@ def test_play_turn_records_correlated_stage_traces_without_raw_player_text():
     assert trace_recorder.turn_traces[0].status == "success"
 
 
+class SlowRetriedAssessmentLLMClient(FakeLLMClient):
+    """Assessments of climbing take longer and report retries, so they finish after concurrent turns' calls."""
+
+    async def async_structured(self, system, user, response_model, temperature=0.0):
+        if response_model is ActionAssessment and "Climb" in user:
+            started_at = perf_counter()
+            await asyncio.sleep(0.05)
+            publish_llm_call(
+                LLMCallResult(
+                    model=self.text_model,
+                    started_at=started_at,
+                    latency_ms=50.0,
+                    token_usage={"prompt_tokens": 90, "completion_tokens": 0, "total_tokens": 90},
+                    retry_count=2,
+                )
+            )
+        return await super().async_structured(system, user, response_model, temperature)
+
+
+def test_concurrent_turns_trace_only_their_own_llm_calls():
+    repository = FakeRepository(
+        {
+            game_id: State(_id=game_id, hit_points=5, chat_history=[{"role": "system", "content": "setup"}])
+            for game_id in ("game-1", "game-2")
+        }
+    )
+    trace_recorder = InMemoryTraceRecorder()
+    service = GameService(repository, SlowRetriedAssessmentLLMClient(), trace_recorder=trace_recorder)
+
+    async def scenario():
+        return await asyncio.gather(
+            service.play_turn("game-1", "Climb the wall."), service.play_turn("game-2", "Wait.")
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [result.status_code for result in results] == [200, 200]
+    assessments = {trace.game_id: trace for trace in trace_recorder.traces if trace.stage == "action_assessment"}
+    assert assessments["game-1"].retry_count == 2
+    assert assessments["game-1"].token_usage == {"prompt_tokens": 100, "completion_tokens": 5, "total_tokens": 105}
+    assert assessments["game-1"].llm_latency_ms == 51.0
+    assert assessments["game-2"].retry_count == 0
+    assert assessments["game-2"].token_usage == {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    assert assessments["game-2"].llm_latency_ms == 1.0
+
+
 def test_play_turn_records_rejected_assessment_trace_without_narration():
     state = State(_id="game-1", chat_history=[])
     repository = FakeRepository({"game-1": state})
@@ -791,6 +901,83 @@ def test_play_turn_maps_malformed_narration_failure_to_safe_error_without_saving
     assert repository.saved_states == []
 
 
+def stream_events(service: GameService, game_id: str | None, content: str) -> list[TurnStreamEvent]:
+    async def collect() -> list[TurnStreamEvent]:
+        return [event async for event in service.stream_turn(game_id, content)]
+
+    return asyncio.run(collect())
+
+
+def test_stream_turn_yields_narration_deltas_before_saving_the_result():
+    state = State(_id="game-1", hit_points=5, chat_history=[{"role": "system", "content": "setup"}])
+    repository = FakeRepository({"game-1": state})
+    llm_client = FakeLLMClient(narration='A "bridge" appears.\nIt sways.', damage=2)
+    trace_recorder = InMemoryTraceRecorder()
+
+    events = stream_events(GameService(repository, llm_client, trace_recorder=trace_recorder), "game-1", "Look around.")
+
+    deltas = [event.delta for event in events[:-1]]
+    assert len(deltas) > 1
+    assert "".join(deltas) == 'A "bridge" appears.\nIt sways.'
+    result = events[-1].result
+    assert result is not None
+    assert result.status_code == 200
+    assert result.content == 'A "bridge" appears.\nIt sways.'
+    assert result.hit_points == 3
+    assert state.chat_history[-1] == {"role": "assistant", "content": 'A "bridge" appears.\nIt sways.'}
+    assert repository.saved_states == [state]
+    narration_trace = trace_recorder.traces[1]
+    assert narration_trace.stage == "narration"
+    assert narration_trace.metadata == {"streamed": True}
+    assert narration_trace.token_usage == {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    assert [trace.status for trace in trace_recorder.turn_traces] == ["success"]
+
+
+def test_stream_turn_returns_rejection_without_streaming():
+    state = State(_id="game-1", chat_history=[])
+    repository = FakeRepository({"game-1": state})
+    llm_client = FakeLLMClient(relevant=False)
+
+    events = stream_events(GameService(repository, llm_client), "game-1", "Sing to the moon.")
+
+    assert len(events) == 1
+    assert events[0].delta is None
+    assert events[0].result is not None
+    assert llm_client.structured_message_models == []
+
+
+def test_stream_turn_maps_narration_failure_to_safe_error_without_saving():
+    state = State(_id="game-1", chat_history=[])
+    repository = FakeRepository({"game-1": state})
+    llm_client = FakeLLMClient(narration_error=LLMResponseError("bad structured output"))
+
+    events = stream_events(GameService(repository, llm_client), "game-1", "Look around.")
+
+    assert len(events) == 1
+    result = events[0].result
+    assert result is not None
+    assert result.status_code == 502
+    assert "bad structured output" not in result.content
+    assert state.chat_history == []
+    assert repository.saved_states == []
+
+
+def test_stream_turn_rejects_malformed_streamed_narration():
+    class TruncatingLLMClient(FakeLLMClient):
+        async def async_stream_structured_messages(self, messages, response_model, temperature=0.0):
+            yield '{"content": "A path op'
+
+    state = State(_id="game-1", chat_history=[])
+    repository = FakeRepository({"game-1": state})
+
+    events = stream_events(GameService(repository, TruncatingLLMClient()), "game-1", "Look around.")
+
+    assert [event.delta for event in events[:-1]] == ["A path op"]
+    assert events[-1].result is not None
+    assert events[-1].result.status_code == 502
+    assert repository.saved_states == []
+
+
 @pytest.mark.parametrize(
     ("game_id", "expected_content"),
     [
@@ -1,25 +1,45 @@
 import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 from types import SimpleNamespace
 
 import httpx
 import pytest
-from openai import RateLimitError
+from openai import APIConnectionError, RateLimitError
 
 from llm import (
+    LLMCallResult,
+    LLMCircuitOpenError,
+    LLMDeadlineExceededError,
     LLMResponseError,
     LLMTransientError,
+    OpenAILLMClient,
     RetryConfig,
+    StreamedStringField,
     _async_run_with_retries,
     _is_retryable_exception,
     _parsed_or_raise,
+    _retry_after_seconds,
+    _retry_delay,
     _run_with_retries,
     _token_usage_from_response,
+    capture_llm_calls,
+    deadline_after,
+    llm_deadline,
+    publish_llm_call,
+    remaining_llm_budget,
 )
+from llm_results import NarrationResult
+from rate_limit import LLMRateLimiter
+from resilience import CircuitBreaker
 
 
-def rate_limit_error() -> RateLimitError:
+def rate_limit_error(headers: dict[str, str] | None = None) -> RateLimitError:
     request = httpx.Request("POST", "https://api.openai.test/responses")
-    response = httpx.Response(429, request=request)
+    response = httpx.Response(429, request=request, headers=headers)
     return RateLimitError("rate limited", response=response, body=None)
 
 
@@ -80,6 +100,124 @@ def test_run_with_retries_does_not_retry_validation_failures():
     assert attempts == 1
 
 
+def test_retry_delay_uses_full_jitter_capped_at_max_delay(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    config = RetryConfig(base_delay_seconds=0.5, max_delay_seconds=3)
+
+    delays = [_retry_delay(config, attempt) for attempt in range(4)]
+
+    assert delays == [0.5, 1.0, 2.0, 3]
+    assert all(low == 0 for low, _ in bounds)
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"retry-after": "2"}, 2.0),
+        ({"retry-after": "soon"}, None),
+        ({}, None),
+    ],
+)
+def test_retry_after_is_read_from_the_provider_response(headers, expected):
+    assert _retry_after_seconds(rate_limit_error(headers)) == expected
+
+
+def test_retry_after_accepts_http_dates():
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+
+    assert 25 < _retry_after_seconds(rate_limit_error({"retry-after": retry_at})) <= 30
+
+
+def test_retry_delay_waits_out_retry_after_but_gives_up_on_long_hints(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: 0.0)
+    config = RetryConfig(base_delay_seconds=0.25, max_delay_seconds=5)
+
+    assert _retry_delay(config, 0, rate_limit_error({"retry-after": "3"})) == 3.0
+    assert _retry_delay(config, 0, rate_limit_error({"retry-after": "30"})) is None
+
+
+def test_run_with_retries_honors_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    monkeypatch.setattr(random, "uniform", lambda low, high: 0.0)
+    attempts = 0
+
+    def operation():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise rate_limit_error({"retry-after-ms": "750"})
+        return "ok"
+
+    assert _run_with_retries(operation, RetryConfig(retry_limit=2)) == "ok"
+    assert sleeps == [0.75]
+
+
+def test_run_with_retries_does_not_start_after_the_deadline():
+    calls = []
+
+    with pytest.raises(LLMDeadlineExceededError):
+        _run_with_retries(lambda: calls.append("call"), RetryConfig(), deadline=time.monotonic() - 1)
+
+    assert calls == []
+
+
+def test_run_with_retries_stops_when_the_backoff_would_pass_the_deadline(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    attempts = 0
+
+    def operation():
+        nonlocal attempts
+        attempts += 1
+        raise rate_limit_error({"retry-after": "2"})
+
+    with llm_deadline(deadline_after(1)):
+        with pytest.raises(LLMTransientError):
+            _run_with_retries(operation, RetryConfig(retry_limit=3))
+
+    assert attempts == 1
+    assert sleeps == []
+
+
+def test_async_run_with_retries_uses_the_current_deadline():
+    calls = []
+
+    async def operation():
+        calls.append("call")
+        return "ok"
+
+    async def scenario():
+        with llm_deadline(time.monotonic() - 1):
+            await _async_run_with_retries(operation, RetryConfig())
+
+    with pytest.raises(LLMDeadlineExceededError):
+        asyncio.run(scenario())
+    assert calls == []
+
+
+def test_nested_deadlines_never_extend_the_outer_budget():
+    assert remaining_llm_budget() is None
+
+    with llm_deadline(deadline_after(5)):
+        with llm_deadline(deadline_after(60)):
+            assert 0 < remaining_llm_budget() <= 5
+        with llm_deadline(None):
+            assert 0 < remaining_llm_budget() <= 5
+
+    assert remaining_llm_budget() is None
+
+
+def test_request_timeout_is_shortened_to_the_remaining_budget():
+    client = OpenAILLMClient(api_key="test-key", timeout_seconds=30)
+
+    assert client._request_timeout() == 30
+    with llm_deadline(deadline_after(2)):
+        assert 0 < client._request_timeout() <= 2
+
+
 def test_parsed_or_raise_maps_empty_structured_output_to_response_error():
     with pytest.raises(LLMResponseError):
         _parsed_or_raise(None)
@@ -115,3 +253,158 @@ def test_async_run_with_retries_returns_after_retryable_failure_then_success():
 
     assert result == "ok"
     assert attempts == 2
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1000])
+def test_streamed_string_field_decodes_value_across_fragments(chunk_size):
+    content = 'He said "run"\\now\n\u00e9 \U0001f409 done'
+    raw = json.dumps({"meta": {"content": "nested"}, "content": content, "state_delta": {"operations": []}})
+    field = StreamedStringField("content")
+
+    decoded = "".join(field.feed(raw[start : start + chunk_size]) for start in range(0, len(raw), chunk_size))
+
+    assert decoded == content
+
+
+def test_openai_client_routes_provider_responses_to_the_matching_rate_limiter():
+    client = OpenAILLMClient(api_key="test-key")
+
+    def response(path: str, status_code: int) -> SimpleNamespace:
+        return SimpleNamespace(
+            request=SimpleNamespace(url=httpx.URL(f"https://api.openai.test/v1{path}")),
+            status_code=status_code,
+            headers={"x-ratelimit-limit-requests": "50"},
+        )
+
+    client._observe_response(response("/images/generations", 429))
+    asyncio.run(client._async_observe_response(response("/chat/completions", 200)))
+
+    stats = client.rate_limit_stats()
+    assert stats["image"]["rate_limited_responses"] == 1
+    assert stats["image"]["requests_per_minute"] == 50
+    assert stats["text"]["rate_limited_responses"] == 0
+    assert stats["text"]["requests_per_minute"] == 50
+
+
+def test_open_circuit_fails_fast_without_calling_the_provider():
+    breaker = CircuitBreaker("gpt-test", failure_threshold=2)
+    client = OpenAILLMClient(api_key="test-key", text_circuit_breaker=breaker)
+    calls = []
+
+    def unavailable():
+        calls.append("call")
+        raise APIConnectionError(request=httpx.Request("POST", "https://api.openai.test/chat/completions"))
+
+    attempt = client._guarded(client._text_guard, 0, unavailable)
+    with pytest.raises(LLMTransientError):
+        _run_with_retries(attempt, RetryConfig(retry_limit=1, base_delay_seconds=0))
+    with pytest.raises(LLMCircuitOpenError):
+        _run_with_retries(attempt, RetryConfig(retry_limit=1, base_delay_seconds=0))
+
+    assert calls == ["call", "call"]
+    assert client.circuit_states()["gpt-test"] == "open"
+
+
+def test_rate_limited_calls_do_not_open_the_circuit():
+    breaker = CircuitBreaker("gpt-test", failure_threshold=1)
+    client = OpenAILLMClient(api_key="test-key", text_circuit_breaker=breaker)
+
+    def rate_limited():
+        raise rate_limit_error()
+
+    with pytest.raises(LLMTransientError):
+        _run_with_retries(client._guarded(client._text_guard, 0, rate_limited), RetryConfig(base_delay_seconds=0))
+
+    assert breaker.state == "closed"
+
+
+def test_client_publishes_usage_and_retries_of_each_call():
+    client = OpenAILLMClient(api_key="test-key", retry_base_delay_seconds=0)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise TimeoutError("timed out")
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=11, completion_tokens=7, total_tokens=18))
+
+    async def scenario():
+        with capture_llm_calls() as calls:
+            await client._async_call(client.text_model, flaky)
+        return calls
+
+    [call] = asyncio.run(scenario())
+
+    assert call.model == client.text_model
+    assert call.retry_count == 1
+    assert call.token_usage == {"prompt_tokens": 11, "completion_tokens": 7, "total_tokens": 18}
+    assert call.latency_ms >= 0
+    assert call.cached is False
+
+
+def test_captured_calls_are_scoped_to_each_concurrent_request():
+    async def request(name: str, delay: float) -> list[LLMCallResult]:
+        with capture_llm_calls() as calls:
+            await asyncio.sleep(delay)
+            publish_llm_call(LLMCallResult(model=name, started_at=time.perf_counter(), latency_ms=delay * 1000))
+        return calls
+
+    async def scenario():
+        return await asyncio.gather(request("slow", 0.02), request("fast", 0))
+
+    slow, fast = asyncio.run(scenario())
+
+    assert [call.model for call in slow] == ["slow"]
+    assert [call.model for call in fast] == ["fast"]
+    publish_llm_call(LLMCallResult(model="uncaptured", started_at=0.0, latency_ms=0.0))
+
+
+def test_stream_that_never_opens_still_publishes_its_retries():
+    client = OpenAILLMClient(api_key="test-key", retry_limit=1, retry_base_delay_seconds=0)
+    attempts = []
+
+    def stream(**kwargs):
+        attempts.append(kwargs["model"])
+        raise TimeoutError("timed out")
+
+    completions = SimpleNamespace(stream=stream)
+    client._async_client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    async def scenario():
+        with capture_llm_calls() as calls:
+            with pytest.raises(LLMTransientError):
+                async for _ in client.async_stream_structured_messages([], NarrationResult):
+                    pass
+        return calls
+
+    [call] = asyncio.run(scenario())
+
+    assert len(attempts) == 2
+    assert call.retry_count == 1
+    assert call.token_usage is None
+
+
+def test_rate_limiter_waits_end_at_the_turn_deadline():
+    limiter = LLMRateLimiter("text", max_concurrency=1)
+    client = OpenAILLMClient(api_key="test-key", text_rate_limiter=limiter)
+    calls = []
+
+    async def operation():
+        calls.append("call")
+
+    async def scenario():
+        held = await limiter.async_acquire()
+        try:
+            with llm_deadline(deadline_after(0.05)):
+                await client._async_call(client.text_model, client._async_guarded(client._text_guard, 0, operation))
+        finally:
+            held.release()
+
+    started_at = time.monotonic()
+    with pytest.raises(LLMDeadlineExceededError):
+        asyncio.run(scenario())
+
+    assert time.monotonic() - started_at < 1
+    assert calls == []
+    assert limiter.stats()["queue_depth"] == 0
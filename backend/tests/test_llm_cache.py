@@ -0,0 +1,201 @@
+import asyncio
+import time
+
+import pytest
+
+from llm import LLMCallResult, OpenAILLMClient, capture_llm_calls, publish_llm_call
+from llm_cache import (
+    CACHE_HIT_TOKEN_USAGE,
+    CachedLLMClient,
+    LLMResponseCache,
+    SQLiteLLMResponseStore,
+    create_cached_llm_client,
+)
+from llm_results import ActionAssessment, StartingStateResult, StorySummaryResult
+
+
+class CountingLLMClient:
+    def __init__(self, delay_seconds: float = 0.0) -> None:
+        self.delay_seconds = delay_seconds
+        self.text_model = "test-model"
+        self.calls: list[type] = []
+
+    def _result(self, response_model):
+        self.calls.append(response_model)
+        publish_llm_call(
+            LLMCallResult(
+                model=self.text_model,
+                started_at=time.perf_counter(),
+                latency_ms=self.delay_seconds * 1000,
+                token_usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                retry_count=1,
+            )
+        )
+        if response_model is ActionAssessment:
+            return ActionAssessment(relevant=True, realistic=True, damage=len(self.calls) % 5)
+        return StorySummaryResult(story_summary=f"summary {len(self.calls)}")
+
+    def structured(self, system, user, response_model, temperature=0.0):
+        return self._result(response_model)
+
+    async def async_structured(self, system, user, response_model, temperature=0.0):
+        await asyncio.sleep(self.delay_seconds)
+        return self._result(response_model)
+
+    async def async_structured_messages(self, messages, response_model, temperature=0.0):
+        await asyncio.sleep(self.delay_seconds)
+        return self._result(response_model)
+
+    async def async_stream_structured_messages(self, messages, response_model, temperature=0.0):
+        raw = self._result(response_model).model_dump_json()
+        for start in range(0, len(raw), 4):
+            yield raw[start : start + 4]
+
+    async def async_text(self, system, user, temperature=0.0):
+        self.calls.append(str)
+        return "text"
+
+
+def cached_client(inner, stages=("action_assessment",), **options):
+    return CachedLLMClient(inner, LLMResponseCache(**options), set(stages))
+
+
+def test_repeated_structured_calls_are_answered_from_the_cache():
+    inner = CountingLLMClient()
+    client = cached_client(inner)
+
+    async def scenario():
+        with capture_llm_calls() as calls:
+            first = await client.async_structured("system", "I climb the wall.", ActionAssessment)
+            repeat = await client.async_structured("system", "I climb the wall.", ActionAssessment)
+            other = await client.async_structured("system", "I swim the moat.", ActionAssessment)
+        return first, repeat, other, calls
+
+    first, repeat, other, calls = asyncio.run(scenario())
+
+    assert repeat == first
+    assert repeat is not first
+    assert other != first
+    assert inner.calls == [ActionAssessment, ActionAssessment]
+    assert client.stats() == {"action_assessment": {"hits": 1, "misses": 2}}
+    assert [(call.cached, call.retry_count) for call in calls] == [(False, 1), (True, 0), (False, 1)]
+
+
+def test_cache_hits_report_zero_tokens_and_retries():
+    client = cached_client(CountingLLMClient())
+    client.structured("system", "user", ActionAssessment)
+    with capture_llm_calls() as calls:
+        client.structured("system", "user", ActionAssessment)
+
+    [hit] = calls
+    assert hit.token_usage == CACHE_HIT_TOKEN_USAGE
+    assert hit.retry_count == 0
+    assert hit.model == "test-model"
+
+
+def test_only_enabled_stages_and_deterministic_calls_are_cached():
+    inner = CountingLLMClient()
+    client = cached_client(inner)
+
+    async def scenario():
+        for _ in range(2):
+            await client.async_structured("system", "user", StorySummaryResult)
+            await client.async_structured("system", "user", ActionAssessment, temperature=0.7)
+            await client.async_text("system", "user")
+
+    asyncio.run(scenario())
+
+    assert inner.calls == [StorySummaryResult, ActionAssessment, str] * 2
+    with pytest.raises(ValueError, match="Unknown LLM cache stages"):
+        cached_client(inner, stages=("narrator",))
+
+
+def test_concurrent_identical_calls_share_one_provider_request():
+    inner = CountingLLMClient(delay_seconds=0.05)
+    client = cached_client(inner)
+
+    async def scenario():
+        messages = [{"role": "user", "content": "I open the door."}]
+        return await asyncio.gather(*(client.async_structured_messages(messages, ActionAssessment) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+
+    assert len(inner.calls) == 1
+    assert results[0] == results[1] == results[2]
+    assert client.stats()["action_assessment"] == {"hits": 2, "misses": 1}
+
+
+def test_entries_expire_after_their_ttl_and_the_lru_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.put("c", "3")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+    now[0] += 61
+    assert cache.get("b") is None
+
+
+def test_sqlite_store_serves_responses_to_a_fresh_process(tmp_path):
+    path = tmp_path / "llm-cache.db"
+    inner = CountingLLMClient()
+    first = cached_client(inner, store=SQLiteLLMResponseStore(path))
+    first.structured("system", "user", ActionAssessment)
+    first.cache.close()
+
+    second = cached_client(inner, store=SQLiteLLMResponseStore(path))
+    second.structured("system", "user", ActionAssessment)
+
+    assert inner.calls == [ActionAssessment]
+    assert second.stats()["action_assessment"] == {"hits": 1, "misses": 0}
+    second.cache.close()
+
+
+def test_create_cached_llm_client_is_enabled_per_stage(monkeypatch, tmp_path):
+    inner = CountingLLMClient()
+    monkeypatch.delenv("CYA_LLM_CACHE_STAGES", raising=False)
+    assert create_cached_llm_client(inner) is inner
+
+    monkeypatch.setenv("CYA_LLM_CACHE_STAGES", "chargen, action_assessment")
+    monkeypatch.setenv("CYA_LLM_CACHE_PATH", str(tmp_path / "llm-cache.db"))
+    client = create_cached_llm_client(inner)
+
+    assert isinstance(client, CachedLLMClient)
+    assert set(client.stats()) == {"chargen", "action_assessment"}
+    assert client._cached_stage(StartingStateResult, 0.0) == "chargen"
+    client.cache.close()
+
+
+def test_cached_client_forwards_rate_limit_and_circuit_state():
+    inner = OpenAILLMClient(api_key="test-key")
+    client = cached_client(inner)
+
+    assert client.rate_limit_stats() == inner.rate_limit_stats()
+    assert set(client.rate_limit_stats()) == {"text", "image"}
+    assert client.circuit_states() == inner.circuit_states()
+    assert cached_client(CountingLLMClient()).circuit_states() == {}
+
+
+def test_streamed_responses_are_cached_and_replayed_whole():
+    inner = CountingLLMClient()
+    client = cached_client(inner, stages=("rolling_summary",))
+    messages = [{"role": "user", "content": "Summarize the story."}]
+
+    async def collect():
+        return [fragment async for fragment in client.async_stream_structured_messages(messages, StorySummaryResult)]
+
+    async def scenario():
+        return await collect(), await collect()
+
+    streamed, replayed = asyncio.run(scenario())
+
+    assert len(streamed) > 1
+    assert len(replayed) == 1
+    assert StorySummaryResult.model_validate_json(replayed[0]) == StorySummaryResult.model_validate_json(
+        "".join(streamed)
+    )
+    assert inner.calls == [StorySummaryResult]
+    assert client.stats() == {"rolling_summary": {"hits": 1, "misses": 1}}
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from mongo_fakes import use_fake_mongo
+
+from classes import DEFAULT_MAX_CARRY_WEIGHT_KG, STATE_SCHEMA_VERSION, State
+from database import MongoGameRepository, SQLiteGameRepository
+from migrations import migrate_state_documents, upgrade_state_documents
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = SQLiteGameRepository(tmp_path / "cya.db")
+    yield repository
+    repository.close()
+
+
+def legacy_game(repository, player_name) -> State:
+    state = State(player_name=player_name, chat_history=[{"role": "user", "content": "Go."}])
+    repository.save_game(state)
+    document = state.serialize()
+    del document["chat_history"]
+    del document["world_state"]
+    document["player_attributes"]["max_carry_weight_kg"] = None
+    with repository._connection:
+        repository._connection.execute(
+            "UPDATE games SET state_json = ?, state_schema_version = 0 WHERE id = ?",
+            (json.dumps(document, default=str), state._id),
+        )
+    return state
+
+
+def stored_documents(repository):
+    rows = repository._connection.execute("SELECT state_json, state_schema_version FROM games ORDER BY id")
+    return [(json.loads(row["state_json"]), row["state_schema_version"]) for row in rows]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_migrate_state_documents_upgrades_legacy_rows_once(repository, workers):
+    states = [legacy_game(repository, f"player-{index}") for index in range(5)]
+    current = State(player_name="current")
+    repository.save_game(current)
+
+    assert len(repository.list_legacy_state_documents()) == 5
+    assert migrate_state_documents(repository, batch_size=2, workers=workers) == 5
+
+    for document, schema_version in stored_documents(repository):
+        assert schema_version == STATE_SCHEMA_VERSION
+        assert document["schema_version"] == STATE_SCHEMA_VERSION
+        assert "chat_history" not in document
+        assert "world_state" not in document
+    for state in states:
+        loaded = repository.get_game(state._id)
+        assert loaded.player_attributes.max_carry_weight_kg == DEFAULT_MAX_CARRY_WEIGHT_KG
+        assert loaded.chat_history == state.chat_history
+        assert loaded.revision == state.revision
+    assert repository.list_legacy_state_documents() == []
+    assert migrate_state_documents(repository, workers=workers) == 0
+
+
+def test_replace_state_documents_skips_games_saved_since_they_were_read(repository):
+    state = legacy_game(repository, "Iris")
+    legacy = repository.list_legacy_state_documents()
+    loaded = repository.get_game(state._id)
+    loaded.hit_points = 2
+    repository.save_game(loaded)
+
+    assert repository.replace_state_documents(legacy) == 0
+    assert repository.get_game(state._id).hit_points == 2
+    assert repository.list_legacy_state_documents() == []
+
+
+def test_saving_a_legacy_game_upgrades_its_document(repository):
+    state = legacy_game(repository, "Iris")
+    loaded = repository.get_game(state._id)
+    repository.save_game(loaded)
+
+    [(document, schema_version)] = stored_documents(repository)
+    assert schema_version == STATE_SCHEMA_VERSION
+    assert document["player_attributes"]["max_carry_weight_kg"] == DEFAULT_MAX_CARRY_WEIGHT_KG
+
+
+def test_mongo_replace_state_documents_skips_games_saved_since_they_were_read(monkeypatch):
+    database = use_fake_mongo(monkeypatch)
+    repository = MongoGameRepository()
+    states = [State(player_name=player_name) for player_name in ("Iris", "Morgan")]
+    for state in states:
+        repository.save_game(state)
+    for document in database.collections["games"].documents:
+        document["schema_version"] = 0
+        document["player_attributes"]["max_carry_weight_kg"] = None
+    upgraded = upgrade_state_documents(repository.list_legacy_state_documents())
+    changed = repository.get_game(states[1]._id)
+    changed.hit_points = 2
+    repository.save_game(changed)
+
+    assert repository.replace_state_documents(upgraded) == 1
+
+    untouched, saved = (repository.get_game(state._id) for state in states)
+    assert untouched.player_attributes.max_carry_weight_kg == DEFAULT_MAX_CARRY_WEIGHT_KG
+    assert untouched.revision == 0
+    assert {document["schema_version"] for document in database.collections["games"].documents} == {
+        STATE_SCHEMA_VERSION
+    }
+    assert (saved.hit_points, saved.revision) == (2, 1)
+    # Saving the changed game upgraded its document too.
+    assert repository.list_legacy_state_documents() == []
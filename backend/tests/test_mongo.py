@@ -0,0 +1,103 @@
+import pytest
+from mongo_fakes import GRIDFS_CHUNK_SIZE_BYTES, use_fake_mongo
+
+from classes import GameRecord, State
+from database import MongoGameRepository, mongo_image_filenames, mongo_moment_filename
+from images import Images
+
+
+@pytest.fixture
+def database(monkeypatch):
+    return use_fake_mongo(monkeypatch)
+
+
+@pytest.fixture
+def repository(database):
+    repository = MongoGameRepository()
+    yield repository
+    repository.close()
+
+
+def saved_game(repository, player_name="Iris") -> State:
+    state = State(player_name=player_name)
+    repository.save_game(state)
+    return state
+
+
+def test_mongo_repository_reads_the_latest_version_of_each_file(repository, database):
+    state = saved_game(repository)
+    repository.save_game_and_images(state, Images(state._id, b"old-portrait", b"old-backdrop"))
+    repository.save_game_and_images(state, Images(state._id, b"new-portrait", b"new-backdrop"))
+    # Versions uploaded in the same millisecond are told apart by their ObjectIds.
+    upload_date = database.collections["fs.files"].documents[0]["uploadDate"]
+    for stored in database.collections["fs.files"].documents:
+        stored["uploadDate"] = upload_date
+
+    assert repository.get_image_bytes(state._id) == (b"new-portrait", b"new-backdrop")
+
+
+def test_mongo_repository_joins_chunks_in_order_whatever_order_they_are_stored_in(repository, database):
+    state = saved_game(repository)
+    portrait = bytes(range(256)) * (2 * GRIDFS_CHUNK_SIZE_BYTES // 256 + 10)
+    repository.save_game_and_images(state, Images(state._id, portrait, b"backdrop"))
+    database.collections["fs.chunks"].documents.reverse()
+
+    assert len(database.collections["fs.chunks"].documents) == 4
+    assert repository.get_image_bytes(state._id) == (portrait, b"backdrop")
+    assert repository.export_game(state._id).portrait == portrait
+
+
+def test_mongo_repository_treats_missing_files_as_absent(repository, database):
+    state = saved_game(repository)
+    repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+    kept = repository.add_moment(state._id, "The gate opens.", b"kept")
+    lost = repository.add_moment(state._id, "The bridge falls.", b"lost")
+    _, backdrop_filename = mongo_image_filenames(state._id)
+    database.collections["fs.files"].delete_many(
+        {"filename": {"$in": [backdrop_filename, mongo_moment_filename(lost.id)]}}
+    )
+
+    assert repository.get_image_bytes(state._id) is None
+    assert repository.get_image_bytes("missing") is None
+    assert repository.get_moment_image(state._id, lost.id) is None
+    assert [moment.id for moment, _ in repository.list_moments(state._id)] == [kept.id]
+    record = repository.export_game(state._id)
+    assert (record.portrait, record.backdrop) == (b"portrait", None)
+
+
+def test_mongo_repository_deletes_every_file_version_and_its_chunks(repository, database):
+    state = saved_game(repository)
+    other = saved_game(repository, "Morgan")
+    large = b"x" * (GRIDFS_CHUNK_SIZE_BYTES + 1)
+    repository.save_game_and_images(state, Images(state._id, b"old-portrait", b"old-backdrop"))
+    repository.save_game_and_images(state, Images(state._id, large, b"backdrop"))
+    repository.add_moment(state._id, "The gate opens.", large)
+    repository.save_game_and_images(other, Images(other._id, b"portrait", b"backdrop"))
+
+    assert repository.delete_game(state._id) is True
+    assert repository.delete_game(state._id) is False
+
+    files = database.collections["fs.files"].documents
+    assert sorted(stored["filename"] for stored in files) == sorted(mongo_image_filenames(other._id))
+    assert {chunk["files_id"] for chunk in database.collections["fs.chunks"].documents} == {
+        stored["_id"] for stored in files
+    }
+    assert database.collections["moments"].documents == []
+    assert repository.get_image_bytes(other._id) == (b"portrait", b"backdrop")
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_mongo_list_game_ids_pages_across_string_and_object_ids(repository, limit):
+    native_ids = [saved_game(repository, f"native-{index}")._id for index in range(3)]
+    imported_ids = ["game-b", "game-a", "game-c"]
+    repository.import_games([GameRecord(State(_id=game_id, player_name=game_id)) for game_id in imported_ids])
+
+    listed = []
+    after = None
+    while page := repository.list_game_ids(after=after, limit=limit):
+        assert len(page) <= limit
+        listed.extend(page)
+        after = page[-1]
+
+    # String ids sort before ObjectIds, as MongoDB orders mixed BSON types.
+    assert listed == sorted(imported_ids) + sorted(native_ids)
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+
+import pytest
+
+from archive import GameArchive
+from classes import State, WorldState
+from database import (
+    ExecutorGameRepository,
+    GameWrite,
+    RevisionConflictError,
+    SQLiteGameRepository,
+    create_game_repository,
+    partition_of,
+)
+from images import Images
+from partitioned import (
+    PartitionedGameRepository,
+    open_sqlite_game_repository,
+    partition_paths,
+    read_partition_count,
+    reshard,
+)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = open_sqlite_game_repository(
+        tmp_path / "cya.db", partitions=3, archive=GameArchive(tmp_path / "cya-archive.db")
+    )
+    yield repository
+    repository.close()
+
+
+def saved_games(repository, count):
+    states = []
+    for index in range(count):
+        state = State(player_name=f"player-{index}", chat_history=[{"role": "user", "content": f"Turn {index}."}])
+        repository.save_game(state)
+        states.append(state)
+    return states
+
+
+def test_partitioned_repository_routes_each_game_to_its_partition(repository, tmp_path):
+    states = saved_games(repository, 12)
+    repository.add_moment(states[0]._id, "The gate opens.", b"moment")
+    states[0].world_state = WorldState(current_location="market")
+    repository.save_game_and_images(states[0], Images(states[0]._id, b"portrait", b"backdrop"))
+
+    assert isinstance(repository, PartitionedGameRepository)
+    assert [path.name for path in partition_paths(tmp_path / "cya.db", 3)] == [
+        "cya-0-of-3.db",
+        "cya-1-of-3.db",
+        "cya-2-of-3.db",
+    ]
+    for state in states:
+        owner = repository.partitions[partition_of(state._id, 3)]
+        assert owner.get_revision(state._id) is not None
+        assert sum(partition.get_revision(state._id) is not None for partition in repository.partitions) == 1
+    loaded = repository.get_game(states[0]._id)
+    assert loaded.world_state.current_location == "market"
+    assert repository.get_image_bytes(states[0]._id) == (b"portrait", b"backdrop")
+    assert [moment.caption for moment in repository.list_moment_summaries(states[0]._id)] == ["The gate opens."]
+    assert sorted(state.player_name for state in repository.all_games()) == sorted(s.player_name for s in states)
+
+    stale = repository.get_game(states[1]._id)
+    repository.save_game(repository.get_game(states[1]._id))
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(stale)
+
+
+def test_partitioned_listing_merges_partitions_in_storage_order(repository):
+    states = saved_games(repository, 7)
+    for state in states[:3]:
+        repository.save_game(state)
+
+    listed = []
+    cursor = None
+    while True:
+        page = repository.list_game_summaries(limit=2, cursor=cursor)
+        listed.extend(summary.id for summary in page.summaries)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    # Games never saved since creation have no updated_at and list last, by id.
+    never_saved = sorted((state._id for state in states[3:]), reverse=True)
+    assert listed == [state._id for state in reversed(states[:3])] + never_saved
+    ids = repository.list_game_ids(limit=4)
+    assert ids == sorted(state._id for state in states)[:4]
+    assert repository.list_game_ids(after=ids[-1]) == sorted(state._id for state in states)[4:]
+
+
+def test_partitioned_save_games_commits_every_partition_and_reports_conflicts(repository):
+    states = saved_games(repository, 6)
+    stale = repository.get_game(states[0]._id)
+    repository.save_game(repository.get_game(states[0]._id))
+    writes = [GameWrite(State.from_primitive({**state.to_primitive(), "revision": 1}), 0) for state in states[1:]]
+    for write in writes:
+        write.state._id = states[writes.index(write) + 1]._id
+    conflicts = repository.save_games([GameWrite(stale, stale.revision), *writes])
+
+    assert [conflict.state for conflict in conflicts] == [stale]
+    assert all(repository.get_revision(state._id) == 1 for state in states[1:])
+
+
+def test_reshard_moves_every_game_and_keeps_archived_games(tmp_path):
+    path = tmp_path / "cya.db"
+    archive = GameArchive(tmp_path / "cya-archive.db")
+    single = open_sqlite_game_repository(path, archive=archive)
+    states = saved_games(single, 10)
+    single.add_moment(states[0]._id, "first", b"one")
+    single.add_moment(states[0]._id, "second", b"two")
+    states[1].game_over = True
+    single.save_game(states[1])
+    assert single.archive_games() == 1
+    single.close()
+
+    with pytest.raises(RuntimeError, match="reshard"):
+        open_sqlite_game_repository(path, partitions=4)
+    assert reshard(path, 4, batch_size=3) == 10
+    assert read_partition_count(path) == 4
+    assert not path.exists()
+
+    repository = open_sqlite_game_repository(path, partitions=4, archive=GameArchive(tmp_path / "cya-archive.db"))
+    assert {summary.id for summary in repository.list_game_summaries().summaries} == {state._id for state in states}
+    assert [(moment.caption, image) for moment, image in repository.list_moments(states[0]._id)] == [
+        ("first", b"one"),
+        ("second", b"two"),
+    ]
+    assert repository.get_game(states[1]._id).game_over is True
+    assert repository.get_game(states[2]._id).chat_history == states[2].chat_history
+    repository.close()
+
+    assert reshard(path, 1) == 10
+    assert read_partition_count(path) == 1
+    assert not any(old.exists() for old in partition_paths(path, 4))
+    restored = open_sqlite_game_repository(path)
+    assert isinstance(restored, SQLiteGameRepository)
+    assert len(restored.all_games()) == 10
+    restored.close()
+
+
+def test_create_game_repository_opens_partitions_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("CYA_SQLITE_PATH", str(tmp_path / "cya.db"))
+    monkeypatch.setenv("CYA_SQLITE_PARTITIONS", "2")
+
+    repository = create_game_repository()
+
+    assert isinstance(repository, PartitionedGameRepository)
+    assert read_partition_count(tmp_path / "cya.db") == 2
+    repository.close()
+
+
+def test_executor_repository_pins_each_game_to_one_writer_thread():
+    threads_by_game = {}
+
+    class RecordingRepository:
+        def save_game(self, state):
+            threads_by_game.setdefault(state._id, set()).add(threading.current_thread().name)
+
+    async_repository = ExecutorGameRepository(RecordingRepository(), writer_threads=3)
+    states = [State() for _ in range(6)]
+    for index, state in enumerate(states):
+        state._id = f"game-{index}"
+
+    async def scenario():
+        await asyncio.gather(*(async_repository.save_game(state) for state in states * 3))
+
+    asyncio.run(scenario())
+    asyncio.run(async_repository.close())
+
+    for game_id, threads in threads_by_game.items():
+        assert threads == {f"cya-db-writer-{partition_of(game_id, 3)}_0"}
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rate_limit import (
+    LLMRateLimiter,
+    RateLimitTimeoutError,
+    TokenBucket,
+    create_llm_rate_limiter,
+    estimate_request_tokens,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_per_minute_and_reports_wait_for_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(2) == pytest.approx(2.0)
+    clock.now += 2
+    assert bucket.available == pytest.approx(0.0)
+    clock.now += 120
+    assert bucket.available == 60
+
+
+def test_token_usage_corrects_the_estimate_after_the_call():
+    clock = FakeClock()
+    limiter = LLMRateLimiter("text", tokens_per_minute=1000, clock=clock)
+
+    with limiter.acquire(estimated_tokens=600) as permit:
+        permit.record_usage({"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150})
+
+    assert limiter._buckets["tokens"].available == pytest.approx(850)
+
+
+def test_requests_wait_for_the_per_minute_budget(monkeypatch):
+    clock = FakeClock()
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    limiter = LLMRateLimiter("text", requests_per_minute=2, clock=clock)
+
+    for _ in range(3):
+        limiter.acquire().release()
+
+    assert sleeps == [pytest.approx(30.0)]
+    assert limiter.stats()["delayed_calls"] == 1
+
+
+def test_calls_that_would_wait_past_their_timeout_are_refused_and_refunded(monkeypatch):
+    clock = FakeClock()
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    limiter = LLMRateLimiter("text", requests_per_minute=1, tokens_per_minute=600, clock=clock)
+    limiter.acquire(estimated_tokens=300).release()
+
+    with pytest.raises(RateLimitTimeoutError):
+        limiter.acquire(estimated_tokens=300, timeout=10)
+
+    assert sleeps == []
+    assert limiter._buckets["requests"].available == pytest.approx(0.0)
+    assert limiter._buckets["tokens"].available == pytest.approx(300)
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_slot_waits_give_up_at_the_timeout():
+    limiter = LLMRateLimiter("text", max_concurrency=1)
+    held = limiter.acquire()
+
+    with pytest.raises(RateLimitTimeoutError):
+        limiter.acquire(timeout=0.02)
+
+    async def scenario() -> None:
+        with pytest.raises(RateLimitTimeoutError):
+            await limiter.async_acquire(timeout=0.02)
+
+    asyncio.run(scenario())
+    held.release()
+
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["queue_depth"]) == (0, 0)
+    limiter.acquire(timeout=0.02).release()
+
+
+def test_concurrency_limit_queues_calls_in_order():
+    limiter = LLMRateLimiter("text", max_concurrency=1)
+    order = []
+
+    async def call(name: str) -> None:
+        with await limiter.async_acquire():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def scenario() -> dict:
+        tasks = [asyncio.create_task(call(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        depth = limiter.stats()["queue_depth"]
+        await asyncio.gather(*tasks)
+        return depth
+
+    queued = asyncio.run(scenario())
+
+    assert order == ["a start", "a end", "b start", "b end", "c start", "c end"]
+    assert queued == 2
+    stats = limiter.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["delayed_calls"] == 2
+    assert stats["wait_seconds_max"] > 0
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    limiter = LLMRateLimiter("text", max_concurrency=1)
+
+    async def scenario() -> None:
+        holder = await limiter.async_acquire()
+        waiter = asyncio.create_task(limiter.async_acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        holder.release()
+        (await asyncio.wait_for(limiter.async_acquire(), timeout=1)).release()
+
+    asyncio.run(scenario())
+
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_cancelling_a_budget_wait_refunds_the_reservation():
+    clock = FakeClock()
+    limiter = LLMRateLimiter("text", requests_per_minute=1, tokens_per_minute=600, clock=clock)
+
+    async def scenario() -> None:
+        (await limiter.async_acquire(estimated_tokens=300)).release()
+        waiter = asyncio.create_task(limiter.async_acquire(estimated_tokens=300))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+
+    assert limiter._buckets["requests"].available == pytest.approx(0.0)
+    assert limiter._buckets["tokens"].available == pytest.approx(300)
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_sync_callers_block_until_a_slot_is_released():
+    limiter = LLMRateLimiter("text", max_concurrency=1)
+    held = limiter.acquire()
+    acquired = threading.Event()
+
+    def worker() -> None:
+        with limiter.acquire():
+            acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    held.release()
+    thread.join(timeout=1)
+
+    assert acquired.is_set()
+
+
+def test_rate_limited_responses_halve_concurrency_once_per_burst():
+    clock = FakeClock()
+    limiter = LLMRateLimiter("text", max_concurrency=16, clock=clock)
+
+    limiter.observe_response(429, {})
+    limiter.observe_response(429, {})
+    assert limiter.stats()["concurrency_limit"] == 8
+
+    clock.now += 5
+    limiter.observe_response(429, {})
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["rate_limited_responses"] == 3
+
+    for _ in range(40):
+        limiter.acquire().release()
+    assert limiter.stats()["concurrency_limit"] > 4
+
+
+def test_unbounded_limiter_caps_concurrency_at_the_calls_in_flight_when_rate_limited():
+    limiter = LLMRateLimiter("text")
+    permits = [limiter.acquire() for _ in range(6)]
+
+    limiter.observe_response(429, {})
+
+    assert limiter.stats()["concurrency_limit"] == 3
+    for permit in permits:
+        permit.release()
+
+
+def test_response_headers_create_and_tighten_budgets():
+    clock = FakeClock()
+    limiter = LLMRateLimiter("text", tokens_per_minute=50_000, clock=clock)
+
+    limiter.observe_response(
+        200,
+        {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "10",
+            "x-ratelimit-limit-tokens": "30000",
+            "x-ratelimit-remaining-tokens": "29000",
+        },
+    )
+
+    stats = limiter.stats()
+    assert stats["requests_per_minute"] == 500
+    assert stats["tokens_per_minute"] == 30_000
+    assert limiter._buckets["requests"].available == 10
+    assert limiter._buckets["tokens"].available == 29_000
+
+
+def test_estimate_request_tokens_counts_message_text():
+    messages = [{"role": "system", "content": "a" * 400}, {"role": "user", "content": "b" * 40}]
+
+    assert estimate_request_tokens(messages, completion_tokens=10) == 120
+
+
+def test_create_llm_rate_limiter_reads_environment(monkeypatch):
+    monkeypatch.setenv("CYA_LLM_IMAGE_REQUESTS_PER_MINUTE", "5")
+    monkeypatch.setenv("CYA_LLM_IMAGE_MAX_CONCURRENCY", "2")
+    monkeypatch.delenv("CYA_LLM_TEXT_MAX_CONCURRENCY", raising=False)
+
+    image = create_llm_rate_limiter("image")
+    text = create_llm_rate_limiter("text")
+
+    assert image.stats()["requests_per_minute"] == 5
+    assert image.stats()["concurrency_limit"] == 2
+    assert text.stats()["concurrency_limit"] == 32
+    assert text.stats()["tokens_per_minute"] is None
@@ -0,0 +1,217 @@
+import asyncio
+
+import pytest
+
+from observability import InMemoryTraceRecorder
+from resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    RequestHedger,
+    create_circuit_breaker,
+    create_request_hedger,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def open_breaker(recorder: InMemoryTraceRecorder, clock: FakeClock, **options) -> CircuitBreaker:
+    breaker = CircuitBreaker(
+        "gpt-test", failure_threshold=3, recovery_seconds=10, trace_recorder=recorder, clock=clock, **options
+    )
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    return breaker
+
+
+def test_circuit_opens_after_consecutive_failures_and_fails_fast():
+    recorder = InMemoryTraceRecorder()
+    clock = FakeClock()
+    breaker = CircuitBreaker("gpt-test", failure_threshold=3, trace_recorder=recorder, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.allow_request() is False
+    assert breaker.rejected_calls == 1
+    assert [(trace.model, trace.event, trace.metadata) for trace in recorder.provider_traces] == [
+        ("gpt-test", "circuit_open", {"reason": "failure_threshold", "failures": 3})
+    ]
+
+
+def test_half_open_circuit_admits_probes_and_closes_on_success():
+    recorder = InMemoryTraceRecorder()
+    clock = FakeClock()
+    breaker = open_breaker(recorder, clock)
+
+    clock.now += 10
+
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert [trace.event for trace in recorder.provider_traces] == [
+        "circuit_open",
+        "circuit_half_open",
+        "circuit_closed",
+    ]
+
+
+def test_failed_probe_reopens_the_circuit():
+    recorder = InMemoryTraceRecorder()
+    clock = FakeClock()
+    breaker = open_breaker(recorder, clock)
+    clock.now += 10
+
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_OPEN
+    assert recorder.provider_traces[-1].metadata == {"reason": "probe_failed"}
+    clock.now += 9
+    assert breaker.allow_request() is False
+
+
+def test_cancelled_probe_frees_its_slot():
+    clock = FakeClock()
+    breaker = open_breaker(InMemoryTraceRecorder(), clock)
+    clock.now += 10
+
+    assert breaker.allow_request() is True
+    breaker.record_cancelled()
+
+    assert breaker.allow_request() is True
+
+
+def test_hedger_does_not_hedge_until_it_has_enough_latencies():
+    hedger = RequestHedger("gpt-test", min_samples=3)
+    hedger.record_latency(0.1)
+    hedger.record_latency(0.2)
+    assert hedger.hedge_delay() is None
+
+    hedger.record_latency(0.3)
+    assert hedger.hedge_delay() == 0.3
+
+
+def test_hedger_keeps_a_latency_window_per_stage():
+    hedger = RequestHedger("gpt-test", min_samples=2)
+    for seconds in (0.01, 0.02):
+        hedger.record_latency(seconds, "ActionAssessment")
+    for seconds in (4.0, 5.0):
+        hedger.record_latency(seconds, "Narration")
+
+    async def operation() -> str:
+        return "done"
+
+    asyncio.run(hedger.run(operation, "Chargen"))
+
+    assert hedger.hedge_delay("ActionAssessment") == 0.02
+    assert hedger.hedge_delay("Narration") == 5.0
+    assert hedger.hedge_delay("Chargen") is None
+    assert len(hedger._latencies["Chargen"]) == 1
+
+
+def test_hedged_request_uses_the_first_copy_to_finish():
+    recorder = InMemoryTraceRecorder()
+    hedger = RequestHedger("gpt-test", min_samples=1, trace_recorder=recorder)
+    hedger.record_latency(0.01)
+    calls = []
+    cancelled = []
+
+    async def operation() -> str:
+        call_number = len(calls)
+        calls.append(call_number)
+        try:
+            await asyncio.sleep(1 if call_number == 0 else 0)
+        except asyncio.CancelledError:
+            cancelled.append(call_number)
+            raise
+        return f"copy {call_number}"
+
+    result = asyncio.run(hedger.run(operation))
+
+    assert result == "copy 1"
+    assert cancelled == [0]
+    assert hedger.hedged_calls == 1
+    assert hedger.hedge_wins == 1
+    assert [(trace.event, trace.metadata["winner"]) for trace in recorder.provider_traces] == [("hedged", "hedge")]
+
+
+def test_hedged_request_waits_for_the_other_copy_when_one_fails():
+    hedger = RequestHedger("gpt-test", min_samples=1)
+    hedger.record_latency(0.01)
+    calls = []
+
+    async def operation() -> str:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise TimeoutError("primary timed out")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert asyncio.run(hedger.run(operation)) == "hedge"
+
+
+def test_hedged_request_raises_when_every_copy_fails():
+    hedger = RequestHedger("gpt-test", min_samples=1)
+    hedger.record_latency(0.01)
+
+    async def operation() -> str:
+        await asyncio.sleep(0.02)
+        raise TimeoutError("timed out")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(hedger.run(operation))
+    assert hedger.hedged_calls == 1
+
+
+def test_hedger_does_not_duplicate_calls_unless_the_circuit_is_closed():
+    clock = FakeClock()
+    breaker = open_breaker(InMemoryTraceRecorder(), clock)
+    clock.now += 10
+    hedger = RequestHedger("gpt-test", min_samples=1, circuit_breaker=breaker)
+    hedger.record_latency(0.001)
+    calls = []
+
+    async def operation() -> str:
+        calls.append(len(calls))
+        await asyncio.sleep(0.02)
+        return "probe"
+
+    assert asyncio.run(hedger.run(operation)) == "probe"
+    assert calls == [0]
+
+
+def test_factories_read_environment(monkeypatch):
+    monkeypatch.setenv("CYA_LLM_CIRCUIT_FAILURE_THRESHOLD", "7")
+    monkeypatch.setenv("CYA_LLM_CIRCUIT_RECOVERY_SECONDS", "2.5")
+    monkeypatch.delenv("CYA_LLM_HEDGING", raising=False)
+
+    breaker = create_circuit_breaker("gpt-test")
+
+    assert (breaker.failure_threshold, breaker.recovery_seconds, breaker.half_open_probes) == (7, 2.5, 1)
+    assert create_request_hedger("gpt-test") is None
+
+    monkeypatch.setenv("CYA_LLM_HEDGING", "true")
+    monkeypatch.setenv("CYA_LLM_HEDGE_PERCENTILE", "0.9")
+    hedger = create_request_hedger("gpt-test", breaker)
+    assert hedger is not None
+    assert hedger.percentile == 0.9
+    assert hedger.circuit_breaker is breaker
@@ -0,0 +1,73 @@
+import pytest
+
+from state_codec import (
+    MIN_COMPRESSED_PAYLOAD_BYTES,
+    ZLIB_HEADER,
+    StateCodecError,
+    ZlibCodec,
+    ZstdCodec,
+    create_state_codec,
+    decode_document,
+    decoders_for,
+    encode_document,
+)
+
+
+def large_document():
+    return {"chat_history": [{"role": "assistant", "content": f"The lantern flickers {index}."} for index in range(40)]}
+
+
+def test_encode_document_without_codec_is_plain_json():
+    assert encode_document({"turn": 1}) == '{"turn": 1}'
+
+
+def test_encode_document_keeps_small_documents_as_text():
+    encoded = encode_document({"turn": 1}, ZlibCodec())
+
+    assert isinstance(encoded, str)
+    assert len(encoded) < MIN_COMPRESSED_PAYLOAD_BYTES
+
+
+def test_zlib_codec_round_trips_with_header_byte():
+    document = large_document()
+    encoded = encode_document(document, ZlibCodec())
+
+    assert isinstance(encoded, bytes)
+    assert encoded[0] == ZLIB_HEADER
+    assert len(encoded) < len(encode_document(document))
+    assert decode_document(encoded, decoders_for(None)) == document
+
+
+def test_decode_document_reads_plain_json_rows():
+    assert decode_document('{"turn": 1}', decoders_for(ZlibCodec())) == {"turn": 1}
+
+
+def test_decode_document_rejects_unknown_header():
+    with pytest.raises(StateCodecError):
+        decode_document(b"\x7fpayload", decoders_for(None))
+
+
+def test_zstd_codec_round_trips_with_trained_dictionary():
+    pytest.importorskip("zstandard")
+    from state_codec import train_zstd_dictionary
+
+    samples = [encode_document(message).encode("utf-8") for message in large_document()["chat_history"]] * 20
+    codec = ZstdCodec(dictionary=train_zstd_dictionary(samples, size=1024))
+    document = large_document()
+    encoded = encode_document(document, codec)
+
+    assert decode_document(encoded, decoders_for(codec)) == document
+    with pytest.raises(StateCodecError):
+        decode_document(encoded, decoders_for(None))
+
+
+def test_state_codec_factory_reads_environment(monkeypatch):
+    monkeypatch.setenv("CYA_STATE_CODEC", "json")
+    assert create_state_codec() is None
+
+    monkeypatch.setenv("CYA_STATE_CODEC", "zlib")
+    assert isinstance(create_state_codec(), ZlibCodec)
+
+    monkeypatch.setenv("CYA_STATE_CODEC", "brotli")
+    with pytest.raises(RuntimeError, match="CYA_STATE_CODEC"):
+        create_state_codec()
@@ -0,0 +1,157 @@
+import json
+
+import pytest
+from mongo_fakes import use_fake_mongo
+
+from archive import GameArchive
+from classes import InventoryItem, State, WorldState
+from database import MongoGameRepository, SQLiteGameRepository
+from images import Images
+from transfer import (
+    EXPORT_CHECKPOINT_FILENAME,
+    GAMES_FILENAME,
+    IMPORT_CHECKPOINT_FILENAME,
+    export_games,
+    import_games,
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    repository = SQLiteGameRepository(tmp_path / "source.db", archive=GameArchive(tmp_path / "source-archive.db"))
+    yield repository
+    repository.close()
+
+
+def saved_game(repository, player_name) -> State:
+    state = State(
+        player_name=player_name,
+        chat_history=[{"role": "user", "content": f"{player_name} goes north."}],
+        world_state=WorldState(current_location="gate", inventory=[InventoryItem(id="item-1", name="rope")]),
+    )
+    repository.save_game(state)
+    repository.save_game_and_images(state, Images(state._id, b"portrait-" + player_name.encode(), b"backdrop"))
+    repository.add_moment(state._id, f"{player_name} reaches the gate.", b"moment-image")
+    return state
+
+
+def assert_same_games(source, target):
+    game_ids = source.list_game_ids(limit=1000)
+    assert target.list_game_ids(limit=1000) == game_ids
+    for game_id in game_ids:
+        assert target.get_game(game_id) == source.get_game(game_id)
+        assert target.get_image_bytes(game_id) == source.get_image_bytes(game_id)
+        assert target.list_moments(game_id) == source.list_moments(game_id)
+
+
+def test_export_and_import_round_trip_games_moments_and_images(source, tmp_path):
+    for player_name in ("Iris", "Morgan", "Sam"):
+        saved_game(source, player_name)
+    target = SQLiteGameRepository(":memory:")
+
+    assert export_games(source, tmp_path / "export", batch_size=2) == 3
+    assert import_games(target, tmp_path / "export", batch_size=2) == 3
+
+    lines = (tmp_path / "export" / GAMES_FILENAME).read_bytes().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == source.list_game_ids()
+    assert all(path.read_bytes() for path in (tmp_path / "export" / "blobs").rglob("*.png"))
+    assert_same_games(source, target)
+
+
+def test_import_into_mongo_round_trips_images_and_moments(source, tmp_path, monkeypatch):
+    use_fake_mongo(monkeypatch)
+    for player_name in ("Iris", "Morgan", "Sam"):
+        saved_game(source, player_name)
+    target = MongoGameRepository()
+    native = saved_game(target, "Native")
+    export_games(source, tmp_path / "export", batch_size=2)
+
+    assert import_games(target, tmp_path / "export", batch_size=2) == 3
+    (tmp_path / "export" / IMPORT_CHECKPOINT_FILENAME).unlink()
+    assert import_games(target, tmp_path / "export", batch_size=2) == 3
+
+    assert target.list_game_ids(limit=1000) == source.list_game_ids(limit=1000) + [native._id]
+    for game_id in source.list_game_ids(limit=1000):
+        assert target.get_game(game_id) == source.get_game(game_id)
+        assert target.get_image_bytes(game_id) == source.get_image_bytes(game_id)
+        assert target.list_moments(game_id) == source.list_moments(game_id)
+
+    round_trip = SQLiteGameRepository(":memory:")
+    assert export_games(target, tmp_path / "mongo-export", batch_size=2) == 4
+    assert import_games(round_trip, tmp_path / "mongo-export", batch_size=2) == 4
+    assert sorted(round_trip.list_game_ids(limit=1000)) == sorted(target.list_game_ids(limit=1000))
+    assert round_trip.get_image_bytes(native._id) == target.get_image_bytes(native._id)
+    assert round_trip.list_moments(native._id) == target.list_moments(native._id)
+
+
+def test_export_includes_archived_games_without_restoring_them(source, tmp_path):
+    state = saved_game(source, "Iris")
+    state.game_over = True
+    source.save_game(state)
+    source.archive_games()
+    target = SQLiteGameRepository(":memory:")
+
+    export_games(source, tmp_path / "export")
+    import_games(target, tmp_path / "export")
+
+    assert state._id in source.archive
+    loaded = target.get_game(state._id)
+    assert loaded.chat_history == state.chat_history
+    assert loaded.game_over is True
+    assert target.get_image_bytes(state._id) == (b"portrait-Iris", b"backdrop")
+
+
+def test_export_resumes_after_the_last_checkpoint(source, tmp_path, monkeypatch):
+    for player_name in ("Iris", "Morgan", "Sam"):
+        saved_game(source, player_name)
+    first_batch = source.list_game_ids(limit=1)
+    export_directory = tmp_path / "export"
+    real_list_game_ids = source.list_game_ids
+
+    def interrupted(after=None, limit=1):
+        if after is not None:
+            raise KeyboardInterrupt
+        return real_list_game_ids(after, limit)
+
+    monkeypatch.setattr(source, "list_game_ids", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        export_games(source, export_directory, batch_size=1)
+    checkpoint = json.loads((export_directory / EXPORT_CHECKPOINT_FILENAME).read_text())
+    assert checkpoint["last_id"] == first_batch[0]
+    with open(export_directory / GAMES_FILENAME, "ab") as games_file:
+        games_file.write(b'{"id": "torn')
+    monkeypatch.undo()
+
+    assert export_games(source, export_directory, batch_size=1) == 3
+    target = SQLiteGameRepository(":memory:")
+    assert import_games(target, export_directory) == 3
+    assert_same_games(source, target)
+
+
+def test_import_resumes_and_stops_before_a_partially_written_line(source, tmp_path):
+    for player_name in ("Iris", "Morgan", "Sam"):
+        saved_game(source, player_name)
+    export_directory = tmp_path / "export"
+    export_games(source, export_directory)
+    games_path = export_directory / GAMES_FILENAME
+    complete = games_path.read_bytes()
+    first_two = b"".join(complete.splitlines(keepends=True)[:2])
+    games_path.write_bytes(first_two + complete[len(first_two) : len(first_two) + 10])
+    target = SQLiteGameRepository(":memory:")
+
+    assert import_games(target, export_directory, batch_size=1) == 2
+    assert json.loads((export_directory / IMPORT_CHECKPOINT_FILENAME).read_text())["offset"] == len(first_two)
+
+    games_path.write_bytes(complete)
+    assert import_games(target, export_directory, batch_size=1) == 3
+    assert_same_games(source, target)
+
+
+def test_import_games_replaces_existing_games_in_one_batch(source):
+    state = saved_game(source, "Iris")
+    record = source.export_game(state._id)
+    target = SQLiteGameRepository(":memory:")
+    target.import_games([record, record])
+
+    assert target.list_game_ids() == [state._id]
+    assert target.list_moments(state._id) == source.list_moments(state._id)
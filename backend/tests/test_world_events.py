@@ -0,0 +1,68 @@
+import copy
+
+import pytest
+
+from classes import InventoryItem, Quest, WorldState
+from world_events import apply_world_events, diff_world_state
+
+
+def world(**values) -> dict:
+    return WorldState(**values).to_primitive()
+
+
+def test_diff_of_identical_world_states_is_empty():
+    document = world(current_location="glass market", conditions=["tired"])
+
+    assert diff_world_state(document, copy.deepcopy(document)) == []
+
+
+def test_diff_emits_one_event_per_changed_key_or_item():
+    torch = InventoryItem(id="item-1", name="torch")
+    old = world(inventory=[torch], known_npcs={"Iris": "glassmaker"}, conditions=["tired"])
+    new = world(
+        current_location="causeway",
+        inventory=[torch, InventoryItem(id="item-2", name="rope")],
+        known_npcs={"Iris": "glassmaker", "Morgan": "ferryman"},
+        conditions=[],
+    )
+
+    events = diff_world_state(old, new)
+
+    assert events == [
+        {"op": "set", "field": "current_location", "value": "causeway"},
+        {"op": "put", "field": "inventory", "key": "item-2", "value": new["inventory"][1]},
+        {"op": "delete", "field": "conditions", "key": "tired"},
+        {"op": "put", "field": "known_npcs", "key": "Morgan", "value": "ferryman"},
+    ]
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        (
+            world(quests=[Quest(id="quest-1", title="find the lantern")]),
+            world(quests=[Quest(id="quest-1", title="find the lantern", status="resolved", outcome="Found it.")]),
+        ),
+        (
+            world(inventory=[InventoryItem(id="a", name="torch"), InventoryItem(id="b", name="rope")]),
+            world(inventory=[InventoryItem(id="b", name="rope"), InventoryItem(id="a", name="torch")]),
+        ),
+        (
+            world(world_flags={"gate_open": True, "bell": {"rung": 1}}),
+            world(world_flags={"bell": {"rung": 2}}),
+        ),
+        (world(conditions=["tired", "tired"]), world(conditions=["tired"])),
+        (world(), world(relationships={"Iris": "ally"}, version=2)),
+    ],
+)
+def test_applying_the_diff_reproduces_the_new_world_state(old, new):
+    events = diff_world_state(old, new)
+
+    assert apply_world_events(copy.deepcopy(old), events) == new
+
+
+def test_diff_falls_back_to_replacing_reordered_lists():
+    old = world(conditions=["tired", "soaked"])
+    new = world(conditions=["soaked", "tired"])
+
+    assert diff_world_state(old, new) == [{"op": "set", "field": "conditions", "value": ["soaked", "tired"]}]
@@ -0,0 +1,214 @@
+import time
+
+import pytest
+
+from classes import State, WorldState
+from database import RevisionConflictError, SQLiteGameRepository
+from images import Images
+from write_behind import WriteBehindGameRepository, create_write_behind_game_repository
+
+SLOW_FLUSH_SECONDS = 60.0
+
+
+class RecordingRepository(SQLiteGameRepository):
+    def __init__(self, path=":memory:") -> None:
+        super().__init__(path)
+        self.batches = []
+
+    def save_games(self, writes):
+        self.batches.append([(write.state._id, write.expected_revision, write.state.revision) for write in writes])
+        return super().save_games(writes)
+
+
+def test_write_behind_coalesces_saves_into_one_batch():
+    storage = RecordingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=SLOW_FLUSH_SECONDS)
+    first = State(player_name="Iris")
+    second = State(player_name="Morgan")
+    repository.save_game(first)
+    repository.save_game(second)
+
+    repository.save_game(first)
+    first.chat_history.append({"role": "user", "content": "Go."})
+    repository.save_game(first)
+    repository.save_game(second)
+    repository.flush()
+
+    assert storage.batches == [[(first._id, 0, 2), (second._id, 0, 1)]]
+    assert storage.get_game(first._id).chat_history == [{"role": "user", "content": "Go."}]
+    assert storage.get_revision(second._id) == 1
+    repository.close()
+
+
+def test_coalesced_saves_keep_the_world_events_of_every_revision():
+    storage = RecordingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=SLOW_FLUSH_SECONDS)
+    state = State(player_name="Iris", world_state=WorldState(current_location="gate"))
+    repository.save_game(state)
+    for location in ("bridge", "keep", "tower"):
+        state.world_state.current_location = location
+        repository.save_game(state)
+
+    repository.flush()
+
+    assert storage.batches == [[(state._id, 0, 3)]]
+    assert [storage.get_world_state_at(state._id, revision).current_location for revision in range(4)] == [
+        "gate",
+        "bridge",
+        "keep",
+        "tower",
+    ]
+    repository.close()
+
+
+class FailingRepository(RecordingRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.failures_left = 0
+        self.attempts = 0
+
+    def save_games(self, writes):
+        self.attempts += 1
+        if self.failures_left:
+            self.failures_left -= 1
+            raise OSError("disk full")
+        return super().save_games(writes)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_write_behind_writes_saves_through_while_flushes_keep_failing(caplog):
+    storage = FailingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=0.01, max_flush_attempts=2)
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    storage.failures_left = 1000
+
+    repository.save_game(state)
+    wait_until(lambda: repository.failed_flushes >= 2)
+
+    assert "failed 2 times" in caplog.text
+    with pytest.raises(OSError, match="disk full"):
+        repository.save_game(state)
+    assert state.revision == 1
+    assert storage.get_revision(state._id) == 0
+    attempts = storage.attempts
+    wait_until(lambda: storage.attempts > attempts)
+    assert storage.attempts > attempts
+
+    storage.failures_left = 0
+    repository.save_game(state)
+
+    assert storage.get_revision(state._id) == state.revision == 2
+    assert repository.failed_flushes == 0
+    repository.close()
+
+
+def test_write_behind_reads_see_queued_saves():
+    storage = RecordingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=SLOW_FLUSH_SECONDS)
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    state.player_name = "Morgan"
+    repository.save_game_and_images(state, Images(state._id, b"portrait", b"backdrop"))
+
+    loaded = repository.get_game(state._id)
+
+    assert loaded.player_name == "Morgan"
+    assert loaded.revision == 1
+    assert repository.get_revision(state._id) == 1
+    assert repository.get_image_bytes(state._id) == (b"portrait", b"backdrop")
+    assert storage.get_revision(state._id) == 0
+    loaded.player_name = "changed after load"
+    assert repository.get_game(state._id).player_name == "Morgan"
+    repository.close()
+
+
+def test_write_behind_rejects_stale_saves_when_queued():
+    repository = WriteBehindGameRepository(RecordingRepository(), max_flush_latency_seconds=SLOW_FLUSH_SECONDS)
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    stale = repository.get_game(state._id)
+    repository.save_game(state)
+
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(stale)
+
+    assert stale.revision == 0
+    repository.close()
+
+
+def test_write_behind_flushes_within_max_latency():
+    storage = RecordingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=0.01)
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    repository.save_game(state)
+
+    deadline = time.monotonic() + 2
+    while storage.get_revision(state._id) != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert storage.get_revision(state._id) == 1
+    repository.close()
+
+
+def test_write_behind_drops_only_the_stale_write_in_a_batch_and_reports_it():
+    storage = RecordingRepository()
+    repository = WriteBehindGameRepository(storage, max_flush_latency_seconds=SLOW_FLUSH_SECONDS)
+    contested = State(player_name="Iris")
+    untouched = State(player_name="Morgan")
+    repository.save_game(contested)
+    repository.save_game(untouched)
+    repository.save_game(contested)
+    repository.save_game(untouched)
+
+    other_process_copy = storage.get_game(contested._id)
+    other_process_copy.player_name = "Other"
+    storage.save_game(other_process_copy)
+    repository.flush()
+
+    assert repository.dropped_conflicts == 1
+    assert storage.get_game(contested._id).player_name == "Other"
+    assert storage.get_revision(untouched._id) == 1
+    with pytest.raises(RevisionConflictError):
+        repository.save_game(contested)
+    reloaded = repository.get_game(contested._id)
+    repository.save_game(reloaded)
+    assert repository.get_revision(contested._id) == 2
+    repository.close()
+
+
+def test_write_behind_close_flushes_queued_saves(tmp_path):
+    database_path = tmp_path / "cya.db"
+    repository = WriteBehindGameRepository(
+        RecordingRepository(database_path), max_flush_latency_seconds=SLOW_FLUSH_SECONDS
+    )
+    state = State(player_name="Iris")
+    repository.save_game(state)
+    state.player_name = "Morgan"
+    repository.save_game(state)
+
+    repository.close()
+
+    reopened = SQLiteGameRepository(database_path)
+    assert reopened.get_game(state._id).player_name == "Morgan"
+    reopened.close()
+
+
+def test_write_behind_factory_is_opt_in(monkeypatch):
+    storage = RecordingRepository()
+
+    monkeypatch.delenv("CYA_WRITE_BEHIND", raising=False)
+    assert create_write_behind_game_repository(storage) is storage
+
+    monkeypatch.setenv("CYA_WRITE_BEHIND", "true")
+    monkeypatch.setenv("CYA_WRITE_BEHIND_MAX_LATENCY_MS", "20")
+    repository = create_write_behind_game_repository(storage)
+    assert isinstance(repository, WriteBehindGameRepository)
+    assert repository.max_flush_latency_seconds == 0.02
+    repository.close()
@@ -0,0 +1,175 @@
+"""Stream games between storage backends as NDJSON plus side-car image files.
+
+An export directory holds ``games.ndjson`` (one line per game with its state
+document and moment captions) and a ``blobs/`` directory with every portrait,
+backdrop and moment image. Games are read, written and imported one batch of
+ids at a time, so memory use does not grow with the size of the store.
+
+Exports and imports record their progress in a checkpoint file after every
+batch; rerunning the same command after an interruption resumes from there.
+Start a fresh export in an empty directory.
+
+    CYA_STORAGE_BACKEND=sqlite python -m transfer export backup/
+    CYA_STORAGE_BACKEND=mongodb python -m transfer import backup/
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from classes import GameRecord, State, StoryMoment
+from database import DEFAULT_TRANSFER_BATCH_SIZE, PortableGameRepository
+from state_codec import encode_document
+
+GAMES_FILENAME = "games.ndjson"
+BLOBS_DIRNAME = "blobs"
+EXPORT_CHECKPOINT_FILENAME = "export.checkpoint"
+IMPORT_CHECKPOINT_FILENAME = "import.checkpoint"
+
+
+def _read_checkpoint(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_checkpoint(path: Path, checkpoint: dict[str, Any]) -> None:
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+    os.replace(temporary_path, path)
+
+
+def _write_blob(directory: Path, game_id: str, name: str, data: bytes | None) -> str | None:
+    if data is None:
+        return None
+    relative_path = f"{BLOBS_DIRNAME}/{quote(game_id, safe='')}/{quote(name, safe='')}.png"
+    path = directory / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return relative_path
+
+
+def _read_blob(directory: Path, relative_path: str | None) -> bytes | None:
+    return None if relative_path is None else (directory / relative_path).read_bytes()
+
+
+def _record_line(directory: Path, record: GameRecord) -> bytes:
+    game_id = record.state._id
+    assert game_id is not None
+    document = {
+        "id": game_id,
+        "state": record.state.to_primitive(),
+        "portrait": _write_blob(directory, game_id, "portrait", record.portrait),
+        "backdrop": _write_blob(directory, game_id, "backdrop", record.backdrop),
+        "moments": [
+            {
+                "id": moment.id,
+                "caption": moment.caption,
+                "image": _write_blob(directory, game_id, f"moment-{moment.id}", image_bytes),
+            }
+            for moment, image_bytes in record.moments
+        ],
+    }
+    return encode_document(document).encode("utf-8") + b"\n"
+
+
+def _record_from_line(directory: Path, line: bytes) -> GameRecord:
+    document = json.loads(line)
+    state = State.from_primitive(document["state"])
+    state._id = document["id"]
+    return GameRecord(
+        state=state,
+        portrait=_read_blob(directory, document["portrait"]),
+        backdrop=_read_blob(directory, document["backdrop"]),
+        moments=[
+            (
+                StoryMoment(id=moment["id"], game_id=document["id"], caption=moment["caption"]),
+                (directory / moment["image"]).read_bytes(),
+            )
+            for moment in document["moments"]
+        ],
+    )
+
+
+def export_games(
+    repository: PortableGameRepository, directory: str | Path, batch_size: int = DEFAULT_TRANSFER_BATCH_SIZE
+) -> int:
+    """Export every game into ``directory``, resuming an interrupted export; returns the games exported."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = directory / EXPORT_CHECKPOINT_FILENAME
+    checkpoint = _read_checkpoint(checkpoint_path)
+    after = checkpoint.get("last_id")
+    exported = checkpoint.get("games", 0)
+    with open(directory / GAMES_FILENAME, "r+b" if checkpoint else "wb") as games_file:
+        # Drop anything written after the last checkpoint; those games are exported again.
+        games_file.truncate(checkpoint.get("offset", 0))
+        games_file.seek(0, os.SEEK_END)
+        while game_ids := repository.list_game_ids(after=after, limit=batch_size):
+            for game_id in game_ids:
+                record = repository.export_game(game_id)
+                if record is not None:
+                    games_file.write(_record_line(directory, record))
+                    exported += 1
+            games_file.flush()
+            os.fsync(games_file.fileno())
+            after = game_ids[-1]
+            _write_checkpoint(checkpoint_path, {"last_id": after, "offset": games_file.tell(), "games": exported})
+    return exported
+
+
+def import_games(
+    repository: PortableGameRepository, directory: str | Path, batch_size: int = DEFAULT_TRANSFER_BATCH_SIZE
+) -> int:
+    """Import an export directory in batches, resuming an interrupted import; returns the games imported."""
+    directory = Path(directory)
+    checkpoint_path = directory / IMPORT_CHECKPOINT_FILENAME
+    checkpoint = _read_checkpoint(checkpoint_path)
+    imported = checkpoint.get("games", 0)
+    with open(directory / GAMES_FILENAME, "rb") as games_file:
+        games_file.seek(checkpoint.get("offset", 0))
+        batch: list[GameRecord] = []
+        while True:
+            offset = games_file.tell()
+            line = games_file.readline()
+            # A line without a newline is still being written by an unfinished export.
+            complete = line.endswith(b"\n")
+            if complete:
+                batch.append(_record_from_line(directory, line))
+            if batch and (len(batch) >= batch_size or not complete):
+                repository.import_games(batch)
+                imported += len(batch)
+                batch = []
+                _write_checkpoint(
+                    checkpoint_path, {"offset": games_file.tell() if complete else offset, "games": imported}
+                )
+            if not complete:
+                return imported
+
+
+def main() -> None:
+    from database import create_game_repository
+
+    parser = argparse.ArgumentParser(description="Export or import games as NDJSON with side-car image files.")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("directory", help="export directory")
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_TRANSFER_BATCH_SIZE, help="games per read or import transaction"
+    )
+    arguments = parser.parse_args()
+
+    repository = create_game_repository()
+    if arguments.command == "export":
+        print(f"Exported {export_games(repository, arguments.directory, arguments.batch_size)} game(s).")
+    else:
+        print(f"Imported {import_games(repository, arguments.directory, arguments.batch_size)} game(s).")
+    repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""World-state change events computed by diffing primitive world-state documents.
+
+Events describe one change to one top-level ``WorldState`` field:
+
+* ``{"op": "set", "field": ..., "value": ...}`` replaces the whole field.
+* ``{"op": "put", "field": ..., "key": ..., "value": ...}`` sets a dict key,
+  replaces or appends the list item with that ``id``, or appends a missing
+  plain list value.
+* ``{"op": "delete", "field": ..., "key": ...}`` removes a dict key, the list
+  item with that ``id``, or a plain list value.
+
+``diff_world_state`` only emits fine-grained ops when replaying them
+reproduces the new value exactly; otherwise (reordered lists, changed types)
+it falls back to ``set`` for that field.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+
+def _item_key(item: Any) -> Any:
+    return item["id"] if isinstance(item, dict) and "id" in item else item
+
+
+def _field_ops(field_name: str, old: Any, new: Any) -> list[dict[str, Any]]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[dict[str, Any]] = [{"op": "delete", "field": field_name, "key": key} for key in old if key not in new]
+        ops.extend(
+            {"op": "put", "field": field_name, "key": key, "value": value}
+            for key, value in new.items()
+            if key not in old or old[key] != value
+        )
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        try:
+            old_by_key = {_item_key(item): item for item in old}
+            new_keys = {_item_key(item) for item in new}
+        except TypeError:
+            return [{"op": "set", "field": field_name, "value": new}]
+        ops = [{"op": "delete", "field": field_name, "key": key} for key in old_by_key if key not in new_keys]
+        ops.extend(
+            {"op": "put", "field": field_name, "key": _item_key(item), "value": item}
+            for item in new
+            if _item_key(item) not in old_by_key or old_by_key[_item_key(item)] != item
+        )
+        return ops
+    return [{"op": "set", "field": field_name, "value": new}]
+
+
+def _apply_event(document: dict[str, Any], event: dict[str, Any]) -> None:
+    field_name = event["field"]
+    if event["op"] == "set":
+        document[field_name] = event["value"]
+        return
+
+    target = document.setdefault(field_name, {})
+    key = event["key"]
+    if isinstance(target, dict):
+        if event["op"] == "put":
+            target[key] = event["value"]
+        else:
+            target.pop(key, None)
+        return
+
+    index = next((position for position, item in enumerate(target) if _item_key(item) == key), None)
+    if event["op"] == "delete":
+        if index is not None:
+            del target[index]
+    elif index is None:
+        target.append(event["value"])
+    else:
+        target[index] = event["value"]
+
+
+def apply_world_events(document: dict[str, Any], events: list[dict[str, Any]]) -> dict[str, Any]:
+    """Apply ``events`` to ``document`` in place and return it."""
+    for event in events:
+        _apply_event(document, event)
+    return document
+
+
+def diff_world_state(old: dict[str, Any], new: dict[str, Any]) -> list[dict[str, Any]]:
+    """Events that turn the ``old`` world-state document into ``new``."""
+    events: list[dict[str, Any]] = []
+    for field_name, value in new.items():
+        if field_name not in old:
+            events.append({"op": "set", "field": field_name, "value": value})
+            continue
+        if old[field_name] == value:
+            continue
+        ops = _field_ops(field_name, old[field_name], value)
+        replayed = apply_world_events({field_name: copy.deepcopy(old[field_name])}, ops)
+        if replayed[field_name] != value:
+            ops = [{"op": "set", "field": field_name, "value": value}]
+        events.extend(ops)
+    return events
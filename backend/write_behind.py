@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from datetime import datetime
+from threading import Condition, Lock, Thread
+
+from classes import GameSummaryPage, State, StoryMoment
+from database import (
+    DEFAULT_GAME_LISTING_LIMIT,
+    BatchGameRepository,
+    GameRepository,
+    GameWrite,
+    RevisionConflictError,
+)
+from images import Images
+from utils import bool_of_str
+
+DEFAULT_MAX_FLUSH_LATENCY_MS = 50
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_FLUSH_ATTEMPTS = 5
+MAX_FLUSH_RETRY_DELAY_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindGameRepository:
+    """Queue saves of existing games and group-commit them in batches.
+
+    Saves are validated against the latest known revision (queued, in flight
+    or stored) before they are accepted, so callers still get
+    ``RevisionConflictError`` immediately. Accepted saves are stamped with
+    their new revision, coalesced per game and committed by a background
+    thread in one transaction once the oldest save has waited
+    ``max_flush_latency_seconds`` or ``max_batch_size`` games are queued.
+    Reads see queued saves. New games are written through so they get a
+    stored row before anything refers to them. Saves coalesced into one write
+    still record the world events of every revision, so
+    ``get_world_state_at`` can rebuild each of them.
+
+    A failed batch stays queued and is retried with exponential backoff. After
+    ``max_flush_attempts`` consecutive failures, saves stop being queued: each
+    save flushes the queue and then writes straight to storage, raising the
+    storage error if either fails, so no save is acknowledged that is not
+    stored. The background thread keeps retrying with backoff meanwhile. A queued save
+    that loses a revision conflict to another process at flush time is
+    dropped, and the next save of that game raises ``RevisionConflictError``.
+
+    Queued saves are only visible to this process; use write-behind with a
+    single worker per database. ``close()`` flushes everything still queued.
+    """
+
+    def __init__(
+        self,
+        repository: BatchGameRepository,
+        max_flush_latency_seconds: float = DEFAULT_MAX_FLUSH_LATENCY_MS / 1000,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_flush_attempts: int = DEFAULT_MAX_FLUSH_ATTEMPTS,
+    ) -> None:
+        if max_flush_latency_seconds <= 0:
+            raise ValueError("max_flush_latency_seconds must be positive.")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        if max_flush_attempts < 1:
+            raise ValueError("max_flush_attempts must be at least 1.")
+        self.repository = repository
+        self.max_flush_latency_seconds = max_flush_latency_seconds
+        self.max_batch_size = max_batch_size
+        self.max_flush_attempts = max_flush_attempts
+        self.dropped_conflicts = 0
+        self.failed_flushes = 0
+        self._conflicted: set[str] = set()
+        self._pending: dict[str, GameWrite] = {}
+        self._in_flight: dict[str, GameWrite] = {}
+        self._oldest_pending_at: float | None = None
+        self._closed = False
+        self._condition = Condition()
+        self._flush_lock = Lock()
+        self._flusher = Thread(target=self._flush_periodically, name="cya-write-behind", daemon=True)
+        self._flusher.start()
+
+    def _queued(self, game_id: str) -> GameWrite | None:
+        return self._pending.get(game_id) or self._in_flight.get(game_id)
+
+    def _write(self, state: State, images: Images | None) -> None:
+        if images is None:
+            self.repository.save_game(state)
+        else:
+            self.repository.save_game_and_images(state, images)
+
+    def _raise_if_conflicted(self, game_id: str) -> None:
+        if game_id in self._conflicted:
+            self._conflicted.discard(game_id)
+            raise RevisionConflictError("A queued save of this game lost to a save by another process.")
+
+    def _save_directly(self, state: State, images: Images | None) -> None:
+        """Flush the queue, then write ``state`` straight to storage; raises the storage error if either fails."""
+        self.flush()
+        with self._flush_lock:
+            with self._condition:
+                self._raise_if_conflicted(state._id)
+            self._write(state, images)
+        with self._condition:
+            self.failed_flushes = 0
+            self._condition.notify_all()
+
+    def _enqueue(self, state: State, images: Images | None = None) -> None:
+        if state._id is None:
+            self._write(state, images)
+            return
+        if self.failed_flushes >= self.max_flush_attempts:
+            # Storage keeps failing: only acknowledge saves once they are stored.
+            self._save_directly(state, images)
+            return
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind repository is closed.")
+            self._raise_if_conflicted(state._id)
+            queued = self._queued(state._id)
+            current_revision = queued.state.revision if queued is not None else self.repository.get_revision(state._id)
+            if current_revision != state.revision:
+                raise RevisionConflictError("Game state was modified by another save.")
+
+            state.revision += 1
+            state.updated_at = datetime.now()
+            pending = self._pending.get(state._id)
+            write = GameWrite(state=state.copy(), expected_revision=current_revision, images=images)
+            if pending is not None:
+                self._coalesce(pending, write)
+            self._pending[state._id] = write
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.monotonic()
+            self._condition.notify_all()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                while self._pending and not self._closed and len(self._pending) < self.max_batch_size:
+                    assert self._oldest_pending_at is not None
+                    remaining = self._oldest_pending_at + self.max_flush_latency_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                self._flush_failed()
+
+    def _flush_failed(self) -> None:
+        with self._condition:
+            self.failed_flushes += 1
+            delay = min(self.max_flush_latency_seconds * 2**self.failed_flushes, MAX_FLUSH_RETRY_DELAY_SECONDS)
+            if self.failed_flushes == self.max_flush_attempts:
+                logger.exception(
+                    "Write-behind flush failed %d times; saves are written synchronously until storage recovers.",
+                    self.failed_flushes,
+                )
+            else:
+                logger.warning("Write-behind flush failed; retrying in %.2f s.", delay, exc_info=True)
+            # Wait on the condition rather than sleeping so that close() is not held up by the backoff.
+            self._condition.wait_for(lambda: self._closed, delay)
+
+    def flush(self) -> None:
+        """Commit every queued save in one transaction; raises the storage error if that fails."""
+        with self._flush_lock:
+            with self._condition:
+                if not self._pending:
+                    return
+                self._in_flight = self._pending
+                self._pending = {}
+                self._oldest_pending_at = None
+                writes = list(self._in_flight.values())
+            try:
+                conflicts = self.repository.save_games(writes)
+            except Exception:
+                with self._condition:
+                    self._requeue(writes)
+                    self._in_flight = {}
+                raise
+            with self._condition:
+                self._in_flight = {}
+                self.failed_flushes = 0
+                self.dropped_conflicts += len(conflicts)
+                self._conflicted.update(conflict.state._id for conflict in conflicts)
+                self._condition.notify_all()
+            for conflict in conflicts:
+                logger.warning("Write-behind dropped a stale save for game %s.", conflict.state._id)
+
+    @staticmethod
+    def _coalesce(older: GameWrite, newer: GameWrite) -> None:
+        """Fold ``older`` into ``newer``, keeping the world state of every revision so its events are still written."""
+        newer.expected_revision = older.expected_revision
+        if newer.images is None:
+            newer.images = older.images
+        newer.coalesced_world_states = [
+            *older.coalesced_world_states,
+            (older.state.revision, older.state.world_state),
+            *newer.coalesced_world_states,
+        ]
+
+    def _requeue(self, writes: list[GameWrite]) -> None:
+        """Put failed writes back in front of any newer saves for the same games."""
+        for write in writes:
+            newer = self._pending.get(write.state._id)
+            if newer is None:
+                self._pending[write.state._id] = write
+            else:
+                self._coalesce(write, newer)
+        if self._pending and self._oldest_pending_at is None:
+            self._oldest_pending_at = time.monotonic()
+
+    def save_game(self, state: State) -> None:
+        self._enqueue(state)
+
+    def save_game_and_images(self, state: State, images: Images) -> None:
+        self._enqueue(state, images)
+
+    def delete_game(self, game_id: str) -> bool:
+        with self._flush_lock:
+            with self._condition:
+                self._pending.pop(game_id, None)
+            return self.repository.delete_game(game_id)
+
+    def get_image_bytes(self, game_id: str) -> tuple[bytes, bytes] | None:
+        with self._condition:
+            queued = self._queued(game_id)
+            if queued is not None and queued.images is not None:
+                return queued.images.portrait.bytes, queued.images.backdrop.bytes
+        return self.repository.get_image_bytes(game_id)
+
+    def all_games(self) -> list[State]:
+        self.flush()
+        return self.repository.all_games()
+
+    def list_game_summaries(
+        self, limit: int = DEFAULT_GAME_LISTING_LIMIT, cursor: str | None = None
+    ) -> GameSummaryPage:
+        self.flush()
+        return self.repository.list_game_summaries(limit, cursor)
+
+    def get_game(self, game_id: str) -> State | None:
+        with self._condition:
+            queued = self._queued(game_id)
+            if queued is not None:
+                return queued.state.copy()
+        return self.repository.get_game(game_id)
+
+    def get_revision(self, game_id: str) -> int | None:
+        with self._condition:
+            queued = self._queued(game_id)
+            if queued is not None:
+                return queued.state.revision
+        return self.repository.get_revision(game_id)
+
+    def add_moment(self, game_id: str, caption: str, image_bytes: bytes) -> StoryMoment:
+        return self.repository.add_moment(game_id, caption, image_bytes)
+
+    def list_moments(self, game_id: str) -> list[tuple[StoryMoment, bytes]]:
+        return self.repository.list_moments(game_id)
+
+    def list_moment_summaries(self, game_id: str) -> list[StoryMoment]:
+        return self.repository.list_moment_summaries(game_id)
+
+    def get_moment_image(self, game_id: str, moment_id: str) -> bytes | None:
+        return self.repository.get_moment_image(game_id, moment_id)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+        try:
+            self.flush()
+        finally:
+            self.repository.close()
+
+
+def create_write_behind_game_repository(repository: GameRepository) -> GameRepository:
+    """Wrap ``repository`` when ``CYA_WRITE_BEHIND`` is enabled and it supports batched saves."""
+    if not bool_of_str(os.getenv("CYA_WRITE_BEHIND", "false")):
+        return repository
+    if not hasattr(repository, "save_games"):
+        raise RuntimeError("CYA_WRITE_BEHIND requires a storage backend with batched saves (sqlite).")
+    return WriteBehindGameRepository(
+        repository,
+        max_flush_latency_seconds=int(os.getenv("CYA_WRITE_BEHIND_MAX_LATENCY_MS", str(DEFAULT_MAX_FLUSH_LATENCY_MS)))
+        / 1000,
+        max_batch_size=int(os.getenv("CYA_WRITE_BEHIND_MAX_BATCH_SIZE", str(DEFAULT_MAX_BATCH_SIZE))),
+    )
@@ -1,48 +1,89 @@
 import { beforeEach, describe, expect, it, vi } from 'vitest';
 
-import { API_INITIALIZE_URL } from '../misc/enums';
-import { getExistingGames, initializeGame } from './games';
+import { API_INITIALIZE_URL, API_LOAD_GAME_URL } from '../misc/enums';
+import { SAVED_GAMES_PAGE_SIZE, getExistingGames, initializeGame, loadGame } from './games';
 
 describe('games API', () => {
   beforeEach(() => {
     vi.restoreAllMocks();
   });
 
-  it('sorts saves and normalizes assistant chat history roles', async () => {
+  it('requests the first page of save summaries', async () => {
     const fetchMock = vi.fn().mockResolvedValue({
       json: vi.fn().mockResolvedValue({
         results: [
-          {
-            playerName: 'Old',
-            playerDescription: 'A',
-            worldTheme: 'Forest',
-            gameOverSummary: '',
-            gameOver: false,
-            createdAt: '2026-01-01T00:00:00.000000',
-            updatedAt: '2026-01-01T00:00:00.000000',
-            objectIDString: 'old',
-            chatHistory: [{ role: 'assistant', content: 'Old narration' }],
-          },
           {
             playerName: 'New',
-            playerDescription: 'B',
             worldTheme: 'Moon',
-            gameOverSummary: '',
             gameOver: false,
             createdAt: '2026-01-02T00:00:00.000000',
             updatedAt: '2026-01-03T00:00:00.000000',
             objectIDString: 'new',
-            chatHistory: [{ role: 'user', content: 'Look around' }],
           },
+          {
+            playerName: 'Old',
+            worldTheme: 'Forest',
+            gameOver: false,
+            createdAt: '2026-01-01T00:00:00.000000',
+            updatedAt: '2026-01-01T00:00:00.000000',
+            objectIDString: 'old',
+          },
+        ],
+        nextCursor: null,
+      }),
+    });
+    vi.stubGlobal('fetch', fetchMock);
+
+    const page = await getExistingGames();
+
+    expect(fetchMock).toHaveBeenCalledWith(
+      `http://localhost:3000/api/games?limit=${SAVED_GAMES_PAGE_SIZE}`,
+      expect.objectContaining({ method: 'GET' }),
+    );
+    expect(page.saves.map((save) => save.objectIDString)).toEqual(['new', 'old']);
+    expect(page.nextCursor).toBeNull();
+  });
+
+  it('passes the cursor through to request the next page', async () => {
+    const fetchMock = vi.fn().mockResolvedValue({
+      json: vi.fn().mockResolvedValue({ results: [], nextCursor: 'after-old' }),
+    });
+    vi.stubGlobal('fetch', fetchMock);
+
+    const page = await getExistingGames('after-new');
+
+    expect(fetchMock).toHaveBeenCalledWith(
+      `http://localhost:3000/api/games?limit=${SAVED_GAMES_PAGE_SIZE}&cursor=after-new`,
+      expect.objectContaining({ method: 'GET' }),
+    );
+    expect(page.nextCursor).toBe('after-old');
+  });
+
+  it('normalizes assistant chat history roles in load responses', async () => {
+    const fetchMock = vi.fn().mockResolvedValue({
+      ok: true,
+      status: 200,
+      json: vi.fn().mockResolvedValue({
+        sender: 'system',
+        content: 'Game state successfully loaded.',
+        hitPoints: 5,
+        portraitSrc: '/portrait.png',
+        worldBackdropSrc: '/world.png',
+        gameId: 'game-1',
+        chatHistory: [
+          { role: 'system', content: 'setup' },
+          { role: 'assistant', content: 'Old narration' },
         ],
       }),
     });
     vi.stubGlobal('fetch', fetchMock);
 
-    const saves = await getExistingGames();
+    const result = await loadGame({ objectIDString: 'game-1' });
 
-    expect(saves.map((save) => save.objectIDString)).toEqual(['new', 'old']);
-    expect(saves[1].chatHistory[0]).toEqual({
+    expect(fetchMock).toHaveBeenCalledWith(API_LOAD_GAME_URL, expect.objectContaining({
+      method: 'POST',
+    }));
+    expect(result.data.chatHistory?.[1]).toEqual({
       role: 'gamemaster',
       content: 'Old narration',
     });
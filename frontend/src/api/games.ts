@@ -4,15 +4,17 @@ import {
   API_LOAD_GAME_URL,
 } from '../misc/enums';
 import type { DraftStartingState } from '../features/setup/setupTypes';
-import type { GameInfo, GameSave, LoadMessage, MessageResponse } from '../misc/types';
+import type { ChatHistoryMessage, GameInfo, GameSave, LoadMessage, MessageResponse } from '../misc/types';
 import { getJson, postJson } from './client';
 import { toChatHistoryMessage, toMessageResponse } from './messageMappers';
 import type { BackendGameSave, BackendMessage } from './types';
 
-const API_EXISTING_GAMES_URL = 'http://localhost:3000/api/existing_games';
+const API_GAMES_URL = 'http://localhost:3000/api/games';
+export const SAVED_GAMES_PAGE_SIZE = 50;
 
-type ExistingGamesResponse = {
+type GamesResponse = {
   results?: BackendGameSave[];
+  nextCursor?: string | null;
 };
 
 export type GameResponse = MessageResponse & {
@@ -20,25 +22,32 @@ export type GameResponse = MessageResponse & {
   hitPoints: number;
   portraitSrc: string;
   worldBackdropSrc: string;
+  chatHistory?: ChatHistoryMessage[];
 };
 
-function normalizeGameSave(save: BackendGameSave): GameSave {
-  return {
-    ...save,
-    chatHistory: (save.chatHistory || []).map(toChatHistoryMessage),
-  };
-}
+type BackendGameResponse = BackendMessage & Omit<Partial<GameResponse>, 'chatHistory'> & {
+  chatHistory?: BackendMessage[];
+};
 
-function normalizeGameResponse(response: BackendMessage & Partial<GameResponse>): GameResponse {
-  return toMessageResponse(response) as GameResponse;
+function normalizeGameResponse(response: BackendGameResponse): GameResponse {
+  const normalized = toMessageResponse(response) as GameResponse;
+  if (response.chatHistory) {
+    normalized.chatHistory = response.chatHistory.map(toChatHistoryMessage);
+  }
+  return normalized;
 }
 
-export async function getExistingGames(): Promise<GameSave[]> {
-  const { data } = await getJson<ExistingGamesResponse>(API_EXISTING_GAMES_URL);
+export type SavedGamesPage = {
+  saves: GameSave[];
+  nextCursor: string | null;
+};
+
+export async function getExistingGames(cursor?: string | null): Promise<SavedGamesPage> {
+  const params: Record<string, string | number> = { limit: SAVED_GAMES_PAGE_SIZE };
+  if (cursor) params.cursor = cursor;
+  const { data } = await getJson<GamesResponse>(API_GAMES_URL, params);
 
-  return (data.results || [])
-    .map(normalizeGameSave)
-    .sort((a, b) => new Date(b.updatedAt).getTime() - new Date(a.updatedAt).getTime());
+  return { saves: data?.results || [], nextCursor: data?.nextCursor ?? null };
 }
 
 export async function deleteGame(gameId: string) {
@@ -55,7 +64,7 @@ export async function initializeGame(gameInfo: GameInfo, draftState?: DraftStart
         attributes: draftState.attributes,
       }
     : gameInfo;
-  const result = await postJson<BackendMessage & Partial<GameResponse>>(API_INITIALIZE_URL, body);
+  const result = await postJson<BackendGameResponse>(API_INITIALIZE_URL, body);
 
   return {
     ...result,
@@ -64,7 +73,7 @@ export async function initializeGame(gameInfo: GameInfo, draftState?: DraftStart
 }
 
 export async function loadGame(loadMessage: LoadMessage) {
-  const result = await postJson<BackendMessage & Partial<GameResponse>>(API_LOAD_GAME_URL, loadMessage);
+  const result = await postJson<BackendGameResponse>(API_LOAD_GAME_URL, loadMessage);
 
   return {
     ...result,
@@ -27,6 +27,23 @@ describe('moments API', () => {
     ]);
   });
 
+  it('resolves relative image links against the API origin', async () => {
+    const fetchMock = vi.fn().mockResolvedValue({
+      ok: true,
+      status: 200,
+      json: vi.fn().mockResolvedValue({
+        results: [
+          { id: 'moment-1', caption: 'The gate opens.', imageSrc: '/api/moment_image?gameId=game-1&momentId=moment-1' },
+        ],
+      }),
+    });
+    vi.stubGlobal('fetch', fetchMock);
+
+    const moments = await getMoments('game-1');
+
+    expect(moments[0].imageSrc).toBe('http://localhost:3000/api/moment_image?gameId=game-1&momentId=moment-1');
+  });
+
   it('returns an empty array when the response has no results', async () => {
     const fetchMock = vi.fn().mockResolvedValue({
       ok: true,
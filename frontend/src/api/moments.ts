@@ -6,8 +6,13 @@ type MomentsResponse = {
   results?: StoryMoment[];
 };
 
+// The backend links each moment to its image by a path relative to the API origin.
+function resolveImageSrc(moment: StoryMoment): StoryMoment {
+  return { ...moment, imageSrc: new URL(moment.imageSrc, API_MOMENTS_URL).toString() };
+}
+
 export async function getMoments(gameId: string): Promise<StoryMoment[]> {
   const { data } = await getJson<MomentsResponse>(API_MOMENTS_URL, { gameId });
 
-  return data.results || [];
+  return (data.results || []).map(resolveImageSrc);
 }
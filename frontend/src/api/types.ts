@@ -8,12 +8,9 @@ export type BackendMessage = {
 
 export type BackendGameSave = {
   playerName: string;
-  playerDescription: string;
   worldTheme: string;
-  gameOverSummary: string;
   gameOver: boolean;
   createdAt: string;
   updatedAt: string;
   objectIDString: string;
-  chatHistory: BackendMessage[];
 };
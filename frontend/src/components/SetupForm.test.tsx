@@ -13,14 +13,11 @@ const gameInfo = {
 
 const save: GameSave = {
   playerName: 'Saved Hero',
-  playerDescription: 'Veteran',
   worldTheme: 'Undersea ruins',
-  gameOverSummary: '',
   gameOver: false,
   createdAt: '2026-06-01T10:00:00.000000',
   updatedAt: '2026-06-02T11:30:00.000000',
   objectIDString: 'save-1',
-  chatHistory: [],
 };
 
 function renderSetupForm(overrides = {}) {
@@ -31,6 +28,9 @@ function renderSetupForm(overrides = {}) {
     onSubmit: vi.fn().mockResolvedValue(undefined),
     existingGames: [],
     isLoadingSaves: false,
+    hasMoreSaves: false,
+    isLoadingMoreSaves: false,
+    loadMoreSaves: vi.fn(),
     selectedSave: null,
     setSelectedSave: vi.fn(),
     deleteGame: vi.fn(),
@@ -78,6 +78,21 @@ describe('SetupForm', () => {
     expect(props.setSelectedSave).toHaveBeenCalledWith(save);
   });
 
+  it('loads older saves only while another page exists', async () => {
+    const user = userEvent.setup();
+    const props = renderSetupForm({ existingGames: [save], hasMoreSaves: true });
+
+    await user.click(screen.getByRole('button', { name: /load older saves/i }));
+
+    expect(props.loadMoreSaves).toHaveBeenCalledTimes(1);
+  });
+
+  it('hides the load button on the last page of saves', () => {
+    renderSetupForm({ existingGames: [save] });
+
+    expect(screen.queryByRole('button', { name: /load older saves/i })).toBeNull();
+  });
+
   it('requires a second click before deleting a selected save', async () => {
     const user = userEvent.setup();
     const props = renderSetupForm({ existingGames: [save], selectedSave: save });
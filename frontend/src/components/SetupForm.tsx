@@ -13,6 +13,9 @@ function SetupForm({
   onSubmit,
   existingGames,
   isLoadingSaves,
+  hasMoreSaves,
+  isLoadingMoreSaves,
+  loadMoreSaves,
   selectedSave,
   setSelectedSave,
   deleteGame,
@@ -52,6 +55,16 @@ function SetupForm({
               </option>
             ))}
           </select>
+          {hasMoreSaves ? (
+            <button
+              type="button"
+              onClick={loadMoreSaves}
+              disabled={isLoadingMoreSaves}
+              className="mt-2 text-sm text-neutral-400 hover:text-neutral-200 disabled:cursor-wait"
+            >
+              {isLoadingMoreSaves ? 'Loading older saves…' : 'Load older saves'}
+            </button>
+          ) : null}
         </div>
       ) : null}
 
@@ -52,6 +52,9 @@ describe('SetupModal', () => {
     mockedUseSavedGames.mockReturnValue({
       existingGames: [],
       isLoadingSaves: false,
+      hasMoreSaves: false,
+      isLoadingMoreSaves: false,
+      loadMoreSaves: vi.fn(),
       selectedSave: null,
       setSelectedSave: vi.fn(),
       deleteGame: vi.fn(),
@@ -25,6 +25,9 @@ function SetupModal({
   const {
     existingGames,
     isLoadingSaves,
+    hasMoreSaves,
+    isLoadingMoreSaves,
+    loadMoreSaves,
     selectedSave,
     setSelectedSave,
     deleteGame,
@@ -57,6 +60,9 @@ function SetupModal({
             onSubmit={onSubmit}
             existingGames={existingGames}
             isLoadingSaves={isLoadingSaves}
+            hasMoreSaves={hasMoreSaves}
+            isLoadingMoreSaves={isLoadingMoreSaves}
+            loadMoreSaves={loadMoreSaves}
             selectedSave={selectedSave}
             setSelectedSave={setSelectedSave}
             deleteGame={deleteGame}
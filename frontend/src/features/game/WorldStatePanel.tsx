@@ -165,7 +165,7 @@ function MomentGallery({ moments }: { moments: StoryMoment[] }) {
             onClick={() => setEnlarged(moment)}
             className="aspect-square rounded-md overflow-hidden border border-white/10 hover:border-white/30 transition-colors"
           >
-            <img src={moment.imageSrc} alt={moment.caption} className="w-full h-full object-cover" />
+            <img src={moment.imageSrc} alt={moment.caption} loading="lazy" className="w-full h-full object-cover" />
           </button>
         ))}
       </div>
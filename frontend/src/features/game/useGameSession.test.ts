@@ -30,14 +30,11 @@ const mockedGetMoments = vi.mocked(getMoments);
 
 const fakeSave: GameSave = {
   playerName: 'Aldric',
-  playerDescription: 'A weary blacksmith',
   worldTheme: 'A besieged village',
-  gameOverSummary: '',
   gameOver: false,
   createdAt: '2026-01-01T00:00:00.000000',
   updatedAt: '2026-01-01T00:00:00.000000',
   objectIDString: 'save-1',
-  chatHistory: [],
 };
 
 function setup() {
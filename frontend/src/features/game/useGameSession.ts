@@ -83,14 +83,14 @@ export function useGameSession({ addMessage, clearMessages }: UseGameSessionArgs
 
     addMessage({ sender: data.sender, content: data.content });
 
-    selectedSave.chatHistory.forEach((message, idx) => {
+    (data.chatHistory ?? []).forEach((message, idx) => {
       if (idx === 0) return;
       addMessage({ sender: message.role, content: message.content });
     });
 
-    if (selectedSave.gameOverSummary) {
+    if (data.gameOverSummary) {
       addMessage({ sender: 'system', content: 'Oh, no! Unfortunately, you have died!' });
-      addMessage({ sender: 'system', content: selectedSave.gameOverSummary });
+      addMessage({ sender: 'system', content: data.gameOverSummary });
     }
 
     updateSessionMedia(data);
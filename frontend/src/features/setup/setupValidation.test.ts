@@ -5,14 +5,11 @@ import { gameInfoValidationMessage, isValidGameInfo } from './setupValidation';
 
 const save: GameSave = {
   playerName: 'Mira',
-  playerDescription: 'Veteran',
   worldTheme: 'Undersea ruins',
-  gameOverSummary: '',
   gameOver: false,
   createdAt: '2026-06-01T10:00:00.000000',
   updatedAt: '2026-06-02T11:30:00.000000',
   objectIDString: 'save-1',
-  chatHistory: [],
 };
 
 describe('isValidGameInfo', () => {
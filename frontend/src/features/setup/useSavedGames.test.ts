@@ -15,14 +15,11 @@ const mockedGetExistingGames = vi.mocked(getExistingGames);
 
 const save: GameSave = {
   playerName: 'Mira',
-  playerDescription: 'Veteran',
   worldTheme: 'Undersea ruins',
-  gameOverSummary: '',
   gameOver: false,
   createdAt: '2026-06-01T10:00:00.000000',
   updatedAt: '2026-06-02T11:30:00.000000',
   objectIDString: 'save-1',
-  chatHistory: [],
 };
 
 describe('useSavedGames', () => {
@@ -31,7 +28,7 @@ describe('useSavedGames', () => {
   });
 
   it('loads saves when the setup modal opens', async () => {
-    mockedGetExistingGames.mockResolvedValue([save]);
+    mockedGetExistingGames.mockResolvedValue({ saves: [save], nextCursor: null });
 
     const { result } = renderHook(() => useSavedGames(true));
 
@@ -39,10 +36,32 @@ describe('useSavedGames', () => {
       expect(result.current.isLoadingSaves).toBe(false);
       expect(result.current.existingGames).toEqual([save]);
     });
+    expect(result.current.hasMoreSaves).toBe(false);
+  });
+
+  it('appends the next page of saves using the returned cursor', async () => {
+    const older: GameSave = { ...save, playerName: 'Tam', objectIDString: 'save-2' };
+    mockedGetExistingGames
+      .mockResolvedValueOnce({ saves: [save], nextCursor: 'cursor-1' })
+      .mockResolvedValueOnce({ saves: [older], nextCursor: null });
+
+    const { result } = renderHook(() => useSavedGames(true));
+
+    await waitFor(() => {
+      expect(result.current.hasMoreSaves).toBe(true);
+    });
+
+    await act(async () => {
+      await result.current.loadMoreSaves();
+    });
+
+    expect(mockedGetExistingGames).toHaveBeenLastCalledWith('cursor-1');
+    expect(result.current.existingGames).toEqual([save, older]);
+    expect(result.current.hasMoreSaves).toBe(false);
   });
 
   it('deletes saves and clears the selected save', async () => {
-    mockedGetExistingGames.mockResolvedValue([save]);
+    mockedGetExistingGames.mockResolvedValue({ saves: [save], nextCursor: null });
     mockedDeleteGame.mockResolvedValue({ ok: true, status: 200, data: {} });
 
     const { result } = renderHook(() => useSavedGames(true));
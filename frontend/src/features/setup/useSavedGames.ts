@@ -7,17 +7,43 @@ export function useSavedGames(showModal: boolean) {
   const [existingGames, setExistingGames] = useState<GameSave[]>([]);
   const [isLoadingSaves, setIsLoadingSaves] = useState<boolean>(false);
   const [selectedSave, setSelectedSave] = useState<GameSave | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMoreSaves, setIsLoadingMoreSaves] = useState<boolean>(false);
 
   useEffect(() => {
     if (!showModal) return;
 
     setIsLoadingSaves(true);
     getExistingGames()
-      .then(setExistingGames)
-      .catch(() => setExistingGames([]))
+      .then((page) => {
+        setExistingGames(page.saves);
+        setNextCursor(page.nextCursor);
+      })
+      .catch(() => {
+        setExistingGames([]);
+        setNextCursor(null);
+      })
       .finally(() => setIsLoadingSaves(false));
   }, [showModal]);
 
+  const loadMoreSaves = async () => {
+    if (!nextCursor || isLoadingMoreSaves) return;
+
+    setIsLoadingMoreSaves(true);
+    try {
+      const page = await getExistingGames(nextCursor);
+      setExistingGames((prev) => {
+        const known = new Set(prev.map((game) => game.objectIDString));
+        return [...prev, ...page.saves.filter((game) => !known.has(game.objectIDString))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch {
+      // Keep the cursor so the player can try again.
+    } finally {
+      setIsLoadingMoreSaves(false);
+    }
+  };
+
   const deleteGame = async (save: GameSave) => {
     const res = await deleteSavedGame(save.objectIDString);
     console.assert(res.ok, 'Status: ', res.status, 'Data: ', res.data);
@@ -28,6 +54,9 @@ export function useSavedGames(showModal: boolean) {
   return {
     existingGames,
     isLoadingSaves,
+    hasMoreSaves: nextCursor !== null,
+    isLoadingMoreSaves,
+    loadMoreSaves,
     selectedSave,
     setSelectedSave,
     deleteGame,
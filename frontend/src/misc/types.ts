@@ -81,6 +81,9 @@ export type SetupFormProps = {
   gameInfo: GameInfo;
   existingGames: GameSave[];
   isLoadingSaves: boolean;
+  hasMoreSaves: boolean;
+  isLoadingMoreSaves: boolean;
+  loadMoreSaves: () => void;
   selectedSave: GameSave | null;
   setSelectedSave: (save: GameSave | null) => void;
   isFormValid: boolean;
@@ -143,14 +146,11 @@ export type ChatInputProps = {
 
 export type GameSave = {
   playerName: string
-  playerDescription: string
   worldTheme: string
-  gameOverSummary: string
   gameOver: boolean
   createdAt: string
   updatedAt: string
   objectIDString: string
-  chatHistory: ChatHistoryMessage[]
 }
 
 export type BackButtonProps = {